@@ -0,0 +1,246 @@
+"""
+Vectorized budget allocation across many candidate stocks.
+
+Instead of putting the trade budget into the one stock q_learning picks, allocate() spreads it
+over every candidate that passed the risk filter. It works from the candidates' daily returns,
+taken from the same year of daily bars build_temp_table reads through BAR_CACHE:
+
+    returns = return_matrix(helpers.get_historical_bars(symbols, "day", "year"), symbols)
+    selections = allocate(candidates, trade_budget, returns, method="risk_parity", cap=0.25)
+
+Two long-only methods are available, and both cap every position at `cap` of the budget. They
+are fully invested when the cap allows it; with fewer than 1 / cap usable candidates every
+position gets `cap` and the rest of the budget stays uninvested:
+
+- risk_parity: every position contributes the same share of portfolio variance.
+- mean_variance: maximizes expected return minus risk_aversion / 2 times the variance.
+
+Both use only matrix-vector products on the (shrunk) covariance matrix, so a few hundred
+candidates take milliseconds.
+"""
+import time
+import numpy as np
+import indicators
+from bar_cache import empty_bars
+
+METHODS = ("risk_parity", "mean_variance")
+DEFAULT_CAP = 0.25
+
+
+def return_matrix(bars_by_symbol, symbols):
+    """
+    Daily returns of several tickers on a shared time axis.
+
+    :param bars_by_symbol: Dictionary mapping upper-cased tickers to bar arrays (as returned by
+                           helpers.get_historical_bars).
+    :param symbols: Tickers to include, in column order.
+    :returns: (bars - 1) x len(symbols) array of fractional returns; NaN where a bar is missing.
+    """
+    panel = indicators.align({symbol: bars_by_symbol.get(symbol.upper(), empty_bars()) for symbol in symbols})
+    return (indicators.returns(panel.close)[:, 1:] / 100).T
+
+
+def moments(returns, shrinkage=0.2):
+    """
+    Mean and covariance of a (bars x symbols) return matrix. The off-diagonal covariances are
+    shrunk toward zero by `shrinkage`, which keeps the matrix well conditioned when there are
+    about as many symbols as bars. Missing returns contribute nothing.
+
+    :returns: (mean, covariance) per bar.
+    """
+    valid = ~np.isnan(returns)
+    counts = np.maximum(valid.sum(axis=0), 1)
+    mean = np.where(valid, returns, 0.0).sum(axis=0) / counts
+    centered = np.where(valid, returns - mean, 0.0)
+    covariance = centered.T @ centered / max(len(returns) - 1, 1)
+    variance = (centered ** 2).sum(axis=0) / np.maximum(counts - 1, 1)
+    covariance *= 1 - shrinkage
+    covariance[np.diag_indices_from(covariance)] = variance
+    return mean, covariance
+
+
+def cap_weights(weights, cap):
+    """
+    Caps weights that sum to 1 at `cap`, spreading the excess over the uncapped weights in
+    proportion to their size. If the excess cannot be spread (every nonzero weight is capped,
+    as always happens when cap < 1 / len(weights)), it stays unallocated.
+    """
+    weights = np.asarray(weights, dtype=float)
+    capped = np.zeros(len(weights), dtype=bool)
+    while True:
+        over = ~capped & (weights > cap)
+        if not over.any():
+            return weights
+        capped |= over
+        weights = np.where(capped, cap, weights)
+        free = weights[~capped].sum()
+        if free > 0:
+            weights[~capped] *= (1 - cap * capped.sum()) / free
+
+
+def project(values, cap):
+    """
+    Euclidean projection onto {w : 0 <= w <= cap, sum(w) = 1}: w = clip(values - shift, 0, cap),
+    with the shift found exactly from the sorted breakpoints of the piecewise-linear sum.
+    """
+    # Lowering the shift past values[i] starts w[i] growing; past values[i] - cap it stops.
+    breakpoints = np.concatenate([values, values - cap])
+    slopes = np.concatenate([np.ones(len(values)), -np.ones(len(values))])
+    order = np.argsort(-breakpoints, kind="stable")
+    breakpoints, slopes = breakpoints[order], np.cumsum(slopes[order])
+    totals = np.concatenate([[0.0], np.cumsum(slopes[:-1] * -np.diff(breakpoints))])
+    k = min(np.searchsorted(totals, 1.0), len(totals) - 1)
+    shift = breakpoints[k - 1] - (1.0 - totals[k - 1]) / slopes[k - 1]
+    return np.clip(values - shift, 0, cap)
+
+
+def risk_parity(covariance, cap=None, tol=1e-6, max_iter=500):
+    """
+    Equal risk contribution weights, starting from inverse volatility and iterating the
+    fixed point w_i = variance / (n * (covariance @ w)_i) (damped by a geometric mean).
+
+    :param cap: (Optional) Largest weight; excess goes to the other positions (see cap_weights).
+    :param tol: Stop once every risk contribution is within tol of 1 / n.
+    :returns: Weights summing to 1 (less when cap < 1 / n, see cap_weights).
+    """
+    n = len(covariance)
+    weights = 1 / np.sqrt(np.diag(covariance))
+    weights /= weights.sum()
+    for _ in range(max_iter):
+        marginal = np.maximum(covariance @ weights, 1e-18)
+        contributions = weights * marginal
+        variance = contributions.sum()
+        if np.abs(contributions / variance - 1 / n).max() < tol:
+            break
+        weights = np.sqrt(weights * variance / (n * marginal))
+        weights /= weights.sum()
+    return weights if cap is None else cap_weights(weights, cap)
+
+
+def mean_variance(mean, covariance, risk_aversion=5.0, cap=None, tol=1e-8, max_iter=5000):
+    """
+    Long-only mean-variance weights: maximizes mean @ w - risk_aversion / 2 * w @ covariance @ w
+    subject to sum(w) = 1 and 0 <= w <= cap, by accelerated projected gradient ascent
+    (with adaptive restart).
+
+    :returns: Weights summing to 1; every weight is `cap` (summing to less) when n * cap <= 1.
+    """
+    n = len(mean)
+    cap = 1.0 if cap is None else cap
+    if n * cap <= 1:
+        return np.full(n, cap)
+    # Gershgorin bound on the largest eigenvalue, so the step never overshoots.
+    step = 1 / (risk_aversion * np.abs(covariance).sum(axis=1).max())
+    weights = project(np.full(n, 1 / n), cap)
+    point, momentum = weights, 1.0
+    for _ in range(max_iter):
+        updated = project(point + step * (mean - risk_aversion * (covariance @ point)), cap)
+        if np.abs(updated - weights).max() < tol:
+            return updated
+        if np.dot(point - updated, updated - weights) > 0:
+            momentum = 1.0  # Restart the momentum once it points uphill.
+        next_momentum = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+        point = updated + (momentum - 1) / next_momentum * (updated - weights)
+        weights, momentum = updated, next_momentum
+    return weights
+
+
+def allocate(candidates, budget, returns=None, method="risk_parity", cap=DEFAULT_CAP, risk_aversion=5.0,
+             shrinkage=0.2, min_history=20):
+    """
+    Splits a budget across candidate stocks.
+
+    :param candidates: Stock dictionaries with symbol and volatility (as built by main.select_stock).
+    :param budget: Amount to allocate.
+    :param returns: (Optional) (bars x candidates) daily return matrix in candidate order (see
+                    return_matrix). Candidates with fewer than `min_history` returns get nothing;
+                    without any usable history the budget is split by the inverse of each
+                    candidate's volatility.
+    :param method: "risk_parity" or "mean_variance".
+    :param cap: Largest share of the budget per stock. With fewer than 1 / cap usable
+                candidates the rest of the budget stays uninvested.
+    :returns: List of (stock, invest_amount) pairs with a positive amount, largest first. Each
+              stock dictionary is a copy carrying its "weight".
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown allocation method '{method}'; choose from: {', '.join(METHODS)}")
+    if not candidates or budget <= 0:
+        return []
+
+    weights = np.zeros(len(candidates))
+    usable = np.zeros(len(candidates), dtype=bool)
+    if returns is not None:
+        usable = np.count_nonzero(~np.isnan(returns), axis=0) >= min_history
+    if usable.any():
+        mean, covariance = moments(returns[:, usable], shrinkage)
+        if method == "risk_parity":
+            weights[usable] = risk_parity(covariance, cap)
+        else:
+            weights[usable] = mean_variance(mean, covariance, risk_aversion, cap)
+    else:
+        volatility = np.array([stock["volatility"] for stock in candidates], dtype=float)
+        inverse = np.where(volatility > 0, 1 / np.where(volatility > 0, volatility, 1), 0.0)
+        if not inverse.any():
+            inverse[:] = 1.0
+        weights = cap_weights(inverse / inverse.sum(), cap)
+
+    amounts = np.floor(budget * weights * 100) / 100
+    order = np.argsort(-weights, kind="stable")
+    return [(dict(candidates[i], weight=float(weights[i])), float(amounts[i])) for i in order if amounts[i] > 0]
+
+
+def synthetic_returns(num_symbols=500, num_bars=252, seed=0):
+    """One-factor daily returns (market beta plus idiosyncratic noise) for benchmarking."""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.01, num_bars)
+    beta = rng.uniform(0.5, 1.5, num_symbols)
+    noise = rng.normal(0.0002, 1, (num_bars, num_symbols)) * rng.uniform(0.005, 0.03, num_symbols)
+    return market[:, None] * beta + noise
+
+
+def benchmark(sizes=(20, 100, 500), num_bars=252, budget=10000, seed=0):
+    """
+    Times allocate() with both methods against q_learning_stock_selection (and its vectorized
+    version) on the same synthetic candidates, and prints the in-sample annualized volatility
+    of each result.
+
+    :returns: Dictionary of {(size, name): seconds}.
+    """
+    import contextlib
+    import io
+    import random
+    import q_learning
+
+    results = {}
+    for size in sizes:
+        returns = synthetic_returns(size, num_bars, seed)
+        mean, covariance = moments(returns)
+        candidates = [{"symbol": f"SYM{i:04d}", "risk": "High", "volatility": float(v)}
+                      for i, v in enumerate(np.abs(returns[-1]) * 100)]
+        index = {stock["symbol"]: i for i, stock in enumerate(candidates)}
+        random.seed(seed)
+        runs = {
+            "risk_parity": lambda: allocate(candidates, budget, returns, "risk_parity"),
+            "mean_variance": lambda: allocate(candidates, budget, returns, "mean_variance"),
+            "q_learning_stock_selection": lambda: [q_learning.q_learning_stock_selection(candidates, budget)],
+            "q_learning_stock_selection_vectorized":
+                lambda: [q_learning.q_learning_stock_selection_vectorized(candidates, budget, seed=seed)],
+        }
+        print(f"{size} candidates x {num_bars} bars, ${budget} budget:")
+        for name, run in runs.items():
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                selections = run()
+            elapsed = time.perf_counter() - start
+            results[size, name] = elapsed
+            weights = np.zeros(size)
+            for stock, amount in selections:
+                weights[index[stock["symbol"]]] = amount / budget
+            volatility = np.sqrt(weights @ covariance @ weights * 252) * 100
+            print(f"  {name}: {elapsed * 1000:.1f} ms, {len(selections)} positions, "
+                  f"{weights.sum():.0%} invested, {volatility:.1f}% annualized volatility")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
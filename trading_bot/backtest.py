@@ -0,0 +1,192 @@
+"""
+Vectorized backtest of the main.py strategy on locally stored bars.
+
+    python backtest.py [--cache-dir DIR] [--interval day] [--risk High] [--top-n 10] [--select rank]
+    python backtest.py --synthetic 2000      # generate a random universe first
+
+At every step the strategy runs the same stages as main.recommend plus execute_trade:
+mover ranking (largest absolute percent change over the last bar, as scan_top_movers sorts),
+risk filtering (indicators.classify_risk of abs(percent change), as in main.select_stock),
+selection, and sizing (invest_amount // price).
+The position is bought at the step's close and sold `hold` bars later. All tickers and dates are
+aligned NumPy arrays (see indicators.Panel), so each stage runs once over every step at once.
+
+The trade budget is a fixed share (`allocation`) of the starting cash at every step; P&L is not
+compounded.
+"""
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from bar_cache import BarCache, BAR_DTYPE
+
+
+def load_panel(cache_dir, interval="day", symbols=None):
+    """
+    Reads stored bars from a BarCache directory into a Panel without touching the network.
+
+    :param symbols: Tickers to load (default: every ticker stored for `interval`).
+    """
+    cache = BarCache(cache_dir)
+    symbols = [symbol.upper() for symbol in symbols] if symbols else cache.tickers(interval)
+    bars = {symbol: cache.read(symbol, interval) for symbol in symbols}
+    return indicators.align({symbol: series for symbol, series in bars.items() if len(series)})
+
+
+def write_synthetic(cache_dir, num_symbols=2000, num_bars=252, seed=0, interval="day"):
+    """Stores a random-walk universe in a BarCache directory (for trying the backtester offline)."""
+    panel = indicators.synthetic_panel(num_symbols, num_bars, seed)
+    cache = BarCache(cache_dir)
+    for i, symbol in enumerate(panel.symbols):
+        bars = np.empty(num_bars, dtype=BAR_DTYPE)
+        bars["time"] = panel.times
+        for name in indicators.FIELDS:
+            bars[name] = getattr(panel, name)[i]
+        cache.append(symbol, interval, bars, span="year")
+
+
+def _select_q_learning(movers, change, eligible, budget, epochs, seed):
+    """Runs q_learning_stock_selection_vectorized on each step's filtered movers."""
+    from q_learning import q_learning_stock_selection_vectorized
+
+    choice = np.zeros(len(movers), dtype=np.int64)
+    invest = np.zeros(len(movers))
+    for step in np.flatnonzero(eligible.any(axis=1)):
+        columns = np.flatnonzero(eligible[step])
+        stocks = [{"column": column, "volatility": abs(change[step, column])} for column in columns]
+        best, amount = q_learning_stock_selection_vectorized(stocks, int(budget), epochs=epochs, seed=seed)
+        choice[step], invest[step] = best["column"], amount
+    return choice, invest
+
+
+def backtest(panel, risk_tolerance="High", top_n=10, allocation=0.2, cash=10000.0, hold=1,
+             select="rank", epochs=1000, seed=0, thresholds=indicators.RISK_THRESHOLDS):
+    """
+    Replays the strategy over every bar of a panel.
+
+    :param panel: indicators.Panel of the universe.
+    :param risk_tolerance: Risk label to keep ("Low", "Medium" or "High").
+    :param top_n: Movers kept per step.
+    :param allocation: Share of the starting cash invested at each step.
+    :param hold: Bars each position is held; steps are `hold` bars apart so positions do not overlap.
+    :param select: "rank" buys the highest-ranked eligible mover with the whole budget, which is
+                   what the Q-learning step returns whenever the first candidate wins;
+                   "q_learning" runs q_learning_stock_selection_vectorized at every step.
+    :returns: Dictionary with the trades DataFrame, equity curve, P&L, turnover and per-stage timings.
+    """
+    timings = {}
+
+    @contextmanager
+    def timed(stage):
+        start = time.perf_counter()
+        yield
+        timings[stage] = time.perf_counter() - start
+
+    close = indicators.ffill(panel.close)
+    num_symbols, num_bars = close.shape
+    steps = np.arange(1, num_bars - hold, hold)
+    budget = cash * allocation
+
+    with timed("rank"):
+        change = indicators.returns(close, 1)[:, steps].T          # (steps, symbols)
+        score = np.where(np.isnan(change), -np.inf, np.abs(change))
+        k = min(top_n, num_symbols)
+        top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(score, top, axis=1), axis=1, kind="stable")
+        movers = np.take_along_axis(top, order, axis=1)             # (steps, k), best first
+        mover_change = np.take_along_axis(change, movers, axis=1)
+
+    with timed("risk"):
+        eligible = indicators.classify_risk(np.abs(mover_change), thresholds) == risk_tolerance
+
+    with timed("select"):
+        traded = eligible.any(axis=1)
+        if select == "rank":
+            choice = eligible.argmax(axis=1)
+            invest = np.full(len(steps), budget)
+        elif select == "q_learning":
+            choice, invest = _select_q_learning(movers, mover_change, eligible, budget, epochs, seed)
+        else:
+            raise ValueError("select must be 'rank' or 'q_learning'")
+        chosen = movers[np.arange(len(steps)), choice]
+
+    with timed("size"):
+        entry = close[chosen, steps]
+        exit_ = close[chosen, steps + hold]
+        quantity = np.where(traded & (entry > 0), invest // np.where(entry > 0, entry, 1), 0)
+        pnl = quantity * (exit_ - entry)
+        notional = quantity * (entry + exit_)
+
+    equity = cash + np.cumsum(pnl)
+    traded &= quantity > 0
+    trades = pd.DataFrame({
+        "time": pd.to_datetime(panel.times[steps][traded], unit="s"),
+        "symbol": np.array(panel.symbols)[chosen[traded]],
+        "quantity": quantity[traded],
+        "entry": entry[traded],
+        "exit": exit_[traded],
+        "pnl": pnl[traded],
+    })
+    total_seconds = sum(timings.values())
+    return {
+        "steps": len(steps),
+        "trades": trades,
+        "equity": equity,
+        "pnl": float(pnl.sum()),
+        "return_pct": float(pnl.sum() / cash * 100),
+        "turnover": float(notional.sum() / cash),
+        "timings": timings,
+        "symbol_days_per_second": num_symbols * len(steps) / total_seconds if total_seconds else float("inf"),
+    }
+
+
+def print_result(result):
+    print(f"Steps: {result['steps']}  Trades: {len(result['trades'])}")
+    print(f"P&L: ${result['pnl']:.2f} ({result['return_pct']:+.2f}%)  Turnover: {result['turnover']:.2f}x")
+    for stage, seconds in result["timings"].items():
+        print(f"  {stage:<8}{seconds * 1000:>10.2f} ms")
+    print(f"Throughput: {result['symbol_days_per_second']:,.0f} symbol-days/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the movers -> risk -> selection strategy on stored bars.")
+    parser.add_argument("--cache-dir", default=None, help="BarCache directory (default: the bot's bar cache).")
+    parser.add_argument("--interval", default="day")
+    parser.add_argument("--symbols", nargs="*", help="Tickers to include (default: all stored).")
+    parser.add_argument("--risk", default="High", choices=["Low", "Medium", "High"])
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--allocation", type=float, default=0.2)
+    parser.add_argument("--cash", type=float, default=10000.0)
+    parser.add_argument("--hold", type=int, default=1)
+    parser.add_argument("--select", default="rank", choices=["rank", "q_learning"])
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="Backtest a generated universe of N tickers instead of stored bars.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.synthetic:
+        panel = indicators.synthetic_panel(args.synthetic)
+    else:
+        from bar_cache import DEFAULT_CACHE_DIR
+        cache_dir = args.cache_dir or DEFAULT_CACHE_DIR
+        if not os.path.isdir(cache_dir):
+            parser.error(f"no bar cache at {cache_dir}")
+        panel = load_panel(cache_dir, args.interval, args.symbols)
+        if not len(panel):
+            parser.error(f"no bars stored in {cache_dir} for interval {args.interval}"
+                         + (f" and symbols {' '.join(args.symbols)}" if args.symbols else "")
+                         + "; run the bot or use --synthetic")
+    print(f"Loaded {len(panel)} tickers x {len(panel.times)} bars in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    result = backtest(panel, args.risk, args.top_n, args.allocation, args.cash, args.hold, args.select)
+    print_result(result)
+    return result
+
+
+if __name__ == "__main__":
+    main()
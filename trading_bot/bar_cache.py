@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+
+# One row per bar; stored as a structured .npy file per (ticker, interval) so reads can be memory-mapped.
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"),      # bar start, seconds since the epoch (UTC)
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+# Length of one bar, used to decide when a stored series is due for a refresh.
+INTERVAL_SECONDS = {
+    "5minute": 300,
+    "10minute": 600,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "1d": 86400,
+}
+
+# Calendar length of each span, ordered shortest to longest.
+SPAN_SECONDS = {
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+    "3month": 92 * 86400,
+    "year": 365 * 86400,
+    "5year": 5 * 365 * 86400,
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bar_cache")
+
+
+def empty_bars():
+    """Returns an empty bar array."""
+    return np.empty(0, dtype=BAR_DTYPE)
+
+
+def window(bars, span):
+    """
+    Returns the trailing slice of a bar series covering the given span.
+    A span of "day" selects the bars of the most recent trading date.
+
+    :param bars: Bar array sorted by time.
+    :param span: One of the SPAN_SECONDS keys.
+    :returns: A view of the bars inside the span.
+    """
+    if len(bars) == 0:
+        return bars
+    times = bars["time"]
+    if span == "day":
+        start = times[-1] - times[-1] % 86400
+    else:
+        start = times[-1] - SPAN_SECONDS[span]
+    return bars[np.searchsorted(times, start, side="left"):]
+
+
+def percent_change(bars):
+    """
+    Percent change between the first open and the last close of a bar series.
+
+    :returns: Percent change as a float, or None if the series is empty or opens at zero.
+    """
+    if len(bars) == 0 or bars["open"][0] == 0:
+        return None
+    return float((bars["close"][-1] - bars["open"][0]) / bars["open"][0] * 100)
+
+
+class BarCache:
+    """
+    On-disk OHLCV store keyed by (ticker, interval).
+
+    Each series lives in a structured .npy file that is memory-mapped on read, plus a small
+    JSON sidecar recording when the series was last checked and the longest span fetched.
+    A refresh only asks the data source for bars after the last stored timestamp and appends them.
+    The stats counters are shared by every thread using the cache and guarded by self.lock.
+    """
+
+    def __init__(self, cache_dir=None):
+        # Looked up per call, so a replay session can point default caches at its scratch directory.
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Resets the hit/miss/fetch counters."""
+        self.stats = {
+            "hits": 0,            # series served from disk without a fetch
+            "misses": 0,          # series that needed a fetch
+            "fetches": 0,         # calls made to the data source
+            "bars_fetched": 0,    # bars returned by the data source
+            "bars_appended": 0,   # bars actually added to the store
+            "fetch_seconds": 0.0, # time spent inside the data source
+        }
+
+    def _count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def _path(self, ticker, interval, suffix):
+        return os.path.join(self.cache_dir, f"{ticker.upper()}_{interval}.{suffix}")
+
+    def _load_meta(self, ticker, interval):
+        try:
+            with open(self._path(ticker, interval, "json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self, ticker, interval, meta):
+        with open(self._path(ticker, interval, "json"), "w") as f:
+            json.dump(meta, f)
+
+    def read(self, ticker, interval):
+        """
+        Returns the stored bars for a series as a read-only memory-mapped array.
+
+        :returns: Bar array sorted by time (empty if nothing is stored).
+        """
+        path = self._path(ticker, interval, "npy")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return empty_bars()
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            # np.load cannot memory-map a zero-length array.
+            return np.load(path)
+
+    def tickers(self, interval):
+        """Returns the tickers with a stored series for `interval`, sorted."""
+        suffix = f"_{interval}.npy"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.cache_dir) if name.endswith(suffix))
+
+    def last_time(self, ticker, interval):
+        """Returns the start time of the last stored bar, or None if the series is empty."""
+        bars = self.read(ticker, interval)
+        return int(bars["time"][-1]) if len(bars) else None
+
+    def needs_fetch(self, ticker, interval, span):
+        """
+        Returns True if the series has never covered `span` or has not been checked
+        within one bar interval.
+        """
+        meta = self._load_meta(ticker, interval)
+        stored_span = meta.get("span")
+        if stored_span is None or SPAN_SECONDS[span] > SPAN_SECONDS[stored_span]:
+            return True
+        return time.time() - meta.get("checked", 0) >= INTERVAL_SECONDS[interval]
+
+    def append(self, ticker, interval, bars, span=None):
+        """
+        Merges newly fetched bars into the stored series and marks it as checked.
+        Fetched bars replace any stored bars from the first fetched timestamp on, so a
+        still-forming last bar is overwritten by its final values. An empty fetch (usually a
+        failed download) changes nothing, so the series is fetched again on the next read.
+
+        :param bars: Bar array sorted by time.
+        :param span: Span the bars were fetched with; a longer span than the stored one
+                     replaces the whole series.
+        """
+        if len(bars) == 0:
+            return
+        meta = self._load_meta(ticker, interval)
+        stored = self.read(ticker, interval)
+        if span is not None and (meta.get("span") is None or SPAN_SECONDS[span] > SPAN_SECONDS[meta["span"]]):
+            merged = bars
+            meta["span"] = span
+        elif len(stored):
+            merged = np.concatenate([stored[stored["time"] < bars["time"][0]], bars])
+        else:
+            merged = bars
+        self._count(bars_appended=len(merged) - len(stored))
+
+        path = self._path(ticker, interval, "npy")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(merged, dtype=BAR_DTYPE))
+        os.replace(tmp_path, path)
+        meta["checked"] = time.time()
+        self._save_meta(ticker, interval, meta)
+
+    def get_many(self, tickers, interval, span, fetch):
+        """
+        Reads a series per ticker, fetching only what is missing in as few calls as possible.
+
+        :param tickers: List of stock ticker symbols.
+        :param interval: Bar interval (e.g., "5minute", "day").
+        :param span: Span the caller needs (e.g., "week", "year").
+        :param fetch: Callable fetch(tickers, since, span) returning a dict of ticker -> bar array.
+                      Tickers it leaves out (or returns no bars for) stay due for a fetch.
+                      `since` is the oldest last stored timestamp among the tickers (None on a
+                      cold fetch) and `span` is the span the caller asked for.
+        :returns: Dict mapping each upper-cased ticker to its bar array.
+        """
+        tickers = [ticker.upper() for ticker in tickers]
+        stale = [ticker for ticker in tickers if self.needs_fetch(ticker, interval, span)]
+        self._count(hits=len(tickers) - len(stale), misses=len(stale))
+
+        # Cold series need the full span; warm ones only the bars after their last timestamp.
+        cold = [ticker for ticker in stale if self._needs_full_span(ticker, interval, span)]
+        warm = [ticker for ticker in stale if ticker not in cold]
+        batches = []
+        if cold:
+            batches.append((cold, None))
+        if warm:
+            batches.append((warm, min(self.last_time(ticker, interval) or 0 for ticker in warm)))
+
+        for batch, since in batches:
+            start = time.perf_counter()
+            fetched = fetch(batch, since, span)
+            self._count(fetch_seconds=time.perf_counter() - start, fetches=1)
+            for ticker in batch:
+                if ticker not in fetched:
+                    continue  # Left due for a fetch (e.g. by a per-ticker retry).
+                bars = fetched[ticker]
+                self._count(bars_fetched=len(bars))
+                self.append(ticker, interval, bars, span=span if since is None else None)
+
+        return {ticker: self.read(ticker, interval) for ticker in tickers}
+
+    def get(self, ticker, interval, span, fetch):
+        """Single-ticker form of get_many."""
+        return self.get_many([ticker], interval, span, fetch)[ticker.upper()]
+
+    def _needs_full_span(self, ticker, interval, span):
+        stored_span = self._load_meta(ticker, interval).get("span")
+        return (stored_span is None or SPAN_SECONDS[span] > SPAN_SECONDS[stored_span]
+                or self.last_time(ticker, interval) is None)
@@ -0,0 +1,154 @@
+"""
+Offline benchmarks of the trading pipeline in main.py against fake_market.FakeMarket.
+
+    python benchmark.py [--latency 0.01] [--error-rate 0] [--symbols 200] [--repeat 3] [--warm] [--json out.json]
+
+Each stage (login -> cash -> movers -> build_temp_table -> risk + Q-learning -> trade) is timed
+separately and as a whole, reporting wall time, fake API calls and peak traced memory.
+No network access or credentials are needed.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from fake_market import FakeMarket
+
+
+def measure(stage, market, func, *args):
+    """
+    Runs one stage with stdout suppressed.
+
+    :returns: (result, row) where row holds the stage's seconds, API calls, peak memory and error.
+    """
+    market.reset_calls()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result, error = None, None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args)
+    except Exception as e:
+        error = repr(e)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {"stage": stage, "seconds": elapsed, "calls": sum(market.calls.values()),
+                    "calls_by_endpoint": dict(market.calls), "peak_mb": peak / 1e6, "error": error}
+
+
+def reset_state(cache_dir):
+    """Points the bot's caches and session at a scratch directory."""
+    import bar_cache
+    import helpers
+    import login
+    import portfolio
+    import ref_cache
+
+    helpers.BAR_CACHE = bar_cache.BarCache(os.path.join(cache_dir, "bars"))
+    helpers.REF_CACHE = ref_cache.TTLCache()
+    login.username = login.password = "benchmark"
+    login.mfa_secret = None
+    portfolio.PORTFOLIO = portfolio.PortfolioState()
+    login.SESSION_MANAGER = login.SessionManager(pickle_path=os.path.join(cache_dir, "robinhood.pickle"),
+                                                 state_path=os.path.join(cache_dir, "session.json"))
+
+
+def run_pipeline(market, sector, risk_tolerance, allocation=0.2):
+    """Runs every stage of the pipeline once and returns one row per stage plus a total row."""
+    import login
+    import main
+
+    rows = []
+
+    def stage(name, func, *args):
+        result, row = measure(name, market, func, *args)
+        rows.append(row)
+        return result, row["error"] is None
+
+    stage("login", login.login)
+    budget, ok = stage("cash", main.get_trade_budget, allocation)
+    movers, ok = stage("movers", main.get_movers, sector) if ok else (None, False)
+    if ok:
+        stage("temp_table", main.show_temp_table, [stock["symbol"] for stock in movers])
+        selection, ok = stage("risk_selection", main.select_stock, movers, budget, risk_tolerance)
+        if ok and selection is not None:
+            stage("trade", main.execute_trade, *selection)
+
+    rows.append({
+        "stage": "total",
+        "seconds": sum(row["seconds"] for row in rows),
+        "calls": sum(row["calls"] for row in rows),
+        "peak_mb": max(row["peak_mb"] for row in rows),
+        "error": next((row["error"] for row in rows if row["error"]), None),
+    })
+    return rows
+
+
+def run_benchmarks(symbols=200, latency=0.01, error_rate=0.0, repeat=3, warm=False, seed=0,
+                   sector="Information Technology", risk_tolerance="High"):
+    """
+    Benchmarks the pipeline `repeat` times against a fake market.
+
+    :param warm: Keep caches between repeats instead of starting every repeat cold.
+    :returns: List of per-stage summaries (median seconds, calls and peak memory over the repeats).
+    """
+    market = FakeMarket(num_symbols=symbols, seed=seed, latency=latency, error_rate=error_rate)
+    market.install()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for i in range(repeat):
+            if i == 0 or not warm:
+                reset_state(os.path.join(cache_dir, str(i)))
+            runs.append(run_pipeline(market, sector, risk_tolerance))
+
+    summary = []
+    for stage in [row["stage"] for row in runs[0]]:
+        rows = [row for run in runs for row in run if row["stage"] == stage]
+        summary.append({
+            "stage": stage,
+            "median_seconds": statistics.median(row["seconds"] for row in rows),
+            "calls": rows[-1]["calls"],
+            "peak_mb": max(row["peak_mb"] for row in rows),
+            "errors": sum(1 for row in rows if row["error"]),
+        })
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'stage':<16}{'median ms':>12}{'calls':>8}{'peak MB':>10}{'errors':>8}")
+    for row in summary:
+        print(f"{row['stage']:<16}{row['median_seconds'] * 1000:>12.1f}{row['calls']:>8}"
+              f"{row['peak_mb']:>10.2f}{row['errors']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks.")
+    parser.add_argument("--symbols", type=int, default=200, help="Size of the fake universe.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds added to every fake API call.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability that a fake API call fails.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warm", action="store_true", help="Keep caches between repeats.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sector", default="Information Technology")
+    parser.add_argument("--risk", default="High", choices=["Low", "Medium", "High"])
+    parser.add_argument("--json", help="Also write the summary to this file.")
+    args = parser.parse_args(argv)
+
+    summary = run_benchmarks(args.symbols, args.latency, args.error_rate, args.repeat, args.warm,
+                             args.seed, args.sector, args.risk)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
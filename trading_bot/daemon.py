@@ -0,0 +1,218 @@
+"""
+Long-running scheduler that repeats the trading pipeline on a fixed cadence.
+
+    python main.py daemon --every 5 --sector "Consumer Durables" --sector "Information Technology"
+
+The process stays up between cycles, so the login session, BAR_CACHE, REF_CACHE, the sector
+index and the portfolio state stay warm. Within a cycle the movers of every configured sector
+come from one scan_top_movers call and the temp table is built once for the union of their
+symbols. A stage whose inputs match the previous cycle's is skipped and its previous result
+reused; in particular an unchanged recommendation is not traded again. Each cycle prints its
+latency per stage and the stages it skipped.
+
+With a stream interval, a QuoteStreamer polls the current movers' quotes in a background thread
+between cycles and publishes them into REF_CACHE, so the prices the trade stage reads are fresh.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import execution
+import helpers
+import indicators
+import login
+import metrics
+import portfolio
+import q_learning
+import quote_stream
+import top_movers
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+# The temp table's finest input is 5-minute bars, so it cannot change within one 5-minute bucket.
+TEMP_TABLE_BUCKET_SECONDS = 300
+
+
+def is_market_open(now=None):
+    """True on weekdays between 9:30 and 16:00 New York time (exchange holidays are not excluded)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+
+def seconds_until_open(now=None):
+    """Seconds until the next market open (0 if the market is open)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if is_market_open(now):
+        return 0.0
+    candidate = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return (candidate - now).total_seconds()
+
+
+class Daemon:
+    """
+    Runs the movers -> temp table -> risk selection -> trade pipeline every `every` seconds.
+
+    :param sectors: Sectors to pick movers from.
+    :param risk_tolerance: Risk label to keep ("Low", "Medium" or "High").
+    :param allocation: Share of cash to trade with, split evenly across the sectors.
+    :param every: Seconds between cycle starts.
+    :param market_hours: Only run cycles while the market is open.
+    :param executor: (Optional) execution.OrderExecutor; without it recommendations are only sized.
+    :param stream_interval: (Optional) Seconds between quote polls of the current movers; without
+                            it no quotes are streamed.
+    """
+
+    def __init__(self, sectors, risk_tolerance="High", allocation=0.2, every=300.0, market_hours=True,
+                 executor=None, stream_interval=None):
+        invalid = [sector for sector in sectors if sector not in top_movers.VALID_SECTORS]
+        if invalid:
+            raise ValueError(f"Invalid sector(s): {', '.join(invalid)}")
+        self.sectors = list(sectors)
+        self.risk_tolerance = risk_tolerance
+        self.allocation = allocation
+        self.every = every
+        self.market_hours = market_hours
+        self.executor = executor
+        self.stream_interval = stream_interval
+        self.streamer = None
+        self.stream_stop = None
+        self.inputs = {}     # stage -> fingerprint of its inputs in the last cycle
+        self.results = {}    # stage -> result of its last run
+        self.reports = []
+
+    def _stage(self, report, name, fingerprint, func, *args):
+        """
+        Runs func unless its inputs match the last run's, and records the stage's latency.
+        A fingerprint of None means the stage always runs.
+        """
+        start = time.perf_counter()
+        if fingerprint is not None and name in self.results and self.inputs.get(name) == fingerprint:
+            report["skipped"].append(name)
+            result = self.results[name]
+        else:
+            with metrics.span(name):
+                result = func(*args)
+            self.inputs[name], self.results[name] = fingerprint, result
+        report["stages"][name] = time.perf_counter() - start
+        return result
+
+    def _select(self, movers, budget):
+        if not movers:
+            return None
+        volatilities = [abs(float(stock["percent_change"])) for stock in movers]
+        risks = indicators.classify_risk(volatilities)
+        candidates = [{"symbol": stock["symbol"], "risk": risk, "volatility": volatility, "price": stock.get("price")}
+                      for stock, risk, volatility in zip(movers, risks, volatilities) if risk == self.risk_tolerance]
+        if not candidates:
+            return None
+        return q_learning.q_learning_stock_selection_vectorized(candidates, int(budget))
+
+    def _trade(self, selections):
+        decisions = []
+        for best_stock, invest_amount in selections:
+            price = best_stock.get("price") or float(helpers.get_stock_info(best_stock["symbol"])["last_trade_price"])
+            if self.executor is None:
+                print(f"  Buying {invest_amount // price} shares of {best_stock['symbol']}")
+            else:
+                decisions.append(execution.decision(best_stock["symbol"], invest_amount, price))
+        if decisions:
+            for record in self.executor.execute(decisions):
+                print(f"  Order {record['symbol']} x{record['quantity']}: {record['state']}")
+
+    def run_cycle(self):
+        """Runs one cycle and returns its report (per-stage seconds, skipped stages, total seconds)."""
+        report = {"started": time.time(), "stages": {}, "skipped": []}
+        start = time.perf_counter()
+
+        # Login, cash and movers always run: ensure_login is free while the session is valid,
+        # PortfolioState decides itself when to refresh, and the movers feed every later stage.
+        self._stage(report, "login", None, login.login)
+        cash = self._stage(report, "cash", None, lambda: portfolio.PORTFOLIO.cash)
+        budget = cash * self.allocation / len(self.sectors)
+        movers = self._stage(report, "movers", None, top_movers.scan_top_movers, self.sectors)
+
+        symbols = sorted({stock["symbol"] for sector in self.sectors for stock in movers.get(sector, [])})
+        if self.stream_interval:
+            self.stream(symbols)
+        self._stage(report, "temp_table", (tuple(symbols), int(time.time() // TEMP_TABLE_BUCKET_SECONDS)),
+                    lambda: print(helpers.build_temp_table(symbols)))
+
+        selections = []
+        for sector in self.sectors:
+            sector_movers = movers.get(sector, [])
+            fingerprint = (tuple((stock["symbol"], stock["percent_change"]) for stock in sector_movers),
+                           round(budget, 2), self.risk_tolerance)
+            selection = self._stage(report, f"select:{sector}", fingerprint, self._select, sector_movers, budget)
+            if selection is not None:
+                best_stock, invest_amount = selection
+                print(f"[{sector}] {best_stock['symbol']}: ${invest_amount}")
+                selections.append(selection)
+
+        # Keyed on the symbols only: a recommendation that merely changed size is not bought again.
+        trade_inputs = tuple(best_stock["symbol"] for best_stock, _ in selections)
+        if selections:
+            self._stage(report, "trade", trade_inputs, self._trade, selections)
+
+        report["seconds"] = time.perf_counter() - start
+        self.reports.append(report)
+        self.print_report(report)
+        return report
+
+    def stream(self, symbols):
+        """
+        Streams quotes for `symbols` into REF_CACHE in a background thread, replacing the
+        streamer of a different watchlist. An empty watchlist just stops streaming.
+        """
+        if self.streamer is not None and self.streamer.symbols == [symbol.upper() for symbol in symbols]:
+            return
+        self.stop_streaming()
+        if not symbols:
+            return
+        self.streamer = quote_stream.QuoteStreamer(symbols, interval=self.stream_interval,
+                                                   cache=helpers.get_ref_cache())
+        # QuoteStreamer.run only checks stop.is_set(), so a thread-safe event works across loops.
+        self.stream_stop = threading.Event()
+        threading.Thread(target=asyncio.run, args=(self.streamer.run(self.stream_stop),), daemon=True).start()
+
+    def stop_streaming(self):
+        """Stops the quote streamer (it exits after its current cycle)."""
+        if self.stream_stop is not None:
+            self.stream_stop.set()
+        self.streamer = self.stream_stop = None
+
+    def print_report(self, report):
+        stages = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in report["stages"].items()
+                           if name not in report["skipped"])
+        skipped = ", ".join(report["skipped"]) or "none"
+        print(f"Cycle {len(self.reports)}: {report['seconds'] * 1000:.0f} ms ({stages}); skipped: {skipped}")
+
+    def run(self, cycles=None):
+        """Runs cycles every `every` seconds (waiting for the market to open if market_hours is set)."""
+        done = 0
+        try:
+            while cycles is None or done < cycles:
+                if self.market_hours:
+                    wait = seconds_until_open()
+                    if wait:
+                        print(f"Market closed; next cycle in {wait / 3600:.1f} h")
+                        self.stop_streaming()
+                        time.sleep(wait)
+                started = time.monotonic()
+                try:
+                    self.run_cycle()
+                except Exception as e:
+                    print(f"Cycle failed: {e!r}")
+                done += 1
+                if cycles is None or done < cycles:
+                    time.sleep(max(self.every - (time.monotonic() - started), 0))
+        finally:
+            self.stop_streaming()
+        return self.reports
@@ -0,0 +1,160 @@
+"""
+The external calls the bot makes, and a way to route all of them through one hook.
+
+install(call) replaces every endpoint in ENDPOINTS (and yfinance.Ticker's info/history) with
+a wrapper that invokes call(endpoint, args, kwargs, func), where func() performs the original
+call. Modules not imported yet are patched when they are first imported. replay.py and metrics.py are both built on it; their wrappers stack if both are installed.
+"""
+import importlib
+import importlib.abc
+import sys
+
+# (module, attribute path) of every external call.
+ENDPOINTS = [
+    ("robin_stocks.robinhood", "stocks.get_quotes"),
+    ("robin_stocks.robinhood", "stocks.get_fundamentals"),
+    ("robin_stocks.robinhood", "stocks.get_instruments_by_symbols"),
+    ("robin_stocks.robinhood", "stocks.get_stock_historicals"),
+    ("robin_stocks.robinhood", "stocks.get_latest_price"),
+    ("robin_stocks.robinhood", "stocks.get_stock_quote_by_symbol"),
+    ("robin_stocks.robinhood", "markets.get_top_movers"),
+    ("robin_stocks.robinhood", "account.load_account_profile"),
+    ("robin_stocks.robinhood", "account.build_holdings"),
+    ("robin_stocks.robinhood", "account.get_open_stock_positions"),
+    ("robin_stocks.robinhood", "orders.order_buy_market"),
+    ("robin_stocks.robinhood", "orders.order_buy_limit"),
+    ("robin_stocks.robinhood", "orders.order_sell_market"),
+    ("robin_stocks.robinhood", "orders.order_sell_limit"),
+    ("robin_stocks.robinhood", "orders.get_all_stock_orders"),
+    ("robin_stocks.robinhood", "get_quotes"),
+    ("robin_stocks.robinhood", "login"),
+    ("robin_stocks.robinhood", "helper.request_post"),
+    ("yfinance", "download"),
+    ("stock_performance", "read_symbol_file"),
+]
+
+
+def _wrap(call, endpoint, func):
+    def wrapper(*args, **kwargs):
+        return call(endpoint, args, kwargs, lambda: func(*args, **kwargs))
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _wrap_ticker(call, ticker_class):
+    class Ticker:
+        """yfinance.Ticker whose info and history go through the installed hook."""
+
+        def __init__(self, ticker, *args, **kwargs):
+            self.ticker = ticker
+            self._args, self._kwargs = args, kwargs
+            self._real = None
+
+        def _tkr(self):
+            if self._real is None:
+                self._real = ticker_class(self.ticker, *self._args, **self._kwargs)
+            return self._real
+
+        @property
+        def info(self):
+            return call("yfinance.Ticker.info", (self.ticker,), {}, lambda: self._tkr().info)
+
+        def history(self, *args, **kwargs):
+            return call("yfinance.Ticker.history", (self.ticker,) + args, kwargs,
+                        lambda: self._tkr().history(*args, **kwargs))
+
+    return Ticker
+
+
+def _patch_module(call, module_name, patches):
+    """Wraps the endpoints of one imported module, recording each replacement in `patches`."""
+    module = sys.modules[module_name]
+
+    def patch(owner, name, value):
+        patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    for endpoint_module, path in ENDPOINTS:
+        if endpoint_module != module_name:
+            continue
+        owner = module
+        *parents, name = path.split(".")
+        for parent in parents:
+            owner = getattr(owner, parent, None)
+        if owner is not None and hasattr(owner, name):
+            patch(owner, name, _wrap(call, f"{module_name}.{path}", getattr(owner, name)))
+    if module_name == "yfinance":
+        patch(module, "Ticker", _wrap_ticker(call, module.Ticker))
+
+
+# Modules with endpoints, and the (call, patches) of every install() still waiting for some of them.
+_MODULES = {module_name for module_name, _ in ENDPOINTS} | {"yfinance"}
+_PENDING = []
+
+
+class _PatchingLoader:
+    """Runs a module's real loader, then patches the module for every pending install()."""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        for call, patches in list(_PENDING):
+            _patch_module(call, module.__name__, patches)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _ImportHook(importlib.abc.MetaPathFinder):
+    """Meta path finder that hands the endpoint modules to _PatchingLoader when first imported."""
+
+    def find_spec(self, name, path, target=None):
+        if name not in _MODULES:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _PatchingLoader(spec.loader)
+                return spec
+        return None
+
+
+_HOOK = _ImportHook()
+
+
+def install(call):
+    """
+    Routes every external call through `call`.
+
+    Modules that are already imported are patched right away; the others are patched when
+    they are first imported, so installing the hook does not import robin_stocks, yfinance or
+    stock_performance (and pandas with them) for a command that never uses them.
+
+    :param call: Callable call(endpoint, args, kwargs, func) that must return the call's result.
+    :returns: List of patches to pass to uninstall().
+    """
+    patches = []
+    for module_name in sorted(_MODULES):
+        if module_name in sys.modules:
+            _patch_module(call, module_name, patches)
+    _PENDING.append((call, patches))
+    if _HOOK not in sys.meta_path:
+        sys.meta_path.insert(0, _HOOK)
+    return patches
+
+
+def uninstall(patches):
+    """Restores the endpoints replaced by install() and stops patching modules imported later."""
+    _PENDING[:] = [(call, pending) for call, pending in _PENDING if pending is not patches]
+    if not _PENDING and _HOOK in sys.meta_path:
+        sys.meta_path.remove(_HOOK)
+    for owner, name, original in reversed(patches):
+        setattr(owner, name, original)
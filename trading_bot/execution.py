@@ -0,0 +1,304 @@
+"""
+Concurrent order execution.
+
+OrderExecutor takes a list of sizing decisions and submits them concurrently under a
+token-bucket rate limit. While submissions are still going out it tracks fills with a single
+"orders updated since" request per poll, covering every order at once. Decisions carry the
+price they were sized with, so no quote is fetched again, and the time from decision to
+submission is recorded per order.
+
+Brokers implement submit(symbol, quantity, side, limit_price) and orders_since(timestamp). RobinhoodBroker places real orders; SimulatedBroker fills orders locally
+for offline load tests:
+
+    python execution.py --orders 500 --rate 50 --latency 0.02 --fill-delay 0.5
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import robin_stocks.robinhood as rh
+from login import requires_login
+from rate_limit import TokenBucket
+
+# Order states after which an order no longer changes.
+FINAL_STATES = {"filled", "cancelled", "rejected", "failed"}
+
+
+def decision(symbol, invest_amount, price, side="buy"):
+    """
+    Builds a sizing decision for OrderExecutor from an amount and the price it was sized with.
+
+    :returns: Dictionary with symbol, side, quantity (whole shares), price and decided_at.
+    """
+    return {
+        "symbol": symbol,
+        "side": side,
+        "quantity": int(invest_amount // price) if price else 0,
+        "price": price,
+        "decided_at": time.monotonic(),
+    }
+
+
+class RobinhoodBroker:
+    """Places and looks up orders through robin_stocks."""
+
+    def __init__(self, limit_orders=False):
+        self.limit_orders = limit_orders
+
+    @requires_login
+    def submit(self, symbol, quantity, side="buy", limit_price=None):
+        if self.limit_orders and limit_price is not None:
+            place = rh.orders.order_buy_limit if side == "buy" else rh.orders.order_sell_limit
+            return place(symbol, quantity, round(limit_price, 2))
+        place = rh.orders.order_buy_market if side == "buy" else rh.orders.order_sell_market
+        return place(symbol, quantity)
+
+    @requires_login
+    def orders_since(self, since):
+        """Every stock order updated at or after `since` (seconds since the epoch)."""
+        start_date = datetime.fromtimestamp(since, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        return rh.orders.get_all_stock_orders(start_date=start_date) or []
+
+
+class SimulatedBroker:
+    """
+    Local broker for load tests. Every call sleeps for `latency` seconds; orders fill at their
+    reference price after an exponentially distributed delay with mean `fill_delay`.
+
+    :param error_rate: Probability that a submit raises (a transport failure).
+    :param reject_rate: Probability that a submitted order is rejected.
+    :param prices: (Optional) Dictionary of fill prices for market orders (default 100.0).
+    """
+
+    def __init__(self, latency=0.02, fill_delay=0.5, error_rate=0.0, reject_rate=0.0, prices=None, seed=0):
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.prices = prices or {}
+        self.random = random.Random(seed)
+        self.orders = {}
+        self.ids = itertools.count(1)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def _call(self, name):
+        with self.lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _update(self, order, now):
+        if order["state"] == "confirmed" and now >= order["fill_at"]:
+            order["state"] = "filled"
+            order["cumulative_quantity"] = order["quantity"]
+            order["average_price"] = order["price"]
+            order["updated_at"] = order["fill_at"]
+
+    def _public(self, order):
+        return {key: value for key, value in order.items() if key != "fill_at"}
+
+    def submit(self, symbol, quantity, side="buy", limit_price=None):
+        self._call("submit")
+        with self.lock:
+            if self.random.random() < self.error_rate:
+                raise ConnectionError("simulated submit failure")
+            rejected = quantity <= 0 or self.random.random() < self.reject_rate
+            order = {
+                "id": f"sim-{next(self.ids)}",
+                "symbol": symbol,
+                "side": side,
+                "quantity": quantity,
+                "price": limit_price if limit_price is not None else self.prices.get(symbol, 100.0),
+                "state": "rejected" if rejected else "confirmed",
+                "cumulative_quantity": 0,
+                "average_price": None,
+                "updated_at": time.time(),
+                "fill_at": time.time() + self.random.expovariate(1 / self.fill_delay) if self.fill_delay else 0,
+            }
+            self.orders[order["id"]] = order
+            return self._public(order)
+
+    def orders_since(self, since):
+        self._call("orders_since")
+        now = time.time()
+        with self.lock:
+            for order in self.orders.values():
+                self._update(order, now)
+            return [self._public(order) for order in self.orders.values() if order["updated_at"] >= since]
+
+
+class OrderExecutor:
+    """
+    Submits decisions concurrently and tracks their fills.
+
+    :param broker: RobinhoodBroker (default) or SimulatedBroker.
+    :param rate: Broker requests per second.
+    :param burst: Requests allowed in a burst.
+    :param max_in_flight: Broker calls running at the same time.
+    :param poll_interval: Seconds between open-order polls.
+    :param timeout: Seconds to keep tracking before giving up on open orders.
+    :param on_fill: (Optional) Callable on_fill(record) run once per order that ends with shares
+                    filled (e.g. portfolio.PORTFOLIO.apply_order).
+    """
+
+    def __init__(self, broker=None, rate=5.0, burst=10, max_in_flight=10, poll_interval=1.0, timeout=60.0,
+                 on_fill=None):
+        self.broker = broker if broker is not None else RobinhoodBroker()
+        self.on_fill = on_fill
+        self.limiter = TokenBucket(rate, burst)
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    async def _broker_call(self, semaphore, func, *args, limited=True):
+        if limited:
+            await self.limiter.acquire_async()
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def _submit(self, semaphore, item):
+        record = dict(item, id=None, state="failed", error=None, filled_quantity=0, average_price=None)
+        if item["quantity"] <= 0:
+            record["error"] = "quantity is zero"
+            return record
+        try:
+            order = await self._broker_call(semaphore, self.broker.submit, item["symbol"], item["quantity"],
+                                            item.get("side", "buy"), item.get("price"))
+        except Exception as e:
+            record["error"] = repr(e)
+            return record
+        record["submitted_at"] = time.monotonic()
+        record["latency"] = record["submitted_at"] - item.get("decided_at", record["submitted_at"])
+        if not order or "id" not in order:
+            record["error"] = f"unexpected response: {order!r}"
+            return record
+        record["id"], record["state"] = order["id"], order.get("state", "unconfirmed")
+        self._apply(record, order)
+        return record
+
+    def _apply(self, record, order):
+        record["state"] = order.get("state", record["state"])
+        record["filled_quantity"] = float(order.get("cumulative_quantity") or 0)
+        record["average_price"] = order.get("average_price")
+        if record["state"] in FINAL_STATES:
+            record["completed_at"] = time.monotonic()
+            if self.on_fill is not None and record["filled_quantity"]:
+                self.on_fill(record)
+
+    async def _track(self, semaphore, pending, submitting, since):
+        """
+        Polls for updated orders until every submitted order is final and submissions are done,
+        or the timeout passes. Each poll is one request, whatever the number of orders.
+        """
+        deadline = time.monotonic() + self.timeout
+        while (pending or not submitting.done()) and time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            if not pending:
+                continue
+            try:
+                # Paced by poll_interval rather than the limiter, so a long submission queue cannot starve it.
+                orders = await self._broker_call(semaphore, self.broker.orders_since, since, limited=False)
+            except Exception as e:
+                print(f"Error polling orders: {e}")
+                continue
+            for order in orders:
+                record = pending.get(order.get("id"))
+                if record is None:
+                    continue
+                self._apply(record, order)
+                if record["state"] in FINAL_STATES:
+                    del pending[order["id"]]
+
+    async def execute_async(self, decisions):
+        """
+        Submits every decision and tracks the orders (starting while later ones are still being
+        submitted) until they reach a final state. Returns the order records.
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        pending = {}
+        since = time.time() - 1
+
+        async def submit(item):
+            record = await self._submit(semaphore, item)
+            if record["id"] and record["state"] not in FINAL_STATES:
+                pending[record["id"]] = record
+            return record
+
+        submitting = asyncio.ensure_future(asyncio.gather(*(submit(item) for item in decisions)))
+        await self._track(semaphore, pending, submitting, since)
+        return list(await submitting)
+
+    def execute(self, decisions):
+        """Synchronous wrapper around execute_async."""
+        return asyncio.run(self.execute_async(decisions))
+
+
+def summarize(records, seconds=None):
+    """Returns counts by state, decision-to-submit latency and fill-time percentiles of order records."""
+    def percentiles(values):
+        if not values:
+            return {}
+        values = sorted(values)
+        return {"p50": statistics.median(values), "p95": values[int(0.95 * (len(values) - 1))], "max": values[-1]}
+
+    summary = {
+        "orders": len(records),
+        "states": dict(Counter(record["state"] for record in records)),
+        "submit_latency": percentiles([record["latency"] for record in records if "latency" in record]),
+        "fill_time": percentiles([record["completed_at"] - record["submitted_at"] for record in records
+                                  if record["state"] == "filled" and "completed_at" in record]),
+    }
+    if seconds is not None:
+        summary["seconds"] = seconds
+        summary["orders_per_second"] = len(records) / seconds if seconds else float("inf")
+    return summary
+
+
+def load_test(orders=500, rate=50.0, burst=50, max_in_flight=20, latency=0.02, fill_delay=0.5,
+              error_rate=0.0, reject_rate=0.0, poll_interval=0.25, seed=0):
+    """Executes `orders` random decisions against a SimulatedBroker and returns the summary."""
+    rng = random.Random(seed)
+    broker = SimulatedBroker(latency, fill_delay, error_rate, reject_rate, seed=seed)
+    executor = OrderExecutor(broker, rate, burst, max_in_flight, poll_interval)
+    decisions = [decision(f"SYM{i % 200:04d}", rng.uniform(100, 5000), rng.uniform(5, 500)) for i in range(orders)]
+    start = time.perf_counter()
+    records = executor.execute(decisions)
+    summary = summarize(records, time.perf_counter() - start)
+    summary["broker_calls"] = dict(broker.calls)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the order executor against a simulated broker.")
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=50.0, help="Broker requests per second.")
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--max-in-flight", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per simulated broker call.")
+    parser.add_argument("--fill-delay", type=float, default=0.5, help="Mean seconds until an order fills.")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reject-rate", type=float, default=0.0)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    summary = load_test(args.orders, args.rate, args.burst, args.max_in_flight, args.latency, args.fill_delay,
+                        args.error_rate, args.reject_rate, args.poll_interval, args.seed)
+    print(f"{summary['orders']} orders in {summary['seconds']:.2f} s ({summary['orders_per_second']:.1f}/s)")
+    print(f"States: {summary['states']}")
+    for name in ("submit_latency", "fill_time"):
+        if summary[name]:
+            print(f"{name}: " + ", ".join(f"{key} {value * 1000:.1f} ms" for key, value in summary[name].items()))
+    print(f"Broker calls: {summary['broker_calls']}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
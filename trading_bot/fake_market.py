@@ -0,0 +1,310 @@
+import sys
+import threading
+import time
+import types
+import zlib
+from collections import Counter
+import numpy as np
+
+# Sector names in the style the Robinhood fundamentals endpoint reports them.
+FAKE_SECTORS = [
+    "Electronic Technology", "Technology Services", "Health Technology", "Energy Minerals",
+    "Consumer Durables", "Consumer Non-Durables", "Finance", "Utilities", "Industrial Services",
+    "Non-Energy Minerals", "Communications", "Retail Trade",
+]
+
+INTRADAY_MINUTES = {"5minute": 5, "10minute": 10, "hour": 60}
+SPAN_DAYS = {"day": 1, "week": 5, "month": 22, "3month": 65, "year": 252, "5year": 1260}
+SESSION_OPEN_MINUTES = 14 * 60 + 30  # 09:30 New York as minutes after midnight UTC (EST)
+SESSION_MINUTES = 390
+
+
+class FakeAPIError(Exception):
+    """Raised by the fake endpoints to simulate a failed request."""
+
+
+class FakeMarket:
+    """
+    Local stand-in for the robin_stocks.robinhood and yfinance calls the bot uses.
+
+    Prices are deterministic random walks per symbol (seeded from the symbol and `seed`),
+    so two markets built with the same arguments return the same data. Every call sleeps
+    `latency` seconds, fails with probability `error_rate`, and is counted in self.calls.
+    install() puts the fake modules into sys.modules; it must run before the bot's modules
+    are imported.
+    """
+
+    def __init__(self, num_symbols=200, seed=0, latency=0.0, error_rate=0.0, cash=10000.0, days=520):
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.cash = cash
+        self.days = days
+        self.symbols = [f"SYM{i:04d}" for i in range(num_symbols)]
+        self.symbol_set = set(self.symbols)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.rng = np.random.default_rng(seed)
+        self._closes = {}
+        self.robinhood = self._build_robinhood()
+        self.yfinance = self._build_yfinance()
+
+    # --- call accounting -------------------------------------------------------------
+
+    def _call(self, endpoint):
+        with self.lock:
+            self.calls[endpoint] += 1
+            fail = self.error_rate and self.rng.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise FakeAPIError(f"simulated failure in {endpoint}")
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+    # --- synthetic data --------------------------------------------------------------
+
+    def _seed_for(self, symbol):
+        return zlib.crc32(symbol.encode()) ^ self.seed
+
+    def trading_days(self):
+        """Business days (datetime64[D]) ending with the most recent one up to today."""
+        today = np.datetime64("today", "D")
+        last = np.busday_offset(today, 0, roll="backward")
+        return np.busday_offset(last, np.arange(-self.days + 1, 1), roll="backward")
+
+    def closes(self, symbol):
+        """Daily closes of a symbol, aligned with trading_days()."""
+        closes = self._closes.get(symbol)
+        if closes is None:
+            rng = np.random.default_rng(self._seed_for(symbol))
+            start = rng.uniform(5, 500)
+            vol = rng.uniform(0.005, 0.05)
+            closes = start * np.exp(np.cumsum(rng.normal(0.0003, vol, self.days)))
+            self._closes[symbol] = closes
+        return closes
+
+    def _daily_bars(self, symbol, days):
+        dates = self.trading_days()[-days:]
+        closes = self.closes(symbol)
+        opens = np.concatenate([[closes[0]], closes[:-1]])[-days:]
+        closes = closes[-days:]
+        return [{
+            "begins_at": f"{date}T00:00:00Z",
+            "open_price": f"{o:.4f}", "close_price": f"{c:.4f}",
+            "high_price": f"{max(o, c) * 1.01:.4f}", "low_price": f"{min(o, c) * 0.99:.4f}",
+            "volume": int(1e6), "session": "reg", "interpolated": False, "symbol": symbol,
+        } for date, o, c in zip(dates, opens, closes)]
+
+    def _intraday_bars(self, symbol, minutes, days):
+        dates = self.trading_days()[-days:]
+        closes = self.closes(symbol)[-days - 1:]
+        steps = SESSION_MINUTES // minutes
+        bars = []
+        for day, date in enumerate(dates):
+            path = np.linspace(closes[day], closes[day + 1], steps + 1)
+            start = np.datetime64(date, "m") + SESSION_OPEN_MINUTES
+            for k in range(steps):
+                o, c = path[k], path[k + 1]
+                bars.append({
+                    "begins_at": f"{start + k * minutes}:00Z",
+                    "open_price": f"{o:.4f}", "close_price": f"{c:.4f}",
+                    "high_price": f"{max(o, c):.4f}", "low_price": f"{min(o, c):.4f}",
+                    "volume": 1000, "session": "reg", "interpolated": False, "symbol": symbol,
+                })
+        return bars
+
+    def quote(self, symbol):
+        closes = self.closes(symbol)
+        return {
+            "symbol": symbol,
+            "last_trade_price": f"{closes[-1]:.4f}",
+            "previous_close": f"{closes[-2]:.4f}",
+            "adjusted_previous_close": f"{closes[-2]:.4f}",
+            "ask_price": f"{closes[-1] * 1.001:.4f}",
+            "bid_price": f"{closes[-1] * 0.999:.4f}",
+            "updated_at": f"{self.trading_days()[-1]}T21:00:00Z",
+        }
+
+    def fundamentals(self, symbol):
+        rng = np.random.default_rng(self._seed_for(symbol) + 1)
+        return {
+            "symbol": symbol,
+            "sector": FAKE_SECTORS[self._seed_for(symbol) % len(FAKE_SECTORS)],
+            "market_cap": f"{rng.uniform(1e8, 1e12):.2f}",
+            "pe_ratio": f"{rng.uniform(5, 60):.2f}",
+            "average_volume": f"{rng.uniform(1e5, 5e7):.2f}",
+            "headquarters_state": "CA",
+        }
+
+    def _symbols(self, inputs):
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs)
+        seen = []
+        for symbol in inputs:
+            symbol = symbol.upper().strip()
+            if symbol in self.symbol_set and symbol not in seen:
+                seen.append(symbol)
+        return seen
+
+    # --- robin_stocks.robinhood ------------------------------------------------------
+
+    def _build_robinhood(self):
+        market = self
+
+        def get_quotes(inputSymbols, info=None):
+            market._call("rh.stocks.get_quotes")
+            return [market.quote(s) for s in market._symbols(inputSymbols)]
+
+        def get_fundamentals(inputSymbols, info=None):
+            market._call("rh.stocks.get_fundamentals")
+            return [market.fundamentals(s) for s in market._symbols(inputSymbols)]
+
+        def get_instruments_by_symbols(inputSymbols, info=None):
+            market._call("rh.stocks.get_instruments_by_symbols")
+            return [{"symbol": s, "simple_name": f"{s} Corp", "tradeable": True}
+                    for s in market._symbols(inputSymbols)]
+
+        def get_stock_historicals(inputSymbols, interval='hour', span='week', bounds='regular', info=None):
+            market._call("rh.stocks.get_stock_historicals")
+            days = SPAN_DAYS[span]
+            bars = []
+            for symbol in market._symbols(inputSymbols):
+                if interval in INTRADAY_MINUTES:
+                    bars.extend(market._intraday_bars(symbol, INTRADAY_MINUTES[interval], days))
+                else:
+                    bars.extend(market._daily_bars(symbol, min(days, market.days)))
+            return bars
+
+        def get_latest_price(inputSymbols, priceType=None, includeExtendedHours=True):
+            market._call("rh.stocks.get_latest_price")
+            return [market.quote(s)["last_trade_price"] for s in market._symbols(inputSymbols)]
+
+        def get_stock_quote_by_symbol(symbol, info=None):
+            market._call("rh.stocks.get_stock_quote_by_symbol")
+            return market.quote(symbol.upper())
+
+        def get_top_movers(info=None):
+            market._call("rh.markets.get_top_movers")
+            changes = {s: abs(market.closes(s)[-1] / market.closes(s)[-2] - 1) for s in market.symbols}
+            top = sorted(changes, key=changes.get, reverse=True)[:20]
+            return [market.quote(s) for s in top]
+
+        def load_account_profile(info=None):
+            market._call("rh.account.load_account_profile")
+            return {"cash": f"{market.cash:.2f}", "buying_power": f"{market.cash:.2f}"}
+
+        def build_holdings(with_dividends=False):
+            market._call("rh.account.build_holdings")
+            return {}
+
+        def get_open_stock_positions(account_number=None, info=None):
+            market._call("rh.account.get_open_stock_positions")
+            return []
+
+        def login(username=None, password=None, expiresIn=86400, **kwargs):
+            market._call("rh.login")
+            return {"access_token": "fake", "token_type": "Bearer", "expires_in": expiresIn}
+
+        def request_post(url, payload=None, **kwargs):
+            market._call("rh.helper.request_post")
+            return {"access_token": "fake", "token_type": "Bearer", "refresh_token": "fake", "expires_in": 3600}
+
+        session = types.SimpleNamespace(headers={}, mount=lambda prefix, adapter: None)
+        helper = types.SimpleNamespace(
+            SESSION=session,
+            set_login_state=lambda logged_in: None,
+            update_session=lambda key, value: session.headers.__setitem__(key, value),
+            request_post=request_post,
+        )
+        return types.SimpleNamespace(
+            stocks=types.SimpleNamespace(
+                get_quotes=get_quotes, get_fundamentals=get_fundamentals,
+                get_instruments_by_symbols=get_instruments_by_symbols,
+                get_stock_historicals=get_stock_historicals, get_latest_price=get_latest_price,
+                get_stock_quote_by_symbol=get_stock_quote_by_symbol,
+            ),
+            markets=types.SimpleNamespace(get_top_movers=get_top_movers),
+            account=types.SimpleNamespace(load_account_profile=load_account_profile,
+                                          build_holdings=build_holdings,
+                                          get_open_stock_positions=get_open_stock_positions),
+            get_quotes=get_quotes,
+            login=login,
+            helper=helper,
+            urls=types.SimpleNamespace(login_url=lambda: "https://fake/oauth2/token/"),
+        )
+
+    # --- yfinance --------------------------------------------------------------------
+
+    def _history(self, symbol, period=None, start=None):
+        import pandas as pd
+        dates = self.trading_days()
+        closes = self.closes(symbol)
+        if start is not None:
+            keep = dates >= np.datetime64(start, "D")
+        else:
+            keep = dates >= dates[-1] - np.timedelta64({"1mo": 30, "1y": 365}.get(period, 365), "D")
+        index = pd.DatetimeIndex(dates[keep]).tz_localize("America/New_York")
+        c = closes[keep]
+        return pd.DataFrame({"Open": c, "High": c * 1.01, "Low": c * 0.99, "Close": c, "Volume": 1e6},
+                            index=index)
+
+    def _build_yfinance(self):
+        market = self
+
+        class Ticker:
+            def __init__(self, ticker):
+                self.ticker = ticker.upper()
+
+            @property
+            def info(self):
+                market._call("yf.Ticker.info")
+                if self.ticker not in market.symbol_set:
+                    return {}
+                fundamental = market.fundamentals(self.ticker)
+                return {
+                    "longName": f"{self.ticker} Corporation", "shortName": f"{self.ticker} Corp",
+                    "marketCap": float(fundamental["market_cap"]), "trailingPE": float(fundamental["pe_ratio"]),
+                    "dividendYield": 0.01, "averageVolume": float(fundamental["average_volume"]),
+                    "previousClose": float(market.closes(self.ticker)[-2]),
+                    "industry": "Synthetic", "sector": fundamental["sector"],
+                }
+
+            def history(self, period=None, start=None, **kwargs):
+                market._call("yf.Ticker.history")
+                return market._history(self.ticker, period, start)
+
+        def download(tickers, period=None, start=None, group_by="column", **kwargs):
+            import pandas as pd
+            market._call("yf.download")
+            tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+            frames = {t: market._history(t.upper(), period, start) for t in tickers if t.upper() in market.symbol_set}
+            if not frames:
+                return pd.DataFrame()
+            return pd.concat(frames, axis=1)
+
+        return types.SimpleNamespace(Ticker=Ticker, download=download)
+
+    # --- installation ----------------------------------------------------------------
+
+    def install(self):
+        """Registers the fake robin_stocks and yfinance modules in sys.modules."""
+        robin_stocks = types.ModuleType("robin_stocks")
+        robinhood = types.ModuleType("robin_stocks.robinhood")
+        robinhood.__dict__.update(vars(self.robinhood))
+        helper = types.ModuleType("robin_stocks.robinhood.helper")
+        helper.__dict__.update(vars(self.robinhood.helper))
+        urls = types.ModuleType("robin_stocks.robinhood.urls")
+        urls.__dict__.update(vars(self.robinhood.urls))
+        robinhood.helper, robinhood.urls = helper, urls
+        robin_stocks.robinhood = robinhood
+        yfinance = types.ModuleType("yfinance")
+        yfinance.__dict__.update(vars(self.yfinance))
+        sys.modules.update({
+            "robin_stocks": robin_stocks,
+            "robin_stocks.robinhood": robinhood,
+            "robin_stocks.robinhood.helper": helper,
+            "robin_stocks.robinhood.urls": urls,
+            "yfinance": yfinance,
+        })
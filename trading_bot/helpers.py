@@ -1,5 +1,50 @@
 import robin_stocks.robinhood as rh
 import pandas as pd
+import numpy as np
+import threading
+import time
+from bar_cache import BarCache, BAR_DTYPE, SPAN_SECONDS, empty_bars, window, percent_change
+from sector_index import get_index
+from ref_cache import TTLCache, DEFAULT_DISK_PATH
+from login import requires_login
+
+# Shared on-disk store for Robinhood historicals; created by get_bar_cache() on first use, so
+# importing this module does not touch the disk.
+BAR_CACHE = None
+
+# Read-through cache for quotes, fundamentals and instrument records (see ref_cache.DEFAULT_TTLS);
+# created by get_ref_cache() on first use.
+REF_CACHE = None
+
+_CACHE_LOCK = threading.Lock()
+
+
+def get_bar_cache():
+    """Returns BAR_CACHE, creating it (and the bar_cache/ directory) on first use."""
+    global BAR_CACHE
+    with _CACHE_LOCK:
+        if BAR_CACHE is None:
+            BAR_CACHE = BarCache()
+        return BAR_CACHE
+
+
+def get_ref_cache():
+    """Returns REF_CACHE, opening its SQLite tier on first use."""
+    global REF_CACHE
+    with _CACHE_LOCK:
+        if REF_CACHE is None:
+            REF_CACHE = TTLCache(disk_path=DEFAULT_DISK_PATH)
+        return REF_CACHE
+
+
+# Spans Robinhood accepts for each bar interval, shortest first.
+VALID_SPANS = {
+    "5minute": ["day", "week"],
+    "10minute": ["day", "week"],
+    "hour": ["week", "month", "3month"],
+    "day": ["week", "month", "3month", "year", "5year"],
+    "week": ["year", "5year"],
+}
 
 def compute_percent_change(open_price, close_price):
     """
@@ -26,7 +71,51 @@ def get_stock_info(symbol):
     :param symbol: Stock ticker symbol.
     :returns: Stock quote information from Robinhood.
     """
-    return rh.stocks.get_stock_quote_by_symbol(symbol)
+    return get_quotes([symbol]).get(symbol.upper())
+
+@requires_login
+def _fetch_quotes(symbols):
+    return _index_by_symbol(rh.stocks.get_quotes(symbols))
+
+@requires_login
+def _fetch_fundamentals(symbols):
+    return _index_by_symbol(rh.stocks.get_fundamentals(symbols))
+
+@requires_login
+def _fetch_instruments(symbols):
+    return _index_by_symbol(rh.stocks.get_instruments_by_symbols(symbols))
+
+def get_quotes(symbols):
+    """
+    Returns quotes for several symbols through REF_CACHE; expired or missing
+    symbols are fetched with a single get_quotes call.
+    
+    :param symbols: List of stock ticker symbols.
+    :returns: Dictionary mapping each upper-cased symbol to its quote dictionary.
+    """
+    return get_ref_cache().get_many("quote", [symbol.upper() for symbol in symbols],
+                              _fetch_quotes)
+
+def get_fundamentals(symbols):
+    """
+    Returns fundamentals for several symbols through REF_CACHE.
+    
+    :param symbols: List of stock ticker symbols.
+    :returns: Dictionary mapping each upper-cased symbol to its fundamentals dictionary.
+    """
+    return get_ref_cache().get_many("fundamentals", [symbol.upper() for symbol in symbols],
+                              _fetch_fundamentals)
+
+def get_instruments(symbols):
+    """
+    Returns instrument records (which carry the company's simple_name) for several symbols
+    through REF_CACHE.
+    
+    :param symbols: List of stock ticker symbols.
+    :returns: Dictionary mapping each upper-cased symbol to its instrument dictionary.
+    """
+    return get_ref_cache().get_many("instrument", [symbol.upper() for symbol in symbols],
+                              _fetch_instruments)
 
 def format_stock_stats(stock_stat):
     """
@@ -60,33 +149,64 @@ def get_company_details(ticker):
     :returns: A dictionary with keys "company_name", "headquarters", and "company_size",
               or None if fundamentals data is not available.
     """
-    fundamentals = rh.stocks.get_fundamentals(ticker)
-    instruments = rh.stocks.get_instruments_by_symbols(ticker)
-    if fundamentals and len(fundamentals) > 0:
-        fundamental = fundamentals[0]
-        instrument = instruments[0]
-        company_name = instrument.get("simple_name", "N/A")
-        headquarters = fundamental.get("headquarters_state", "N/A")
-        stock_price = get_stock_info(ticker).get("last_trade_price", "N/A")
-        market_cap = fundamental.get("market_cap", "N/A")
-        pe_ratio = fundamental.get("pe_ratio", "N/A")
-        average_volume = fundamental.get("average_volume", "N/A")
-        
-        return {
-            "company_name": company_name,
-            "headquarters": headquarters,
-            "stock_price": stock_price,
-            "market_cap": format_stock_stats(market_cap),
-            "average_volume": format_stock_stats(average_volume),
-            "pe_ratio": pe_ratio
+    return get_company_details_batch([ticker]).get(ticker.upper())
+
+
+def get_company_details_batch(tickers):
+    """
+    Retrieves company details for several tickers at once. Fundamentals (headquarters and the
+    live market cap, volume and PE) and quotes are each requested with a single list call.
+    Company names come from the local sector index; instruments are requested only for tickers
+    it does not name. All three go through REF_CACHE.
+    
+    :param tickers: List of stock ticker symbols.
+    :returns: A dictionary mapping each upper-cased ticker to the same details dictionary
+              returned by get_company_details. Tickers without fundamentals are left out.
+    """
+    index = get_index()
+    names = {}
+    for ticker in tickers:
+        entry = index.lookup(ticker)
+        if entry is not None and entry["company_name"] != "N/A":
+            names[ticker.upper()] = entry["company_name"]
+    unnamed = [ticker for ticker in tickers if ticker.upper() not in names]
+    if unnamed:
+        for ticker, instrument in get_instruments(unnamed).items():
+            names[ticker] = instrument.get("simple_name") or "N/A"
+    fundamentals = get_fundamentals(tickers)
+    quotes = get_quotes(tickers)
+
+    details = {}
+    for ticker, fundamental in fundamentals.items():
+        quote = quotes.get(ticker, {})
+        details[ticker] = {
+            "company_name": names.get(ticker, "N/A"),
+            "headquarters": _value_or_na(fundamental.get("headquarters_state")),
+            "stock_price": _value_or_na(quote.get("last_trade_price")),
+            "market_cap": format_stock_stats(fundamental.get("market_cap", "N/A")),
+            "average_volume": format_stock_stats(fundamental.get("average_volume", "N/A")),
+            "pe_ratio": _value_or_na(fundamental.get("pe_ratio"))
         }
-    return None
+    return details
+
+
+def _value_or_na(value):
+    """Returns value, or "N/A" if it is missing (None, empty or NaN)."""
+    if value is None or value == "" or (isinstance(value, float) and np.isnan(value)):
+        return "N/A"
+    return value
+
+
+def _index_by_symbol(records):
+    """Maps a list of robin_stocks records (each carrying a "symbol" key) by symbol."""
+    return {record["symbol"]: record for record in records or [] if record and record.get("symbol")}
 
 
 def classify_risk(stock_volatility):
     """
     Classify stocks based on volatility.
     (Example: Low if volatility < 2%, Medium if 2-5%, High if >5%)
+    indicators.classify_risk buckets whole arrays with the same boundaries.
     
     :param stock_volatility: Volatility percentage.
     :returns: A string representing the risk classification.
@@ -106,62 +226,115 @@ def get_quote_percent_change(ticker):
     :param ticker: Stock ticker symbol (e.g., "AAPL")
     :returns: Percent change as a float, or None if data is missing.
     """
-    quote_data = rh.get_quotes(ticker)
-    if quote_data:
-        quote = quote_data[0]
-        return compute_percent_change(quote.get('previous_close', 0),
-                                      quote.get('last_trade_price', 0))
+    quote = get_quotes([ticker]).get(ticker.upper())
+    if quote:
+        return quote_percent_change(quote)
     return None
 
+def quote_percent_change(quote):
+    """
+    Computes the percent change between the last trade price and the previous close
+    of an already-fetched quote dictionary (as returned by get_quotes or get_top_movers).
+    
+    :param quote: Quote dictionary.
+    :returns: Percent change as a float, or None if data is missing.
+    """
+    return compute_percent_change(quote.get('previous_close', 0),
+                                  quote.get('last_trade_price', 0))
+
 def get_percent_change(ticker, interval, span):
     """
     Retrieves historical data for a ticker and computes the percent change
     between the first open price and the last close price in the returned data.
+    Bars are read through BAR_CACHE, so only bars newer than the last stored one are fetched.
     
     :param ticker: Stock ticker symbol.
     :param interval: Data interval (e.g., "5minute", "hour", "day").
     :param span: Data span (e.g., "day", "week", "month", "year").
     :returns: Percent change as a float, or None if data is missing.
     """
-    historicals = rh.stocks.get_stock_historicals(
-        ticker, interval=interval, span=span, bounds='regular'
-    )
-    if not historicals or len(historicals) == 0:
-        return None
-    return compute_percent_change(historicals[0]['open_price'],
-                                  historicals[-1]['close_price'])
+    bars = get_historical_bars([ticker], interval, span)[ticker.upper()]
+    return percent_change(window(bars, span))
+
+def get_historical_bars(tickers, interval, span):
+    """
+    Returns OHLCV bars for several tickers from BAR_CACHE, fetching missing bars from
+    Robinhood with one get_stock_historicals call per batch.
+    
+    :param tickers: List of stock ticker symbols.
+    :param interval: Data interval (e.g., "5minute", "hour", "day").
+    :param span: Span the caller needs; the stored series may reach further back.
+    :returns: Dictionary mapping each upper-cased ticker to a bar array (see bar_cache.BAR_DTYPE).
+    """
+    return get_bar_cache().get_many(tickers, interval, span,
+                              lambda batch, since, span: _fetch_historical_bars(batch, interval, span, since))
+
+@requires_login
+def _fetch_historical_bars(tickers, interval, span, since=None):
+    """
+    Fetches bars from Robinhood. When `since` is given, the shortest span covering the
+    time elapsed since then (but no longer than `span`) is requested instead of the full span.
+    """
+    if since is not None:
+        elapsed = time.time() - since
+        spans = [s for s in VALID_SPANS.get(interval, []) if SPAN_SECONDS[s] <= SPAN_SECONDS[span]] or [span]
+        span = next((s for s in spans if SPAN_SECONDS[s] >= elapsed), spans[-1])
+    historicals = rh.stocks.get_stock_historicals(tickers, interval=interval, span=span, bounds='regular')
+    return {symbol: _to_bar_array(bars) for symbol, bars in _group_bars_by_symbol(historicals).items()}
+
+def _group_bars_by_symbol(historicals):
+    """Splits the flat list returned by a multi-symbol get_stock_historicals call per symbol."""
+    grouped = {}
+    for bar in historicals or []:
+        if bar:
+            grouped.setdefault(bar["symbol"], []).append(bar)
+    return grouped
+
+def _to_bar_array(bars):
+    """Converts Robinhood historical dictionaries into a bar array."""
+    arr = np.empty(len(bars), dtype=BAR_DTYPE)
+    arr["time"] = np.array([bar["begins_at"].rstrip("Z") for bar in bars], dtype="datetime64[s]").astype("int64")
+    for field in ("open", "high", "low", "close"):
+        arr[field] = [float(bar[f"{field}_price"] or "nan") for bar in bars]
+    arr["volume"] = [float(bar.get("volume") or 0) for bar in bars]
+    return arr
 
 def build_temp_table(tickers):
     """
     Builds a temporary table (as a Pandas DataFrame) with percent changes for day, week,
     month, and year for each ticker. The stock name (ticker) is placed in the rightmost column.
+
+    Historicals are read through BAR_CACHE in two series for all tickers at once: 5-minute bars
+    over a week (from which the day and week changes are derived) and daily bars over a year
+    (from which the month and year changes are derived).
     
     :param tickers: List of stock ticker symbols.
     :returns: Pandas DataFrame with percent changes and the corresponding stock symbol.
     """
+    intraday = get_historical_bars(tickers, interval="5minute", span="week")
+    daily = get_historical_bars(tickers, interval="day", span="year")
+
     temp_data = []
     for ticker in tickers:
-        day_change   = get_percent_change(ticker, interval="5minute", span="day")
-        week_change  = get_percent_change(ticker, interval="10minute", span="week")
-        month_change = get_percent_change(ticker, interval="hour", span="month")
-        year_change  = get_percent_change(ticker, interval="day", span="year")
-        
+        week_bars = intraday.get(ticker.upper(), empty_bars())
+        year_bars = daily.get(ticker.upper(), empty_bars())
         temp_data.append({
-             "stock": ticker,
-            "day_change_perc": day_change,
-            "week_change_perc": week_change,
-            "month_change_perc": month_change,
-            "year_change_perc": year_change
-           
+            "stock": ticker,
+            "day_change_perc": percent_change(window(week_bars, "day")),
+            "week_change_perc": percent_change(window(week_bars, "week")),
+            "month_change_perc": percent_change(window(year_bars, "month")),
+            "year_change_perc": percent_change(window(year_bars, "year"))
         })
     
     df = pd.DataFrame(temp_data, columns=[
         "stock","day_change_perc", "week_change_perc", "month_change_perc", "year_change_perc"
     ])
     
-    company_df = pd.DataFrame([{**get_company_details(ticker), "stock": ticker} for ticker in df['stock']])
+    details = get_company_details_batch(tickers)
+    company_df = pd.DataFrame([{**details.get(ticker.upper(), {}), "stock": ticker} for ticker in df['stock']],
+                              columns=["company_name", "headquarters", "stock_price", "market_cap",
+                                       "average_volume", "pe_ratio", "stock"])
 
     merged_table = df.merge(company_df, on="stock", how="left")
 
     return merged_table
-
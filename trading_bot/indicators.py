@@ -0,0 +1,234 @@
+"""
+Vectorized indicators and risk bucketing for many tickers at once.
+
+Bars (see bar_cache.BAR_DTYPE) are aligned into a Panel: one (symbols x times) float array per
+field, NaN where a ticker has no bar. Every indicator works on whole panels with NumPy, so a
+universe of thousands of tickers is processed without a Python loop per ticker.
+
+    panel = align(helpers.get_historical_bars(tickers, "day", "year"))
+    table = risk_table(panel)
+"""
+import time
+import numpy as np
+import pandas as pd
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+# Volatility thresholds (percent) and labels used by helpers.classify_risk.
+RISK_THRESHOLDS = (2, 5)
+RISK_LABELS = ("Low", "Medium", "High")
+
+
+class Panel:
+    """Bars of many tickers on a shared time axis: `close[i, j]` is symbols[i] at times[j]."""
+
+    def __init__(self, symbols, times, **fields):
+        self.symbols = list(symbols)
+        self.times = times
+        for name in FIELDS:
+            setattr(self, name, fields[name])
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+def align(bars_by_symbol):
+    """
+    Aligns per-ticker bar arrays on the union of their timestamps.
+
+    :param bars_by_symbol: Dictionary mapping each ticker to a bar array sorted by time.
+    :returns: A Panel; missing bars are NaN.
+    """
+    if not bars_by_symbol:
+        return Panel([], np.empty(0, dtype="<i8"), **{name: np.empty((0, 0)) for name in FIELDS})
+    symbols = list(bars_by_symbol)
+    series = [bars_by_symbol[symbol] for symbol in symbols]
+    lengths = {len(bars) for bars in series}
+    if len(lengths) == 1 and all(np.array_equal(bars["time"], series[0]["time"]) for bars in series[1:]):
+        # Common case (one batch of daily bars): every ticker already shares the time axis.
+        stacked = np.stack(series)
+        times = stacked["time"][0]
+        return Panel(symbols, times, **{name: stacked[name].astype(float) for name in FIELDS})
+
+    times = np.unique(np.concatenate([bars["time"] for bars in series]))
+    fields = {name: np.full((len(symbols), len(times)), np.nan) for name in FIELDS}
+    for i, bars in enumerate(series):
+        columns = np.searchsorted(times, bars["time"])
+        for name in FIELDS:
+            fields[name][i, columns] = bars[name]
+    return Panel(symbols, times, **fields)
+
+
+def ffill(values):
+    """Forward-fills NaNs along the time axis of a 2-D array."""
+    mask = np.isnan(values)
+    index = np.where(mask, 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    return values[np.arange(values.shape[0])[:, None], index]
+
+
+def percent_change(current, previous):
+    """Element-wise percent change; NaN where `previous` is zero or missing."""
+    current = np.asarray(current, dtype=float)
+    previous = np.asarray(previous, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (current - previous) / previous * 100
+    return np.where(previous == 0, np.nan, change)
+
+
+def returns(close, window=1):
+    """
+    Percent return over `window` bars at every bar.
+
+    :returns: Array shaped like `close`; the first `window` columns are NaN.
+    """
+    result = np.full(close.shape, np.nan)
+    if window < close.shape[1]:
+        result[:, window:] = percent_change(close[:, window:], close[:, :-window])
+    return result
+
+
+def window_return(close, window):
+    """Percent return of each ticker over its last `window` bars (gaps are forward-filled)."""
+    filled = ffill(close)
+    start = max(filled.shape[1] - 1 - window, 0)
+    return percent_change(filled[:, -1], filled[:, start])
+
+
+def _rolling_sum(values, window):
+    """Trailing sum over `window` columns; NaN until the window is full."""
+    result = np.full(values.shape, np.nan)
+    if window > values.shape[1]:
+        return result
+    cumsum = np.cumsum(values, axis=1)
+    result[:, window - 1] = cumsum[:, window - 1]
+    result[:, window:] = cumsum[:, window:] - cumsum[:, :-window]
+    return result
+
+
+def rolling_volatility(close, window=20, periods_per_year=None):
+    """
+    Rolling realized volatility: standard deviation (percent) of log returns over the last
+    `window` bars, annualized when periods_per_year is given (e.g. 252 for daily bars).
+
+    :returns: Array shaped like `close`; NaN until `window` returns are available.
+    """
+    filled = ffill(close)
+    log_returns = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns[:, 1:] = np.log(filled[:, 1:] / filled[:, :-1])
+    valid = np.isfinite(log_returns)
+    log_returns[~valid] = 0.0
+    count = _rolling_sum(valid.astype(float), window)
+    total = _rolling_sum(log_returns, window)
+    squares = _rolling_sum(log_returns ** 2, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (squares - total ** 2 / count) / (count - 1)
+    volatility = np.sqrt(np.clip(variance, 0, None)) * 100
+    volatility[~(count >= max(window, 2))] = np.nan
+    if periods_per_year:
+        volatility *= np.sqrt(periods_per_year)
+    return volatility
+
+
+def atr(high, low, close, window=14, min_periods=None):
+    """
+    Average true range over the last `window` bars (simple moving average of the true range).
+    Bars without a true range (gaps, or before a ticker's history starts) are left out of the
+    average instead of poisoning every later window.
+
+    :param min_periods: (Optional) Fewest valid true ranges a window needs; defaults to half
+                        the window (rounded up).
+    :returns: Array shaped like `close`, in price units; NaN where a window has too few valid bars.
+    """
+    previous = np.empty(close.shape)
+    previous[:, 0] = np.nan
+    previous[:, 1:] = ffill(close)[:, :-1]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    valid = np.isfinite(true_range)
+    true_range[~valid] = 0.0
+    count = _rolling_sum(valid.astype(float), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = _rolling_sum(true_range, window) / count
+    average[~(count >= (min_periods or (window + 1) // 2))] = np.nan
+    return average
+
+
+def drawdown(close):
+    """Percent drawdown from the running peak at every bar (0 at a new high, negative below it)."""
+    filled = ffill(close)
+    peak = np.fmax.accumulate(filled, axis=1)
+    return percent_change(filled, peak)
+
+
+def max_drawdown(close):
+    """Deepest drawdown of each ticker, as a negative percentage."""
+    return np.nanmin(drawdown(close), axis=1)
+
+
+def classify_risk(volatility, thresholds=RISK_THRESHOLDS, labels=RISK_LABELS):
+    """
+    Buckets volatilities into risk labels.
+
+    With the defaults this matches helpers.classify_risk: below the first threshold is "Low",
+    from the first up to and including the last is "Medium", above it "High".
+
+    :param volatility: Array-like of volatility percentages.
+    :param thresholds: Increasing bucket boundaries, one fewer than labels.
+    :param labels: Label of each bucket.
+    :returns: Object array of labels; None where the volatility is NaN.
+    """
+    if len(labels) != len(thresholds) + 1:
+        raise ValueError("labels must have one more entry than thresholds")
+    volatility = np.asarray(volatility, dtype=float)
+    bucket = (volatility >= thresholds[0]).astype(np.int64)
+    for threshold in thresholds[1:]:
+        bucket += volatility > threshold
+    bucket[np.isnan(volatility)] = len(labels)
+    return np.array(list(labels) + [None], dtype=object)[bucket]
+
+
+def risk_table(panel, windows=(1, 5, 21), volatility_window=20, atr_window=14,
+               thresholds=RISK_THRESHOLDS, labels=RISK_LABELS):
+    """
+    Latest indicators of every ticker in a panel.
+
+    :returns: DataFrame indexed by symbol with return_<n> columns for each window, volatility
+              (latest rolling realized volatility), atr_percent (ATR relative to the last
+              close), max_drawdown and risk (volatility bucket).
+    """
+    close = panel.close
+    last_close = ffill(close)[:, -1]
+    columns = {f"return_{window}": window_return(close, window) for window in windows}
+    columns["volatility"] = rolling_volatility(close, volatility_window)[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns["atr_percent"] = atr(panel.high, panel.low, close, atr_window)[:, -1] / last_close * 100
+    columns["max_drawdown"] = max_drawdown(close)
+    columns["risk"] = classify_risk(columns["volatility"], thresholds, labels)
+    return pd.DataFrame(columns, index=pd.Index(panel.symbols, name="symbol"))
+
+
+def synthetic_panel(num_symbols=7700, num_bars=252, seed=0):
+    """Random-walk daily bars for benchmarking."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (num_symbols, num_bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, close.shape)) * close
+    times = 1_600_000_000 + 86400 * np.arange(num_bars)
+    return Panel([f"SYM{i:04d}" for i in range(num_symbols)], times, open=close.copy(),
+                 high=close + spread, low=close - spread, close=close,
+                 volume=rng.integers(1e5, 1e7, close.shape).astype(float))
+
+
+def benchmark(num_symbols=7700, num_bars=252, seed=0):
+    """Times risk_table on a synthetic universe and prints the result."""
+    panel = synthetic_panel(num_symbols, num_bars, seed)
+    start = time.perf_counter()
+    table = risk_table(panel)
+    elapsed = time.perf_counter() - start
+    print(f"risk_table: {num_symbols} tickers x {num_bars} bars in {elapsed * 1000:.1f} ms")
+    print(table["risk"].value_counts().to_string())
+    return elapsed
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,30 +1,192 @@
 import os
+import json
+import pickle
+import threading
+import time
+from functools import wraps
 import pyotp
 from robin_stocks import *
 import robin_stocks.robinhood as r
+from robin_stocks.robinhood import helper as rh_helper
+from robin_stocks.robinhood.urls import login_url
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Ensure environment variables are loaded correctly
 username = os.getenv('robin_username')
 password = os.getenv('robin_password')
 mfa_secret = os.getenv('robin_mfa')
 
-if not username or not password or not mfa_secret:
-    raise ValueError("Error: Missing environment variables. Check your .env file.")
-
 # # Generate TOTP for two-factor authentication
 # totp = pyotp.TOTP(mfa_secret).now()
 # print("Current OTP:", totp)
 
+TOKEN_DIR = os.path.join(os.path.expanduser("~"), ".tokens")
+# robin_stocks keeps the token itself in this pickle; we add a sidecar with its expiry.
+PICKLE_PATH = os.path.join(TOKEN_DIR, "robinhood.pickle")
+STATE_PATH = os.path.join(TOKEN_DIR, "trading_bot_session.json")
+CLIENT_ID = 'c82SH0WZOsabOXGP2sxqcj34FxkvfnWRZBKlBjFS'
+
+
+class SessionManager:
+    """
+    Logs in to Robinhood lazily and keeps the session alive.
+
+    - ensure_login() is a no-op while the current token is valid. On first use it reuses a
+      token persisted by an earlier process if the sidecar says it has not expired, and only
+      otherwise performs a full login.
+    - A daemon timer refreshes the token `refresh_margin` seconds before it expires.
+    - All modules share robin_stocks' global requests session, which gets a larger
+      connection pool mounted once.
+    """
+
+    def __init__(self, expires_in=3600, refresh_margin=300, pool_size=20,
+                 pickle_path=PICKLE_PATH, state_path=STATE_PATH):
+        self.expires_in = expires_in
+        self.refresh_margin = refresh_margin
+        self.pool_size = pool_size
+        self.pickle_path = pickle_path
+        self.state_path = state_path
+        self.expires_at = 0
+        self.lock = threading.RLock()
+        self.timer = None
+        self.pool_mounted = False
+
+    def ensure_login(self):
+        """Makes sure robin_stocks has a valid token, logging in only if needed."""
+        with self.lock:
+            if self.expires_at - self.refresh_margin > time.time():
+                return
+            self._mount_pool()
+            if not self._restore():
+                self._login()
+            self._schedule_refresh()
+
+    def _mount_pool(self):
+        if not self.pool_mounted:
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            rh_helper.SESSION.mount("https://", adapter)
+            self.pool_mounted = True
+
+    def _restore(self):
+        """Reuses the persisted token without a network round trip if it is still valid."""
+        try:
+            with open(self.state_path) as f:
+                expires_at = json.load(f)["expires_at"]
+            with open(self.pickle_path, "rb") as f:
+                token = pickle.load(f)
+        except (OSError, ValueError, KeyError, pickle.UnpicklingError):
+            return False
+        if expires_at - self.refresh_margin <= time.time():
+            return False
+        self._apply(token, expires_at)
+        return True
+
+    def _apply(self, token, expires_at):
+        rh_helper.set_login_state(True)
+        rh_helper.update_session('Authorization', '{0} {1}'.format(token['token_type'], token['access_token']))
+        self.expires_at = expires_at
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path, "w") as f:
+            json.dump({"expires_at": self.expires_at}, f)
+
+    def _login(self):
+        """
+        Full username/password login (with a TOTP code if an MFA secret is configured).
+
+        robin_stocks silently reuses the pickled token instead whenever it still validates,
+        which happens exactly when that token is close to expiring (or refreshing it failed).
+        Its remaining lifetime is unknown, so a reused token is exchanged for a fresh one right
+        away; if that fails, the pickle is removed and the login repeated with the credentials.
+        """
+        if not username or not password:
+            raise ValueError("Error: Missing environment variables. Check your .env file.")
+        data = self._password_login()
+        if str(data.get("detail", "")).startswith("logged in using authentication"):
+            try:
+                self._refresh_token()
+                return
+            except Exception as e:
+                print(f"Reused token could not be refreshed ({e}); logging in with credentials.")
+                try:
+                    os.remove(self.pickle_path)
+                except OSError:
+                    pass
+                data = self._password_login()
+        self.expires_at = time.time() + int(data.get("expires_in", self.expires_in))
+        self._save_state()
+
+    def _password_login(self):
+        mfa_code = pyotp.TOTP(mfa_secret).now() if mfa_secret else None
+        data = r.login(username, password, expiresIn=self.expires_in, mfa_code=mfa_code,
+                       pickle_path=os.path.dirname(self.pickle_path))
+        if not data:
+            raise RuntimeError("Robinhood login failed.")
+        return data
+
+    def _refresh_token(self):
+        """Exchanges the persisted refresh token for a new access token and records its expiry."""
+        with open(self.pickle_path, "rb") as f:
+            token = pickle.load(f)
+        data = rh_helper.request_post(login_url(), {
+            'client_id': CLIENT_ID,
+            'expires_in': self.expires_in,
+            'grant_type': 'refresh_token',
+            'refresh_token': token['refresh_token'],
+            'scope': 'internal',
+            'device_token': token['device_token'],
+        })
+        token.update({key: data[key] for key in ('access_token', 'token_type', 'refresh_token')})
+        with open(self.pickle_path, "wb") as f:
+            pickle.dump(token, f)
+        self._apply(token, time.time() + int(data.get('expires_in', self.expires_in)))
+        self._save_state()
+
+    def refresh(self):
+        """
+        Exchanges the persisted refresh token for a new access token, falling back to a
+        full login if that fails.
+        """
+        with self.lock:
+            try:
+                self._refresh_token()
+            except Exception as e:
+                print(f"Token refresh failed ({e}); logging in again.")
+                self._login()
+            self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        delay = max(self.expires_at - self.refresh_margin - time.time(), 1)
+        self.timer = threading.Timer(delay, self.refresh)
+        self.timer.daemon = True
+        self.timer.start()
+
+
+SESSION_MANAGER = SessionManager()
+
+
+def requires_login(func):
+    """Decorator that logs in (lazily, through SESSION_MANAGER) before calling func."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        SESSION_MANAGER.ensure_login()
+        return func(*args, **kwargs)
+    return wrapper
+
+
 def login():
-    """Login to Robinhood account. Each login expires in 1 hour"""
-    r.login(username, password, expiresIn=3600)
-        
+    """Login to Robinhood account, reusing a still-valid session. Each login expires in 1 hour"""
+    SESSION_MANAGER.ensure_login()
+
 
 # Function to get the latest stock price
+@requires_login
 def QUOTE(ticker):
     try:
         price = r.stocks.get_latest_price(ticker)
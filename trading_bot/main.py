@@ -1,66 +1,423 @@
-import login
-import portfolio
-import top_movers
-import helpers
-import q_learning
+"""
+Command-line entry point for the trading bot.
 
-# === Step 1: Login ===
-login.login()
-print("Login Successfully!!! \n Test Stock: AAPL")
-login.QUOTE('aapl')
+    python main.py [--timings] [--record LOG | --replay LOG] [--metrics FILE] {quote,cash,movers,screen,table,recommend,trade,daemon} ...
 
-# === Step 2: Fetch Portfolio and Available Cash ===
-print ("\n=== Portfolio Holdings ===")
-# portfolio_holdings = portfolio.get_portfolio()
-cash_available, buying_power = portfolio.get_cash_available()
-trade_budget = float(cash_available) * 0.2  # Allocate 20% of available cash
+Running without a command performs the full pipeline (same as `trade`). --record LOG and
+--replay LOG capture or replay every external response (see replay.py); --metrics FILE
+records per-endpoint latency, call, error and payload counts plus per-step spans (see metrics.py). Heavy modules
+(pandas, numpy, robin_stocks and the bot's own modules) are imported inside the commands
+that need them, so e.g. `quote` does not pay for pandas.
+"""
+import argparse
+import importlib
+import sys
+import time
 
-print(f"Total Cash Available: ${cash_available}")
-print(f"Trade Budget (20% allocation): ${trade_budget}")
+import metrics
 
-# === Step 3: Get Top Movers in an Industry ===
-industry = "Consumer Durables"  # Change to 'consumer', 'industry', 'sp500'
-top_movers = top_movers.get_top_movers_by_sector(industry)
-print("\nTop 10 Movers in", industry)
-for stock in top_movers:
-    print(f"{stock['symbol']}: {stock['percent_change']}% change")
+START = time.perf_counter()
+TIMINGS = {"imports": 0.0, "first_output": None}
 
-# Extract tickers from the top movers and build the temporary table with additional intervals
-tickers = [stock['symbol'] for stock in top_movers]
-temp_table = helpers.build_temp_table(tickers)
 
-print("\nTemporary Table with Daily, Weekly, Monthly, and Yearly Percent Changes:")
-print(temp_table)
+def lazy_import(name):
+    """Imports a module on first use and adds the time it took to TIMINGS["imports"]."""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    TIMINGS["imports"] += time.perf_counter() - start
+    return module
 
-# === Step 4: Classify Stocks by Risk ===
-risk_tolerance = "High"  # Set as Low, Medium, or High
-classified_stocks = []
-for stock in top_movers:
-    volatility = abs(float(stock["percent_change"]))
-    risk = helpers.classify_risk(volatility)
-    classified_stocks.append({"symbol": stock["symbol"], "risk": risk, "volatility": volatility})
 
-# === Step 5: Filter Stocks Based on Risk Tolerance ===
-filtered_stocks = [s for s in classified_stocks if s["risk"] == risk_tolerance]
-if not filtered_stocks:
-    print(f"No stocks found under {risk_tolerance} risk tolerance. Consider adjusting your threshold.")
-    exit()
+class FirstOutputTimer:
+    """Wraps sys.stdout and records when the first character is written."""
 
-# === Step 6: Use Q-Learning to Choose Stocks to Buy ===
+    def __init__(self, stream):
+        self.stream = stream
 
-# Q-Learning Parameters
-q_learning.alpha = 0.1
-q_learning.gamma = 0.6
-q_learning.epsilon = 0.1
-best_stock, invest_amount = q_learning.q_learning_stock_selection(filtered_stocks, int(trade_budget))
+    def write(self, text):
+        if text and TIMINGS["first_output"] is None:
+            TIMINGS["first_output"] = time.perf_counter() - START
+        return self.stream.write(text)
 
-print(f"\nRecommended Stock to Buy: {best_stock['symbol']}")
-print(f"Investment Amount: ${invest_amount}")
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
 
-# === Step 7: Execute Trade ===
-quantity = invest_amount // float(helpers.get_stock_info(best_stock["symbol"])["last_trade_price"])
-print(f"Buying {quantity} shares of {best_stock['symbol']}")
 
+# === Pipeline steps ===
 
+def get_trade_budget(allocation=0.2):
+    """Step 2: Fetch available cash and allocate a share of it to trading."""
+    portfolio = lazy_import("portfolio")
+    print("\n=== Portfolio Holdings ===")
+    # portfolio_holdings = portfolio.get_portfolio()
+    cash_available, buying_power = portfolio.get_cash_available()
+    trade_budget = float(cash_available) * allocation
 
+    print(f"Total Cash Available: ${cash_available}")
+    print(f"Trade Budget ({allocation:.0%} allocation): ${trade_budget}")
+    return trade_budget
 
+
+def get_movers(sector, universe=None):
+    """Step 3: Get the top movers in a sector (optionally only among `universe`)."""
+    top_movers = lazy_import("top_movers").get_top_movers_by_sector(sector, universe=universe)
+    print("\nTop 10 Movers in", sector)
+    for stock in top_movers:
+        print(f"{stock['symbol']}: {stock['percent_change']}% change")
+    return top_movers
+
+
+def show_temp_table(tickers):
+    """Step 3b: Build the table of day/week/month/year percent changes."""
+    temp_table = lazy_import("helpers").build_temp_table(tickers)
+    print("\nTemporary Table with Daily, Weekly, Monthly, and Yearly Percent Changes:")
+    print(temp_table)
+    return temp_table
+
+
+def filter_by_risk(top_movers, risk_tolerance):
+    """
+    Steps 4-5: Classify the movers by risk and keep those matching the risk tolerance.
+
+    :returns: List of candidate dictionaries (symbol, risk, volatility, price); empty if none match.
+    """
+    indicators = lazy_import("indicators")
+
+    # === Step 4: Classify Stocks by Risk ===
+    volatilities = [abs(float(stock["percent_change"])) for stock in top_movers]
+    risks = indicators.classify_risk(volatilities)
+    classified_stocks = [{"symbol": stock["symbol"], "risk": risk, "volatility": volatility, "price": stock.get("price")}
+                         for stock, risk, volatility in zip(top_movers, risks, volatilities)]
+
+    # === Step 5: Filter Stocks Based on Risk Tolerance ===
+    filtered_stocks = [s for s in classified_stocks if s["risk"] == risk_tolerance]
+    if not filtered_stocks:
+        print(f"No stocks found under {risk_tolerance} risk tolerance. Consider adjusting your threshold.")
+    return filtered_stocks
+
+
+def select_stock(top_movers, trade_budget, risk_tolerance):
+    """
+    Steps 4-6: Classify the movers by risk, keep those matching the risk tolerance and
+    use Q-learning to choose one.
+
+    :returns: (best_stock, invest_amount), or None if no mover matches the risk tolerance.
+    """
+    filtered_stocks = filter_by_risk(top_movers, risk_tolerance)
+    if not filtered_stocks:
+        return None
+
+    # === Step 6: Use Q-Learning to Choose Stocks to Buy ===
+    q_learning = lazy_import("q_learning")
+    best_stock, invest_amount = q_learning.q_learning_stock_selection_vectorized(filtered_stocks, int(trade_budget))
+
+    print(f"\nRecommended Stock to Buy: {best_stock['symbol']}")
+    print(f"Investment Amount: ${invest_amount}")
+    return best_stock, invest_amount
+
+
+def allocate_budget(top_movers, trade_budget, risk_tolerance, method="risk_parity", cap=0.25):
+    """
+    Steps 4-6 with allocator.allocate instead of Q-learning: the budget is spread over every
+    mover matching the risk tolerance, from a year of daily returns (already in BAR_CACHE
+    once the temp table has been built).
+
+    :returns: List of (stock, invest_amount) pairs, largest first; empty if no mover matches.
+    """
+    filtered_stocks = filter_by_risk(top_movers, risk_tolerance)
+    if not filtered_stocks:
+        return []
+
+    # === Step 6: Allocate the Budget Across the Candidates ===
+    allocator = lazy_import("allocator")
+    symbols = [stock["symbol"] for stock in filtered_stocks]
+    returns = allocator.return_matrix(lazy_import("helpers").get_historical_bars(symbols, "day", "year"), symbols)
+    selections = allocator.allocate(filtered_stocks, trade_budget, returns, method, cap)
+
+    invested = sum(stock["weight"] for stock, _ in selections)
+    print(f"\nRecommended Allocation ({method.replace('_', ' ')}, at most {cap:.0%} per stock, "
+          f"{invested:.0%} invested):")
+    for stock, invest_amount in selections:
+        print(f"{stock['symbol']}: ${invest_amount} ({stock['weight']:.1%})")
+    return selections
+
+
+def execute_trades(selections, broker=None):
+    """
+    Step 7: Size the trade of every (stock, invest_amount) selection and, if a broker is given,
+    submit them together through execution.OrderExecutor. The price the movers were fetched
+    with is reused.
+
+    :returns: List of share quantities, one per selection.
+    """
+    decisions, quantities = [], []
+    for best_stock, invest_amount in selections:
+        price = best_stock.get("price")
+        if price is None:
+            price = float(lazy_import("helpers").get_stock_info(best_stock["symbol"])["last_trade_price"])
+        quantity = invest_amount // price
+        print(f"Buying {quantity} shares of {best_stock['symbol']}")
+        quantities.append(quantity)
+        if broker is not None:
+            decisions.append(lazy_import("execution").decision(best_stock["symbol"], invest_amount, price))
+    if decisions:
+        execution = lazy_import("execution")
+        on_fill = lazy_import("portfolio").PORTFOLIO.apply_order if isinstance(broker, execution.RobinhoodBroker) else None
+        executor = execution.OrderExecutor(broker, on_fill=on_fill)
+        for record in executor.execute(decisions):
+            print(f"Order {record['symbol']} {record['id'] or ''} {record['state']}"
+                  + (f": {record['error']}" if record["error"] else ""))
+    return quantities
+
+
+def execute_trade(best_stock, invest_amount, broker=None):
+    """Step 7 for a single recommendation (see execute_trades)."""
+    return execute_trades([(best_stock, invest_amount)], broker)[0]
+
+
+def recommend(args):
+    """
+    Runs the pipeline up to the recommendation.
+
+    :returns: List of (stock, invest_amount) pairs: the Q-learning pick, or with --allocate
+              the allocation across every candidate.
+    """
+    with metrics.span("login"):
+        login = lazy_import("login")
+        login.login()
+        print("Login Successfully!!! \n Test Stock: AAPL")
+        login.QUOTE('aapl')
+
+    with metrics.span("cash"):
+        trade_budget = get_trade_budget(args.allocation)
+    with metrics.span("movers"):
+        top_movers = get_movers(args.sector)
+    with metrics.span("temp_table"):
+        show_temp_table([stock['symbol'] for stock in top_movers])
+    with metrics.span("risk_selection"):
+        if args.allocate:
+            return allocate_budget(top_movers, trade_budget, args.risk, args.allocate, args.cap)
+        selection = select_stock(top_movers, trade_budget, args.risk)
+        return [selection] if selection is not None else []
+
+
+# === Commands ===
+
+def cmd_quote(args):
+    login = lazy_import("login")
+    for symbol in args.symbols:
+        login.QUOTE(symbol)
+
+
+def cmd_cash(args):
+    lazy_import("portfolio").get_cash_available()
+
+
+def parse_bounds(args):
+    """Turns --min/--max FIELD=VALUE options into screener range keyword arguments."""
+    ranges = {}
+    for option, side in (("min", 0), ("max", 1)):
+        for item in getattr(args, option) or []:
+            field, _, value = item.partition("=")
+            if field not in lazy_import("screener").NUMERIC_COLUMNS:
+                raise SystemExit(f"Unknown field '{field}'; choose from: "
+                                 f"{', '.join(lazy_import('screener').NUMERIC_COLUMNS)}")
+            try:
+                number = float(value)
+            except ValueError:
+                raise SystemExit(f"Invalid bound '{item}'; expected FIELD=NUMBER, e.g. {field}=1e9") from None
+            bounds = list(ranges.get(field, (None, None)))
+            bounds[side] = number
+            ranges[field] = tuple(bounds)
+    return ranges
+
+
+def screen_universe(args):
+    """Symbols passing the --min/--max filters, or None if none were given."""
+    ranges = parse_bounds(args)
+    if not ranges:
+        return None
+    store = lazy_import("screener").get_screener()
+    return set(store.symbols_of(store.screen(**ranges)))
+
+
+def cmd_movers(args):
+    universe = screen_universe(args)
+    if args.sector != "all":
+        get_movers(args.sector, universe)
+        return
+    for sector, movers in lazy_import("top_movers").scan_top_movers(universe=universe).items():
+        print(f"\nTop 10 Movers in {sector}")
+        for stock in movers:
+            print(f"{stock['symbol']}: {stock['percent_change']}% change")
+
+
+def cmd_table(args):
+    tickers = args.symbols or [stock['symbol'] for stock in get_movers(args.sector)]
+    show_temp_table(tickers)
+
+
+def cmd_recommend(args):
+    recommend(args)
+
+
+def cmd_trade(args):
+    broker = None
+    if args.submit:
+        broker = lazy_import("execution").RobinhoodBroker()
+    elif args.paper:
+        broker = lazy_import("execution").SimulatedBroker()
+    selections = recommend(args)
+    if selections:
+        with metrics.span("trade"):
+            execute_trades(selections, broker)
+
+
+def cmd_screen(args):
+    screener = lazy_import("screener")
+    if args.top is not None and args.top not in screener.NUMERIC_COLUMNS:
+        raise SystemExit(f"Unknown field '{args.top}'; choose from: {', '.join(screener.NUMERIC_COLUMNS)}")
+    store = screener.get_screener()
+    start = time.perf_counter()
+    rows = store.screen(sector=args.sector, industry=args.industry, platform=args.platform,
+                        top=args.top, k=args.k, ascending=args.ascending, **parse_bounds(args))
+    elapsed = time.perf_counter() - start
+    fields = ["market_cap", "pe_ratio", "dividend_yield", "average_volume", "year_growth", "month_growth"]
+    print(f"{'symbol':<8}{'sector':<24}" + "".join(f"{field:>16}" for field in fields))
+    for record in store.rows_to_dicts(rows):
+        print(f"{record['symbol']:<8}{(record['sector'] or 'N/A')[:23]:<24}"
+              + "".join(f"{record[field]:>16,.2f}" for field in fields))
+    print(f"{len(rows)} matches in {elapsed * 1e6:.0f} us")
+
+
+def cmd_daemon(args):
+    execution = lazy_import("execution")
+    executor = None
+    if args.submit:
+        executor = execution.OrderExecutor(execution.RobinhoodBroker(),
+                                           on_fill=lazy_import("portfolio").PORTFOLIO.apply_order)
+    elif args.paper:
+        executor = execution.OrderExecutor(execution.SimulatedBroker())
+    daemon = lazy_import("daemon").Daemon(args.sector or ["Consumer Durables"], args.risk, args.allocation,
+                                          args.every * 60, not args.ignore_market_hours, executor,
+                                          args.stream or None)
+    daemon.run(args.cycles)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Robinhood trading bot.")
+    parser.add_argument("--timings", action="store_true",
+                        help="Report import time and time to first output on stderr.")
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument("--record", metavar="LOG", help="Append every external response to LOG.")
+    replay.add_argument("--replay", metavar="LOG", help="Answer external calls from LOG without network.")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Record API call and step metrics; written as JSON lines if FILE ends "
+                             "in .jsonl, otherwise in Prometheus text format.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    quote = subparsers.add_parser("quote", help="Print the latest price of one or more symbols.")
+    quote.add_argument("symbols", nargs="+")
+    quote.set_defaults(func=cmd_quote)
+
+    cash = subparsers.add_parser("cash", help="Print available cash and buying power.")
+    cash.set_defaults(func=cmd_cash)
+
+    def add_order_options(sub):
+        orders = sub.add_mutually_exclusive_group()
+        orders.add_argument("--submit", action="store_true", help="Place orders on Robinhood.")
+        orders.add_argument("--paper", action="store_true", help="Place orders with the local simulated broker.")
+
+    def add_pipeline_options(sub):
+        sub.add_argument("--sector", default="Consumer Durables", help="Sector to pick movers from.")
+        sub.add_argument("--risk", default="High", choices=["Low", "Medium", "High"], help="Risk tolerance.")
+        sub.add_argument("--allocation", type=float, default=0.2, help="Share of cash to trade with.")
+        sub.add_argument("--allocate", choices=["risk_parity", "mean_variance"],
+                         help="Spread the budget over every candidate instead of one Q-learning pick.")
+        sub.add_argument("--cap", type=float, default=0.25, help="Largest share of the budget per stock with --allocate.")
+
+    def add_bound_options(sub):
+        sub.add_argument("--min", action="append", metavar="FIELD=VALUE",
+                         help="Lower bound on a stock_stats field, e.g. market_cap=1e9 (repeatable).")
+        sub.add_argument("--max", action="append", metavar="FIELD=VALUE", help="Upper bound (repeatable).")
+
+    movers = subparsers.add_parser("movers", help="Print the top movers of a sector (or 'all').")
+    movers.add_argument("--sector", default="Consumer Durables")
+    add_bound_options(movers)
+    movers.set_defaults(func=cmd_movers)
+
+    screen = subparsers.add_parser("screen", help="Query stock_stats.csv by category, ranges and top-k.")
+    screen.add_argument("--sector", help="Sector as written in stock_stats.csv (e.g. Technology).")
+    screen.add_argument("--industry")
+    screen.add_argument("--platform", choices=["NASDAQ", "NYSE"])
+    add_bound_options(screen)
+    screen.add_argument("--top", help="Field to rank by (e.g. month_growth).")
+    screen.add_argument("-k", type=int, default=20, help="Rows to keep when ranking.")
+    screen.add_argument("--ascending", action="store_true", help="Rank smallest first.")
+    screen.set_defaults(func=cmd_screen)
+
+    table = subparsers.add_parser("table", help="Print percent changes and company details.")
+    table.add_argument("symbols", nargs="*", help="Symbols to include (default: the sector's movers).")
+    table.add_argument("--sector", default="Consumer Durables")
+    table.set_defaults(func=cmd_table)
+
+    for name, func, help_text in (("recommend", cmd_recommend, "Recommend a stock (or an allocation) and investment amount."),
+                                  ("trade", cmd_trade, "Recommend a stock and size the trade.")):
+        sub = subparsers.add_parser(name, help=help_text)
+        add_pipeline_options(sub)
+        if name == "trade":
+            add_order_options(sub)
+        sub.set_defaults(func=func)
+
+    daemon = subparsers.add_parser("daemon", help="Repeat the trade pipeline on a schedule.")
+    daemon.add_argument("--sector", action="append", help="Sector to pick movers from (repeatable).")
+    daemon.add_argument("--risk", default="High", choices=["Low", "Medium", "High"], help="Risk tolerance.")
+    daemon.add_argument("--allocation", type=float, default=0.2, help="Share of cash to trade with per cycle.")
+    daemon.add_argument("--every", type=float, default=5.0, help="Minutes between cycles.")
+    daemon.add_argument("--cycles", type=int, help="Stop after this many cycles.")
+    daemon.add_argument("--ignore-market-hours", action="store_true", help="Also run while the market is closed.")
+    daemon.add_argument("--stream", type=float, default=5.0,
+                        help="Seconds between quote polls of the current movers between cycles (0 to disable).")
+    add_order_options(daemon)
+    daemon.set_defaults(func=cmd_daemon)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(argv + ["trade"])
+    if args.timings:
+        sys.stdout = FirstOutputTimer(sys.stdout)
+    session = None
+    if args.record or args.replay:
+        replay = lazy_import("replay")
+        session = replay.ReplaySession(args.record or args.replay, "record" if args.record else "replay").install()
+    if args.metrics:
+        metrics.install()
+    try:
+        with metrics.span(args.command):
+            args.func(args)
+    finally:
+        if session is not None:
+            session.uninstall()
+        if args.metrics:
+            with open(args.metrics, "w") as f:
+                if args.metrics.endswith(".jsonl"):
+                    metrics.REGISTRY.write_log(f)
+                else:
+                    f.write(metrics.REGISTRY.prometheus())
+        if args.timings:
+            sys.stdout = sys.stdout.stream
+            first_output = TIMINGS["first_output"]
+            print(f"[timings] command={args.command} imports={TIMINGS['imports']:.3f}s "
+                  f"first_output={'n/a' if first_output is None else f'{first_output:.3f}s'} "
+                  f"total={time.perf_counter() - START:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
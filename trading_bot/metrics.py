@@ -0,0 +1,190 @@
+"""
+Instrumentation for external API calls and pipeline steps.
+
+install() routes every call in endpoints.ENDPOINTS through REGISTRY, which records per-endpoint
+call counts, error counts, latency histograms and payload sizes (number of records returned).
+span(name) times a block such as a pipeline step. Nothing is wrapped until install() is
+called, and span() only checks a flag while metrics are disabled, so the overhead of a
+disabled layer is negligible.
+
+Export with REGISTRY.prometheus() (text exposition format) or REGISTRY.write_log(stream)
+(one JSON object per call/span followed by a summary object).
+"""
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import endpoints
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self):
+        running, result = 0, []
+        for bound, count in zip(BUCKETS, self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+def payload_size(result):
+    """Number of records in a response (1 for a single record, 0 for None)."""
+    if result is None:
+        return 0
+    try:
+        return len(result)
+    except TypeError:
+        return 1
+
+
+def is_failure(result):
+    """robin_stocks reports most failures by printing and returning None or [None]."""
+    return result is None or (isinstance(result, list) and len(result) == 1 and result[0] is None)
+
+
+class MetricsRegistry:
+    """Thread-safe store of call and span measurements."""
+
+    def __init__(self, max_events=10000):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.events = deque(maxlen=max_events)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = {}
+            self.errors = {}
+            self.payload = {}
+            self.latency = {}
+            self.spans = {}
+            self.events.clear()
+
+    def call(self, endpoint, args, kwargs, func):
+        """Times func() and records it under `endpoint`; matches the endpoints.install hook."""
+        start = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = func()
+            return result
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            failed = error is not None or is_failure(result)
+            size = payload_size(result)
+            with self.lock:
+                self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + failed
+                self.payload[endpoint] = self.payload.get(endpoint, 0) + size
+                self.latency.setdefault(endpoint, Histogram()).observe(elapsed)
+                self.events.append({"type": "call", "endpoint": endpoint, "seconds": elapsed,
+                                    "items": size, "error": error or ("empty response" if failed else None),
+                                    "time": time.time()})
+
+    @contextmanager
+    def span(self, name):
+        """Times the enclosed block as a named span (a no-op while disabled)."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.spans.setdefault(name, Histogram()).observe(elapsed)
+                self.events.append({"type": "span", "name": name, "seconds": elapsed, "time": time.time()})
+
+    def summary(self):
+        """Returns per-endpoint and per-span totals as a dictionary."""
+        with self.lock:
+            return {
+                "endpoints": {endpoint: {
+                    "calls": self.calls[endpoint],
+                    "errors": self.errors[endpoint],
+                    "items": self.payload[endpoint],
+                    "seconds": self.latency[endpoint].total,
+                } for endpoint in self.calls},
+                "spans": {name: {"count": h.count, "seconds": h.total} for name, h in self.spans.items()},
+            }
+
+    def write_log(self, stream):
+        """Writes every recorded event, then the summary, as JSON lines."""
+        with self.lock:
+            events = list(self.events)
+        for event in events:
+            stream.write(json.dumps(event) + "\n")
+        stream.write(json.dumps({"type": "summary", **self.summary()}) + "\n")
+
+    def prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def histogram(metric, label, histograms):
+            lines.append(f"# TYPE {metric} histogram")
+            for key, h in sorted(histograms.items()):
+                for bound, count in h.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{{label}="{key}",le="{le}"}} {count}')
+                lines.append(f'{metric}_sum{{{label}="{key}"}} {h.total}')
+                lines.append(f'{metric}_count{{{label}="{key}"}} {h.count}')
+
+        with self.lock:
+            for metric, values in (("trading_bot_api_calls_total", self.calls),
+                                   ("trading_bot_api_errors_total", self.errors),
+                                   ("trading_bot_api_payload_items_total", self.payload)):
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f'{metric}{{endpoint="{endpoint}"}} {value}'
+                             for endpoint, value in sorted(values.items()))
+            histogram("trading_bot_api_call_seconds", "endpoint", self.latency)
+            histogram("trading_bot_span_seconds", "span", self.spans)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+_patches = []
+
+
+def install():
+    """Starts recording: wraps every external endpoint and enables spans."""
+    global _patches
+    if not REGISTRY.enabled:
+        _patches = endpoints.install(REGISTRY.call)
+        REGISTRY.enabled = True
+    return REGISTRY
+
+
+def uninstall():
+    """Stops recording and restores the original endpoints."""
+    global _patches
+    endpoints.uninstall(_patches)
+    _patches = []
+    REGISTRY.enabled = False
+
+
+def span(name):
+    """Shortcut for REGISTRY.span(name)."""
+    return REGISTRY.span(name)
@@ -1,22 +1,167 @@
+import threading
+import time
 import robin_stocks.robinhood as rh
+from login import requires_login
+
+
+def _instrument_id(url):
+    """Instrument id at the end of an instrument URL."""
+    return url.rstrip("/").rsplit("/", 1)[-1] if url else None
+
+
+class PortfolioState:
+    """
+    In-memory view of holdings, cash and buying power.
+
+    The account (cash, buying power) is loaded with one load_account_profile call; holdings with
+    one full build_holdings snapshot, which fans out into several requests per position. After
+    that, reads are answered from memory:
+    - apply_fill() updates positions and cash from our own fills;
+    - every `delta_interval` seconds a read refreshes cash from the account profile and
+      quantities from get_open_stock_positions (two requests in total);
+    - every `reconcile_interval` seconds the full snapshot is taken again and any drift is counted.
+
+    :param reconcile_interval: Seconds between full build_holdings snapshots.
+    :param delta_interval: Seconds between cheap account/position refreshes (None disables them).
+    """
+
+    def __init__(self, reconcile_interval=900, delta_interval=60):
+        self.reconcile_interval = reconcile_interval
+        self.delta_interval = delta_interval
+        self.lock = threading.RLock()
+        self.positions = {}      # symbol -> holding dictionary (build_holdings format, numeric quantity/price)
+        self.symbols_by_instrument = {}
+        self._cash = None
+        self._buying_power = None
+        self.account_at = None
+        self.holdings_at = None
+        self.reconciled_at = None
+        self.stats = {"snapshots": 0, "deltas": 0, "account_loads": 0, "fills": 0, "drift": 0}
+
+    def _due(self, last, interval):
+        return last is None or (interval is not None and time.time() - last >= interval)
+
+    # --- loading -----------------------------------------------------------------------
+
+    @requires_login
+    def load_account(self):
+        """Reads cash and buying power from the account profile (one request)."""
+        profile = rh.account.load_account_profile() or {}
+        with self.lock:
+            self._cash = float(profile.get("cash", 0) or 0)
+            self._buying_power = float(profile.get("buying_power", 0) or 0)
+            self.account_at = time.time()
+            self.stats["account_loads"] += 1
+
+    @requires_login
+    def reconcile(self):
+        """Replaces the holdings with a full build_holdings snapshot and counts positions that had drifted."""
+        snapshot = rh.account.build_holdings() or {}
+        positions = {}
+        for symbol, details in snapshot.items():
+            position = dict(details)
+            position["quantity"] = float(details["quantity"])
+            position["average_buy_price"] = float(details["average_buy_price"])
+            positions[symbol] = position
+        with self.lock:
+            if self.reconciled_at is not None:
+                self.stats["drift"] += sum(
+                    1 for symbol in set(positions) | set(self.positions)
+                    if positions.get(symbol, {}).get("quantity", 0) != self.positions.get(symbol, {}).get("quantity", 0))
+            self.positions = positions
+            self.symbols_by_instrument = {details["id"]: symbol for symbol, details in positions.items() if details.get("id")}
+            self.holdings_at = self.reconciled_at = time.time()
+            self.stats["snapshots"] += 1
+
+    @requires_login
+    def refresh_positions(self):
+        """
+        Updates quantities and average prices from get_open_stock_positions (one request).
+        Falls back to reconcile() if a position's instrument is not in the last snapshot.
+        """
+        positions = [item for item in rh.account.get_open_stock_positions() or [] if item]
+        with self.lock:
+            if any(_instrument_id(item.get("instrument")) not in self.symbols_by_instrument for item in positions):
+                return self.reconcile()
+            current = {}
+            for item in positions:
+                symbol = self.symbols_by_instrument[_instrument_id(item["instrument"])]
+                position = self.positions.get(symbol, {"id": _instrument_id(item["instrument"])})
+                position.update(quantity=float(item["quantity"]), average_buy_price=float(item["average_buy_price"]))
+                current[symbol] = position
+            self.positions = current
+            self.holdings_at = time.time()
+            self.stats["deltas"] += 1
+
+    # --- reads -------------------------------------------------------------------------
+
+    @property
+    def cash(self):
+        if self._due(self.account_at, self.delta_interval):
+            self.load_account()
+        return self._cash
+
+    @property
+    def buying_power(self):
+        if self._due(self.account_at, self.delta_interval):
+            self.load_account()
+        return self._buying_power
+
+    @property
+    def holdings(self):
+        """Dictionary of symbol -> holding (quantity, average_buy_price, and snapshot fields)."""
+        if self.holdings_at is None or self._due(self.reconciled_at, self.reconcile_interval):
+            self.reconcile()
+        elif self._due(self.holdings_at, self.delta_interval):
+            self.refresh_positions()
+        return self.positions
+
+    # --- local updates -----------------------------------------------------------------
+
+    def apply_fill(self, symbol, side, quantity, price):
+        """Applies one of our own fills to positions, cash and buying power."""
+        symbol, quantity, price = symbol.upper(), float(quantity), float(price)
+        if quantity <= 0:
+            return
+        signed = quantity if side == "buy" else -quantity
+        with self.lock:
+            position = self.positions.setdefault(symbol, {"quantity": 0.0, "average_buy_price": 0.0})
+            held = position["quantity"]
+            if side == "buy" and held + quantity > 0:
+                position["average_buy_price"] = (held * position["average_buy_price"] + quantity * price) / (held + quantity)
+            position["quantity"] = held + signed
+            if position["quantity"] <= 0:
+                del self.positions[symbol]
+            if self._cash is not None:
+                self._cash -= signed * price
+                self._buying_power -= signed * price
+            self.stats["fills"] += 1
+
+    def apply_order(self, record):
+        """apply_fill for an execution.OrderExecutor order record."""
+        if record.get("filled_quantity") and record.get("average_price") is not None:
+            self.apply_fill(record["symbol"], record.get("side", "buy"), record["filled_quantity"],
+                            record["average_price"])
+
+
+PORTFOLIO = PortfolioState()
 
 
 # Get Portfolio Holdings
 def get_portfolio():
-    portfolio = rh.account.build_holdings()
+    portfolio = PORTFOLIO.holdings
     for stock, details in portfolio.items():
         print(f"Stock: {stock}")
         print(f"  Quantity: {details['quantity']}")
-        print(f"  Equity: ${details['equity']}")
+        print(f"  Equity: ${details.get('equity', 'N/A')}")
         print(f"  Average Buy Price: ${details['average_buy_price']}")
-        print(f"  Percentage Change: {details['percentage']}\n")
+        print(f"  Percentage Change: {details.get('percentage', 'N/A')}\n")
     return portfolio
 
 # Get Available Cash for Trading
 def get_cash_available():
-    profile = rh.account.load_account_profile()
-    cash = profile.get('cash', '0')  # Check if 'cash' key exists
-    buying_power = profile.get('buying_power', '0')
+    cash = PORTFOLIO.cash
+    buying_power = PORTFOLIO.buying_power
     print(f"Cash Available: ${cash}")
     print(f"Buying Power: ${buying_power}")
     return cash, buying_power
@@ -27,3 +27,79 @@ def q_learning_stock_selection(stocks, budget, epochs=1000):
     invest_amount = budget // (best_stock_index + 1) if best_stock_index > 0 else budget
 
     return best_stock, invest_amount
+
+
+def q_learning_stock_selection_vectorized(stocks, budget, epochs=1000, buckets=100, seed=None,
+                                          block_size=100000):
+    """
+    Vectorized, memory-bounded version of q_learning_stock_selection.
+    - stocks: List of stocks with risk & volatility.
+    - budget: Amount available to trade.
+    - epochs: Training iterations.
+    - buckets: Number of budget buckets per stock (the Q-table has buckets + 1 columns
+      instead of one per dollar).
+    - seed: Seed for the random generator; the same seed gives the same result.
+    - block_size: Epochs simulated per NumPy batch, bounding memory for large epoch counts.
+
+    All epochs of a block walk through the stocks together, so the Python loop runs
+    once per stock instead of once per (epoch, stock).
+
+    Returns: (best_stock, invest_amount)
+    """
+    num_stocks = len(stocks)
+    volatility = np.array([stock["volatility"] for stock in stocks], dtype=float) / 100
+    rng = np.random.default_rng(seed)
+    Q_table = np.zeros((num_stocks, buckets + 1))
+    scale = max(budget, 1)
+
+    for start in range(0, epochs, block_size):
+        state = np.full(min(block_size, epochs - start), budget, dtype=np.int64)  # Start with full budget
+        for i in range(num_stocks):
+            action = (rng.random(state.size) * (state + 1)).astype(np.int64)  # Uniform in [0, state]
+            reward = action * volatility[i]  # Simulate profit potential
+            np.maximum.at(Q_table[i], state * buckets // scale, reward)
+            state -= action  # Reduce available budget
+
+    best_stock_index = int(np.argmax(Q_table[:, buckets]))
+    best_stock = stocks[best_stock_index]
+    invest_amount = budget // (best_stock_index + 1) if best_stock_index > 0 else budget
+
+    return best_stock, invest_amount
+
+
+def benchmark(num_stocks=20, budget=50000, epochs=1000, seed=0):
+    """
+    Compares wall time and peak traced memory of q_learning_stock_selection and
+    q_learning_stock_selection_vectorized on the same synthetic candidates.
+
+    Returns: Dictionary of {function name: (seconds, peak bytes)}.
+    """
+    import contextlib
+    import io
+    import time
+    import tracemalloc
+
+    rng = np.random.default_rng(seed)
+    stocks = [{"symbol": f"S{i}", "risk": "High", "volatility": float(v)}
+              for i, v in enumerate(rng.uniform(5, 15, num_stocks))]
+    random.seed(seed)
+
+    results = {}
+    for func in (q_learning_stock_selection, q_learning_stock_selection_vectorized):
+        kwargs = {"seed": seed} if func is q_learning_stock_selection_vectorized else {}
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(stocks, budget, epochs=epochs, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[func.__name__] = (elapsed, peak)
+        print(f"{func.__name__}: {elapsed * 1000:.1f} ms, peak {peak / 1e6:.2f} MB "
+              f"({num_stocks} stocks, ${budget} budget, {epochs} epochs)")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
+    benchmark(num_stocks=200, budget=500000)
@@ -0,0 +1,192 @@
+import asyncio
+import time
+import numpy as np
+import robin_stocks.robinhood as rh
+from login import requires_login
+
+
+@requires_login
+def fetch_quotes(symbols):
+    """Fetches quotes for many symbols with one get_quotes call."""
+    return [quote for quote in rh.stocks.get_quotes(symbols) or [] if quote]
+
+
+class TickRing:
+    """
+    Fixed-size ring buffer of (time, price) ticks for a fixed set of symbols.
+    All symbols share two (num_symbols, capacity) float arrays; writing a tick is O(1).
+    """
+
+    def __init__(self, num_symbols, capacity=390):
+        self.capacity = capacity
+        self.times = np.zeros((num_symbols, capacity))
+        self.prices = np.full((num_symbols, capacity), np.nan)
+        self.heads = np.zeros(num_symbols, dtype=np.int64)   # next slot to write
+        self.counts = np.zeros(num_symbols, dtype=np.int64)
+
+    def push(self, row, timestamp, price):
+        head = self.heads[row]
+        self.times[row, head] = timestamp
+        self.prices[row, head] = price
+        self.heads[row] = (head + 1) % self.capacity
+        self.counts[row] = min(self.counts[row] + 1, self.capacity)
+
+    def last(self, row):
+        """Returns the latest price of a row, or NaN if it has no ticks."""
+        if self.counts[row] == 0:
+            return np.nan
+        return self.prices[row, self.heads[row] - 1]
+
+    def prices_of(self, row):
+        """Returns the stored prices of a row, oldest first."""
+        count, head = self.counts[row], self.heads[row]
+        if count < self.capacity:
+            return self.prices[row, :count]
+        return np.concatenate([self.prices[row, head:], self.prices[row, :head]])
+
+
+class QuoteStreamer:
+    """
+    Long-running asyncio poller for a watchlist.
+
+    Each cycle requests quotes for up to `batch_size` symbols per call (batches run
+    concurrently in worker threads), keeps only ticks whose price or timestamp changed, stores
+    them in a TickRing and hands them to subscribers. If `cache` is given (e.g.
+    helpers.get_ref_cache()), every fetched quote is also written into it for two polling
+    intervals, so get_stock_info and get_quote_percent_change are answered from memory while
+    the streamer runs, even when the quote TTL is shorter than the interval.
+
+    :param symbols: Watchlist of ticker symbols.
+    :param interval: Seconds between polling cycles.
+    :param batch_size: Symbols per get_quotes call.
+    :param capacity: Ticks kept per symbol.
+    :param fetch: Callable fetch(symbols) returning a list of quote dictionaries.
+    :param cache: (Optional) TTLCache to publish quotes into.
+    """
+
+    def __init__(self, symbols, interval=5.0, batch_size=100, capacity=390, fetch=fetch_quotes, cache=None):
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.interval = interval
+        self.batch_size = batch_size
+        self.fetch = fetch
+        self.cache = cache
+        self.cache_ttl = 2 * interval
+        self.ticks = TickRing(len(self.symbols), capacity)
+        self.previous_close = np.full(len(self.symbols), np.nan)
+        self.updated_at = [None] * len(self.symbols)
+        self.subscribers = []
+        self.polls = 0
+        self.requests = 0
+
+    def subscribe(self):
+        """Returns a queue that receives, per cycle, the list of changed (symbol, time, price) ticks."""
+        queue = asyncio.Queue()
+        self.subscribers.append(queue)
+        return queue
+
+    def _apply(self, quotes, now):
+        changed = []
+        for quote in quotes:
+            row = self.rows.get(quote.get("symbol"))
+            if row is None:
+                continue
+            if self.cache is not None:
+                self.cache.set("quote", quote["symbol"], quote, self.cache_ttl)
+            try:
+                price = float(quote.get("last_trade_price"))
+                self.previous_close[row] = float(quote.get("previous_close"))
+            except (TypeError, ValueError):
+                continue
+            if price == self.ticks.last(row) and quote.get("updated_at") == self.updated_at[row]:
+                continue
+            self.updated_at[row] = quote.get("updated_at")
+            self.ticks.push(row, now, price)
+            changed.append((quote["symbol"], now, price))
+        return changed
+
+    async def poll_once(self):
+        """Runs one polling cycle and returns the changed ticks."""
+        batches = [self.symbols[i:i + self.batch_size] for i in range(0, len(self.symbols), self.batch_size)]
+        results = await asyncio.gather(*(asyncio.to_thread(self.fetch, batch) for batch in batches),
+                                       return_exceptions=True)
+        self.polls += 1
+        self.requests += len(batches)
+        now = time.time()
+        changed = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                print(f"Error fetching quotes for {len(batch)} symbols: {result}")
+                continue
+            changed.extend(self._apply(result, now))
+        if changed:
+            for queue in self.subscribers:
+                queue.put_nowait(changed)
+        return changed
+
+    async def run(self, stop=None, cycles=None):
+        """
+        Polls every `interval` seconds until `stop` (an asyncio.Event) is set or `cycles`
+        cycles have run.
+        """
+        done = 0
+        while (stop is None or not stop.is_set()) and (cycles is None or done < cycles):
+            started = time.monotonic()
+            await self.poll_once()
+            done += 1
+            if cycles is not None and done >= cycles:
+                break
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    # --- reads from local memory -----------------------------------------------------
+
+    def last_price(self, symbol):
+        """Latest streamed price, or None if no tick has arrived yet."""
+        price = self.ticks.last(self.rows[symbol.upper()])
+        return None if np.isnan(price) else float(price)
+
+    def percent_change(self, symbol):
+        """Percent change of the latest price against the previous close, or None."""
+        row = self.rows[symbol.upper()]
+        price, previous = self.ticks.last(row), self.previous_close[row]
+        if np.isnan(price) or np.isnan(previous) or previous == 0:
+            return None
+        return float((price - previous) / previous * 100)
+
+    def volatility(self, symbol):
+        """
+        Intraday volatility: standard deviation (in percent) of the tick-to-tick log returns
+        held in the buffer, or None with fewer than three ticks.
+        """
+        prices = self.ticks.prices_of(self.rows[symbol.upper()])
+        if len(prices) < 3:
+            return None
+        return float(np.std(np.diff(np.log(prices)), ddof=1) * 100)
+
+
+if __name__ == "__main__":
+    import argparse
+    import helpers
+
+    parser = argparse.ArgumentParser(description="Stream quotes for a watchlist.")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--cycles", type=int, default=None)
+    args = parser.parse_args()
+
+    async def main():
+        streamer = QuoteStreamer(args.symbols, interval=args.interval, cache=helpers.get_ref_cache())
+        queue = streamer.subscribe()
+
+        async def printer():
+            while True:
+                for symbol, _, price in await queue.get():
+                    change = streamer.percent_change(symbol)
+                    print(f"{symbol}: ${price:.2f} ({change:+.2f}%)" if change is not None else f"{symbol}: ${price:.2f}")
+
+        task = asyncio.create_task(printer())
+        await streamer.run(cycles=args.cycles)
+        await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(main())
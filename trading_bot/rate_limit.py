@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    Tokens refill continuously at `rate` per second up to `capacity`; acquire() blocks
+    until enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Consumes `tokens` tokens if they are available without blocking.
+
+        :returns: 0.0 if the tokens were taken, otherwise the seconds until they will be.
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` tokens are available, then consumes them."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Waits (without blocking the event loop) until `tokens` tokens are available, then consumes them."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+def retry(func, attempts=3, backoff=1.0, limiter=None, exceptions=(Exception,)):
+    """
+    Calls func() and retries it with exponential backoff if it raises.
+
+    :param func: Zero-argument callable to run.
+    :param attempts: Total number of tries before the last exception is re-raised.
+    :param backoff: Delay in seconds before the first retry; doubled on each further retry.
+    :param limiter: (Optional) TokenBucket to acquire a token from before every try.
+    :param exceptions: Exception types that trigger a retry.
+    :returns: Whatever func() returns.
+    """
+    for attempt in range(attempts):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func()
+        except exceptions:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(backoff * 2 ** attempt)
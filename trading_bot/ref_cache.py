@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds each kind of reference data stays valid.
+DEFAULT_TTLS = {
+    "quote": 5,
+    "fundamentals": 86400,
+    "instrument": 86400,
+}
+
+# Kinds written through to the on-disk tier; short-lived data stays in memory only.
+DEFAULT_DISK_KINDS = ("fundamentals", "instrument")
+
+DEFAULT_DISK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ref_cache.sqlite")
+
+
+class TTLCache:
+    """
+    In-memory LRU cache with a per-kind TTL and an optional SQLite tier that survives restarts.
+
+    Entries are keyed by (kind, key). A memory miss falls through to disk (for the disk kinds)
+    and a disk hit is promoted back into memory. Expired disk rows are deleted when the
+    database is opened and then every `purge_interval` seconds (checked on writes). Counters in
+    self.stats track hits, misses, disk hits, expirations, LRU evictions and purged rows.
+    """
+
+    def __init__(self, max_entries=10000, ttls=None, disk_path=None, disk_kinds=DEFAULT_DISK_KINDS,
+                 purge_interval=3600):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.disk_kinds = set(disk_kinds)
+        self.purge_interval = purge_interval
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        self.purged_at = 0.0
+        self.reset_stats()
+        if disk_path:
+            self.db = sqlite3.connect(disk_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS entries "
+                            "(kind TEXT, key TEXT, expires REAL, value TEXT, PRIMARY KEY (kind, key))")
+            self.db.commit()
+            self.purge()
+
+    def reset_stats(self):
+        """Resets the hit/miss/eviction counters."""
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0, "expired": 0, "evictions": 0, "purged": 0}
+
+    def purge(self):
+        """Deletes expired rows from the disk tier and returns how many were deleted."""
+        if self.db is None:
+            return 0
+        with self.lock:
+            return self._purge(time.time())
+
+    def _purge(self, now):
+        deleted = self.db.execute("DELETE FROM entries WHERE expires <= ?", (now,)).rowcount
+        self.db.commit()
+        self.purged_at = now
+        self.stats["purged"] += deleted
+        return deleted
+
+    def get(self, kind, key):
+        """Returns the cached value, or None if it is missing or expired."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get((kind, key))
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self.entries.move_to_end((kind, key))
+                    self.stats["hits"] += 1
+                    return value
+                del self.entries[(kind, key)]
+                self.stats["expired"] += 1
+            if self.db is not None and kind in self.disk_kinds:
+                row = self.db.execute("SELECT expires, value FROM entries WHERE kind = ? AND key = ?",
+                                      (kind, key)).fetchone()
+                if row is not None and row[0] > now:
+                    value = json.loads(row[1])
+                    self._store(kind, key, row[0], value)
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    return value
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, kind, key, value, ttl=None):
+        """Stores a value under `ttl` seconds, or the TTL configured for its kind."""
+        now = time.time()
+        expires = now + (self.ttls[kind] if ttl is None else ttl)
+        with self.lock:
+            self._store(kind, key, expires, value)
+            if self.db is not None and kind in self.disk_kinds:
+                self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                                (kind, key, expires, json.dumps(value)))
+                self.db.commit()
+                if now - self.purged_at >= self.purge_interval:
+                    self._purge(now)
+
+    def _store(self, kind, key, expires, value):
+        self.entries[(kind, key)] = (expires, value)
+        self.entries.move_to_end((kind, key))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_many(self, kind, keys, fetch):
+        """
+        Read-through lookup for several keys at once.
+
+        :param kind: One of the kinds in self.ttls (e.g., "quote").
+        :param keys: Keys to look up.
+        :param fetch: Callable fetch(missing_keys) returning a dict of key -> value; called once,
+                      and only if some keys are missing or expired.
+        :returns: Dict of key -> value for every key that was cached or fetched.
+        """
+        found, missing = {}, []
+        for key in keys:
+            value = self.get(kind, key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            for key, value in fetch(missing).items():
+                self.set(kind, key, value)
+                found[key] = value
+        return found
+
+    def clear(self):
+        """Drops every entry from memory and disk."""
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM entries")
+                self.db.commit()
@@ -0,0 +1,227 @@
+"""
+Record/replay of every external response the bot receives.
+
+In record mode each Robinhood, yfinance and NASDAQ Trader call goes to the real endpoint and
+its response is appended to a log file. In replay mode the same calls are answered from the
+log without touching the network; a call that was never recorded raises ReplayMissError.
+
+Log format: a sequence of records, each a little-endian header (key length: uint16, payload
+length: uint32), the UTF-8 key ("<endpoint>|<repr of arguments>") and a zlib-compressed pickle
+of ("ok", value) or ("error", exception). Opening a log scans only the headers to build a
+key -> offsets index; payloads are decoded from a memory map on first use.
+
+Which calls the bot makes depends on local state, so a session isolates it in both modes:
+helpers.BAR_CACHE and helpers.REF_CACHE are swapped for empty scratch caches, and
+bar_cache.DEFAULT_CACHE_DIR points at the scratch directory so any BarCache created with the
+default directory (e.g. by StockStatsFetcher) is scratch too. Everything is restored on
+uninstall, so the production caches neither feed the session nor receive replayed data.
+Recording stores its start time in the log, and during replay the clocks of helpers, bar_cache
+and ref_cache run that far behind, so spans and TTLs are computed as they were when recording.
+Replay also skips login entirely: there is no token, and nothing is written next to the real one.
+"""
+import importlib
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+import endpoints
+
+HEADER = struct.Struct("<HI")
+
+# Authentication calls: their arguments (credentials, one-time codes) are left out of the key
+# and their responses (tokens) are not written to the log; they replay as None.
+PRIVATE_ENDPOINTS = {
+    "robin_stocks.robinhood.login",
+    "robin_stocks.robinhood.helper.request_post",
+}
+
+
+# Log key of the recording's start time (seconds since the epoch).
+CLOCK_KEY = "__clock__"
+
+# Modules whose time.time() decides what is fetched (spans, bar staleness, cache TTLs).
+CLOCK_MODULES = ("helpers", "bar_cache", "ref_cache")
+
+
+class ReplayMissError(KeyError):
+    """Raised in replay mode for a call that is not in the log."""
+
+
+class ShiftedClock:
+    """Stand-in for the time module whose time() runs `offset` seconds behind the real clock."""
+
+    def __init__(self, offset):
+        self.offset = offset
+
+    def time(self):
+        return time.time() - self.offset
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class OfflineSession:
+    """Stands in for login.SESSION_MANAGER during replay, where there is nothing to log in to."""
+
+    def ensure_login(self):
+        pass
+
+
+class ReplayLog:
+    """Append-only response log with an in-memory key -> offsets index."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self.decoded = {}
+        self.map = None
+        self.lock = threading.Lock()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._load_index()
+
+    def _load_index(self):
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset, size = 0, len(self.map)
+        while offset + HEADER.size <= size:
+            key_len, payload_len = HEADER.unpack_from(self.map, offset)
+            key_start = offset + HEADER.size
+            payload_start = key_start + key_len
+            if payload_start + payload_len > size:
+                break  # Truncated last record from an interrupted recording.
+            key = self.map[key_start:payload_start].decode()
+            self.index.setdefault(key, []).append((payload_start, payload_len))
+            offset = payload_start + payload_len
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self.index.values())
+
+    def append(self, key, outcome):
+        """Appends one response record and flushes it to disk."""
+        key_bytes = key.encode()
+        try:
+            data = pickle.dumps(outcome, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            if outcome[0] != "error":
+                raise
+            data = pickle.dumps(("error", RuntimeError(repr(outcome[1]))), protocol=pickle.HIGHEST_PROTOCOL)
+        payload = zlib.compress(data)
+        with self.lock:
+            with open(self.path, "ab") as f:
+                f.write(HEADER.pack(len(key_bytes), len(payload)) + key_bytes + payload)
+
+    def get(self, key, occurrence):
+        """
+        Returns the recorded outcome of the `occurrence`-th call with this key. Calls beyond
+        the number recorded get the last recording again.
+        """
+        offsets = self.index.get(key)
+        if not offsets:
+            raise ReplayMissError(key)
+        position = offsets[min(occurrence, len(offsets) - 1)]
+        outcome = self.decoded.get(position)
+        if outcome is None:
+            start, length = position
+            outcome = pickle.loads(zlib.decompress(self.map[start:start + length]))
+            self.decoded[position] = outcome
+        return outcome
+
+
+class ReplaySession:
+    """
+    Routes external calls through a ReplayLog.
+
+    :param path: Log file.
+    :param mode: "record" (call the endpoint and append the response) or "replay"
+                 (answer from the log only).
+    """
+
+    def __init__(self, path, mode="replay"):
+        if mode not in ("record", "replay"):
+            raise ValueError("mode must be 'record' or 'replay'")
+        self.mode = mode
+        self.log = ReplayLog(path)
+        self.occurrences = {}
+        self.lock = threading.Lock()
+        self.patches = []
+        self.saved = []
+        self.scratch_dir = None
+
+    @staticmethod
+    def key(endpoint, args, kwargs):
+        return f"{endpoint}|{args!r}|{sorted(kwargs.items())!r}"
+
+    def call(self, endpoint, args, kwargs, func):
+        """Records or replays one call of `endpoint`; func() performs the real call."""
+        private = endpoint in PRIVATE_ENDPOINTS
+        key = endpoint if private else self.key(endpoint, args, kwargs)
+        with self.lock:
+            occurrence = self.occurrences.get(key, 0)
+            self.occurrences[key] = occurrence + 1
+        if self.mode == "replay":
+            status, value = self.log.get(key, occurrence)
+            if status == "error":
+                raise value
+            return value
+        try:
+            value = func()
+        except Exception as e:
+            self.log.append(key, ("error", e))
+            raise
+        self.log.append(key, ("ok", None if private else value))
+        return value
+
+    def install(self):
+        """
+        Routes every endpoint in endpoints.ENDPOINTS (and yfinance.Ticker) through this session
+        and isolates the caches, clock and login state (see the module docstring).
+        """
+        import bar_cache
+        import helpers
+        import login
+        import ref_cache
+
+        self.scratch_dir = tempfile.mkdtemp(prefix="replay-")
+        self._swap(bar_cache, "DEFAULT_CACHE_DIR", os.path.join(self.scratch_dir, "bars"))
+        self._swap(helpers, "BAR_CACHE", bar_cache.BarCache())
+        self._swap(helpers, "REF_CACHE", ref_cache.TTLCache())
+        if self.mode == "record":
+            self.log.append(CLOCK_KEY, ("ok", time.time()))
+        else:
+            self._swap(login, "SESSION_MANAGER", OfflineSession())
+            try:
+                status, started = self.log.get(CLOCK_KEY, 0)
+            except ReplayMissError:
+                started = None
+            if started is not None:
+                clock = ShiftedClock(time.time() - started)
+                for name in CLOCK_MODULES:
+                    self._swap(importlib.import_module(name), "time", clock)
+        self.patches = endpoints.install(self.call)
+        return self
+
+    def _swap(self, module, name, value):
+        self.saved.append((module, name, getattr(module, name)))
+        setattr(module, name, value)
+
+    def uninstall(self):
+        """Restores the original endpoints, caches, clock and session manager."""
+        endpoints.uninstall(self.patches)
+        self.patches = []
+        for module, name, value in reversed(self.saved):
+            setattr(module, name, value)
+        self.saved = []
+        if self.scratch_dir is not None:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+            self.scratch_dir = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
@@ -0,0 +1,257 @@
+"""
+Indexed screening over stock_stats.csv.
+
+The CSV is parsed once into a columnar StatsStore (float64 arrays for the numeric columns, int16
+codes for sector/industry/platform) and cached next to it as a .npz file, which is reused until
+the CSV changes. Every numeric column gets a sorted index, so a compound query such as
+
+    get_screener().screen(sector="Technology", market_cap=(1e9, None), top="month_growth", k=20)
+
+narrows to the most selective range with a binary search, checks the remaining filters on
+that slice only and ranks the survivors with a partial sort.
+"""
+import csv
+import os
+import time
+import numpy as np
+from sector_index import STATS_CSV, parse_number
+
+# Query name -> stock_stats.csv column of every numeric field.
+NUMERIC_COLUMNS = {
+    "market_cap": "Market Cap",
+    "pe_ratio": "PE Ratio",
+    "dividend_yield": "Dividend Yield",
+    "average_volume": "Average Volume",
+    "closing_price": "Closing Price",
+    "year_growth": "Year Growth (%)",
+    "month_growth": "Month Growth (%)",
+}
+
+# Query name -> stock_stats.csv column of every categorical field.
+CATEGORY_COLUMNS = {
+    "sector": "Sector",
+    "industry": "Industry",
+    "platform": "Platform",
+}
+
+
+def cache_path(stats_csv):
+    return stats_csv + ".npz"
+
+
+class StatsStore:
+    """
+    Typed columnar copy of stock_stats.csv with a sorted index per numeric column.
+
+    :param symbols: Array of ticker symbols (one row each).
+    :param numeric: Dictionary of NUMERIC_COLUMNS name -> float array (NaN when missing).
+    :param codes: Dictionary of CATEGORY_COLUMNS name -> int16 code array (-1 when missing).
+    :param names: Dictionary of CATEGORY_COLUMNS name -> list of the names the codes refer to.
+    """
+
+    def __init__(self, symbols, numeric, codes, names):
+        self.symbols = np.asarray(symbols)
+        self.numeric = numeric
+        self.codes = codes
+        self.names = names
+        self.code_of = {field: {name: i for i, name in enumerate(table)} for field, table in names.items()}
+        # NaNs sort last; `valid[field]` is the number of non-NaN values at the front of the index.
+        self.order = {field: np.argsort(values, kind="stable").astype(np.int32) for field, values in numeric.items()}
+        self.sorted = {field: values[self.order[field]] for field, values in numeric.items()}
+        self.valid = {field: int(np.count_nonzero(~np.isnan(values))) for field, values in numeric.items()}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @classmethod
+    def from_csv(cls, stats_csv=STATS_CSV):
+        """Parses stock_stats.csv (formatted numbers such as " 5,507,721,216 " included)."""
+        symbols, numeric, codes = [], {field: [] for field in NUMERIC_COLUMNS}, {field: [] for field in CATEGORY_COLUMNS}
+        tables = {field: {} for field in CATEGORY_COLUMNS}
+        with open(stats_csv, newline="") as f:
+            for row in csv.DictReader(f):
+                symbols.append(row["Ticker"])
+                for field, column in NUMERIC_COLUMNS.items():
+                    numeric[field].append(parse_number(row.get(column, "")))
+                for field, column in CATEGORY_COLUMNS.items():
+                    value = row.get(column) or ""
+                    codes[field].append(-1 if value in ("", "N/A") else tables[field].setdefault(value, len(tables[field])))
+        return cls(np.array(symbols, dtype=str),
+                   {field: np.array(values, dtype=float) for field, values in numeric.items()},
+                   {field: np.array(values, dtype=np.int16) for field, values in codes.items()},
+                   {field: list(table) for field, table in tables.items()})
+
+    def save(self, path, source=None):
+        """Writes the store to a .npz file, tagged with the (size, mtime) of its source CSV."""
+        arrays = {"symbols": self.symbols, "source": np.array(source or (0, 0), dtype=np.int64)}
+        arrays.update({f"num_{field}": values for field, values in self.numeric.items()})
+        arrays.update({f"code_{field}": values for field, values in self.codes.items()})
+        arrays.update({f"names_{field}": np.array(names, dtype=str) for field, names in self.names.items()})
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, source=None):
+        """Reads a store written by save(); returns None if it is missing, unreadable or stale."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if source is not None and tuple(data["source"]) != tuple(source):
+                    return None
+                return cls(data["symbols"],
+                           {field: data[f"num_{field}"] for field in NUMERIC_COLUMNS},
+                           {field: data[f"code_{field}"] for field in CATEGORY_COLUMNS},
+                           {field: data[f"names_{field}"].tolist() for field in CATEGORY_COLUMNS})
+        except (OSError, KeyError, ValueError):
+            return None
+
+    @classmethod
+    def open(cls, stats_csv=STATS_CSV):
+        """Returns the store for a stats CSV, from its .npz cache when that is up to date."""
+        stat = os.stat(stats_csv)
+        source = (stat.st_size, stat.st_mtime_ns)
+        store = cls.load(cache_path(stats_csv), source)
+        if store is None:
+            store = cls.from_csv(stats_csv)
+            store.save(cache_path(stats_csv), source)
+        return store
+
+    # --- queries -----------------------------------------------------------------------
+
+    def range_rows(self, field, low=None, high=None):
+        """Rows with low <= field <= high (either bound may be None), from the sorted index."""
+        values = self.sorted[field][:self.valid[field]]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        stop = len(values) if high is None else np.searchsorted(values, high, side="right")
+        return self.order[field][start:stop]
+
+    def screen(self, sector=None, industry=None, platform=None, top=None, k=20, ascending=False, **ranges):
+        """
+        Runs a compound query.
+
+        :param sector, industry, platform: (Optional) Exact category values to keep.
+        :param top: (Optional) Numeric field to rank by; rows where it is missing are dropped.
+        :param k: Number of rows to return when ranking.
+        :param ascending: Rank the smallest values first instead of the largest.
+        :param ranges: Numeric field -> (low, high) bounds, inclusive; None leaves a side open.
+        :returns: Array of row numbers (ranked when `top` is given). See rows_to_dicts/symbols_of.
+        """
+        unknown = set(ranges) - set(NUMERIC_COLUMNS)
+        if unknown or (top is not None and top not in NUMERIC_COLUMNS):
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown or {top}))}")
+
+        categories = {field: value for field, value in
+                      (("sector", sector), ("industry", industry), ("platform", platform)) if value is not None}
+        for field, value in categories.items():
+            if value not in self.code_of[field]:
+                return np.empty(0, dtype=np.int32)
+
+        # Start from the narrowest range and check everything else on that slice only.
+        slices = {field: self.range_rows(field, *bounds) for field, bounds in ranges.items()}
+        if slices:
+            narrowest = min(slices, key=lambda field: len(slices[field]))
+            rows = slices.pop(narrowest)
+        else:
+            rows = np.arange(len(self), dtype=np.int32)
+        mask = np.ones(len(rows), dtype=bool)
+        for field, value in categories.items():
+            mask &= self.codes[field][rows] == self.code_of[field][value]
+        for field, (low, high) in ((field, ranges[field]) for field in slices):
+            values = self.numeric[field][rows]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        if top is not None:
+            mask &= ~np.isnan(self.numeric[top][rows])
+        rows = rows[mask]
+
+        if top is None:
+            return np.sort(rows)
+        values = self.numeric[top][rows]
+        if not ascending:
+            values = -values
+        if len(rows) > k:
+            keep = np.argpartition(values, k - 1)[:k]
+            rows, values = rows[keep], values[keep]
+        return rows[np.argsort(values, kind="stable")]
+
+    def symbols_of(self, rows):
+        return self.symbols[rows].tolist()
+
+    def rows_to_dicts(self, rows):
+        """Returns one dictionary per row with the symbol, categories and numeric fields."""
+        result = []
+        for row in rows:
+            record = {"symbol": str(self.symbols[row])}
+            for field in CATEGORY_COLUMNS:
+                code = self.codes[field][row]
+                record[field] = self.names[field][code] if code >= 0 else None
+            record.update({field: float(values[row]) for field, values in self.numeric.items()})
+            result.append(record)
+        return result
+
+
+# Absolute stats CSV path -> ((size, mtime) of the CSV when opened, StatsStore).
+_SCREENERS = {}
+
+
+def get_screener(stats_csv=STATS_CSV):
+    """
+    Returns the shared StatsStore of a stats file, opening it on first use and again whenever
+    the file's (size, mtime) changes.
+    """
+    path = os.path.abspath(stats_csv)
+    stat = os.stat(path)
+    source = (stat.st_size, stat.st_mtime_ns)
+    cached = _SCREENERS.get(path)
+    if cached is None or cached[0] != source:
+        cached = _SCREENERS[path] = (source, StatsStore.open(path))
+    return cached[1]
+
+
+def synthetic_store(num_symbols=7700, seed=0):
+    """Random store shaped like the full NASDAQ/NYSE universe, for benchmarking."""
+    rng = np.random.default_rng(seed)
+    numeric = {
+        "market_cap": np.exp(rng.normal(21, 2.5, num_symbols)),
+        "pe_ratio": np.where(rng.random(num_symbols) < 0.3, np.nan, rng.lognormal(3, 0.7, num_symbols)),
+        "dividend_yield": np.where(rng.random(num_symbols) < 0.6, np.nan, rng.uniform(0, 8, num_symbols)),
+        "average_volume": np.exp(rng.normal(13, 2, num_symbols)),
+        "closing_price": rng.lognormal(3.5, 1.2, num_symbols),
+        "year_growth": rng.normal(5, 40, num_symbols),
+        "month_growth": rng.normal(0, 10, num_symbols),
+    }
+    sectors = ["Technology", "Healthcare", "Financial Services", "Industrials", "Consumer Cyclical",
+               "Energy", "Utilities", "Real Estate", "Basic Materials", "Communication Services", "Consumer Defensive"]
+    codes = {
+        "sector": rng.integers(0, len(sectors), num_symbols).astype(np.int16),
+        "industry": rng.integers(0, 140, num_symbols).astype(np.int16),
+        "platform": rng.integers(0, 2, num_symbols).astype(np.int16),
+    }
+    names = {"sector": sectors, "industry": [f"Industry {i}" for i in range(140)], "platform": ["NASDAQ", "NYSE"]}
+    return StatsStore(np.array([f"SYM{i:04d}" for i in range(num_symbols)]), numeric, codes, names)
+
+
+def benchmark(num_symbols=7700, repeat=1000, seed=0):
+    """Times a few compound queries on a synthetic universe and prints microseconds per query."""
+    store = synthetic_store(num_symbols, seed)
+    queries = {
+        "Technology, cap > 1B, month growth top 20":
+            dict(sector="Technology", market_cap=(1e9, None), top="month_growth", k=20),
+        "PE 5-15, dividend >= 3%":
+            dict(pe_ratio=(5, 15), dividend_yield=(3, None)),
+        "volume > 1M, year growth top 50":
+            dict(average_volume=(1e6, None), top="year_growth", k=50),
+    }
+    for name, query in queries.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rows = store.screen(**query)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{name}: {len(rows)} rows in {elapsed * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,154 @@
+import csv
+import os
+import sys
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATS_CSV = os.path.join(BASE_DIR, "stock_stats.csv")
+LISTING_CSV = os.path.join(BASE_DIR, "nasdaq_nyse_listed_stocks.csv")
+
+
+def parse_number(value):
+    """
+    Parses a number as written in stock_stats.csv (e.g. " 5,507,721,216 ").
+
+    :returns: The value as a float, or NaN if it is empty or not numeric.
+    """
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return np.nan
+
+
+class SectorIndex:
+    """
+    In-memory index of the local universe files.
+
+    Each symbol (interned) gets a row; sector, industry and platform are stored as small
+    integer codes into per-column name tables, and the numeric stats as float arrays.
+    Symbols that appear only in the listing file have a platform but no sector.
+    """
+
+    def __init__(self):
+        self.symbols = []
+        self.rows = {}
+        self.sector_names = []
+        self.industry_names = []
+        self.platform_names = []
+        self.company_names = []
+        codes = np.empty(0, dtype=np.int16)
+        self.sector_codes = codes
+        self.industry_codes = codes
+        self.platform_codes = codes
+        self.market_caps = np.empty(0)
+        self.pe_ratios = np.empty(0)
+        self.average_volumes = np.empty(0)
+        self.sector_rows = {}
+
+    @classmethod
+    def load(cls, stats_csv=STATS_CSV, listing_csv=LISTING_CSV):
+        """
+        Builds the index from stock_stats.csv and nasdaq_nyse_listed_stocks.csv.
+        Missing files are skipped.
+        """
+        index = cls()
+        records = {}
+        if os.path.exists(stats_csv):
+            with open(stats_csv, newline="") as f:
+                for row in csv.DictReader(f):
+                    records[row["Ticker"]] = row
+        if os.path.exists(listing_csv):
+            with open(listing_csv, newline="") as f:
+                for row in csv.DictReader(f):
+                    records.setdefault(row["Ticker"], {}).setdefault("Platform", row["Platform"])
+
+        sectors, industries, platforms = {}, {}, {}
+        n = len(records)
+        sector_codes = np.full(n, -1, dtype=np.int16)
+        industry_codes = np.full(n, -1, dtype=np.int16)
+        platform_codes = np.full(n, -1, dtype=np.int16)
+        market_caps = np.full(n, np.nan)
+        pe_ratios = np.full(n, np.nan)
+        average_volumes = np.full(n, np.nan)
+
+        def code(table, value):
+            if not value or value == "N/A":
+                return -1
+            return table.setdefault(sys.intern(value), len(table))
+
+        for i, (symbol, row) in enumerate(records.items()):
+            symbol = sys.intern(symbol)
+            index.symbols.append(symbol)
+            index.rows[symbol] = i
+            index.company_names.append(row.get("Company") or row.get("Name") or "N/A")
+            sector_codes[i] = code(sectors, row.get("Sector"))
+            industry_codes[i] = code(industries, row.get("Industry"))
+            platform_codes[i] = code(platforms, row.get("Platform"))
+            market_caps[i] = parse_number(row.get("Market Cap", ""))
+            pe_ratios[i] = parse_number(row.get("PE Ratio", ""))
+            average_volumes[i] = parse_number(row.get("Average Volume", ""))
+
+        index.sector_names = list(sectors)
+        index.industry_names = list(industries)
+        index.platform_names = list(platforms)
+        index.sector_codes = sector_codes
+        index.industry_codes = industry_codes
+        index.platform_codes = platform_codes
+        index.market_caps = market_caps
+        index.pe_ratios = pe_ratios
+        index.average_volumes = average_volumes
+        index.sector_rows = {name: np.flatnonzero(sector_codes == c).astype(np.int32)
+                             for name, c in sectors.items()}
+        return index
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self.rows
+
+    @staticmethod
+    def _name(table, code):
+        return table[code] if code >= 0 else None
+
+    def sector(self, symbol):
+        """Returns the sector of a symbol, or None if it is unknown."""
+        row = self.rows.get(symbol.upper())
+        return None if row is None else self._name(self.sector_names, self.sector_codes[row])
+
+    def lookup(self, symbol):
+        """
+        Returns what the index knows about a symbol.
+
+        :returns: A dictionary with keys "symbol", "company_name", "sector", "industry", "platform",
+                  "market_cap", "pe_ratio" and "average_volume", or None if the symbol has no
+                  sector information.
+        """
+        row = self.rows.get(symbol.upper())
+        if row is None or self.sector_codes[row] < 0:
+            return None
+        return {
+            "symbol": self.symbols[row],
+            "company_name": self.company_names[row],
+            "sector": self._name(self.sector_names, self.sector_codes[row]),
+            "industry": self._name(self.industry_names, self.industry_codes[row]),
+            "platform": self._name(self.platform_names, self.platform_codes[row]),
+            "market_cap": float(self.market_caps[row]),
+            "pe_ratio": float(self.pe_ratios[row]),
+            "average_volume": float(self.average_volumes[row]),
+        }
+
+    def symbols_in_sector(self, sector):
+        """Returns the symbols whose sector (as written in stock_stats.csv) equals `sector`."""
+        return [self.symbols[row] for row in self.sector_rows.get(sector, [])]
+
+
+_INDEX = None
+
+
+def get_index():
+    """Returns the shared SectorIndex, loading it from the default files on first use."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = SectorIndex.load()
+    return _INDEX
@@ -1,7 +1,17 @@
 import pandas as pd
 import yfinance as yf
 import numpy as np
-from datetime import datetime
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from bar_cache import BarCache, BAR_DTYPE, empty_bars, window
+from rate_limit import TokenBucket, retry
+
+
+def read_symbol_file(url):
+    """Downloads a pipe-separated NASDAQ Trader symbol directory file."""
+    return pd.read_csv(url, sep='|')
 
 
 class StockListDownloader:
@@ -20,7 +30,7 @@ class StockListDownloader:
 
     def download_nasdaq_listed(self):
         """Download NASDAQ-listed stocks and add Platform column."""
-        nasdaq = pd.read_csv(self.NASDAQ_URL, sep='|')
+        nasdaq = read_symbol_file(self.NASDAQ_URL)
         # Remove file metadata row.
         nasdaq = nasdaq[nasdaq['Symbol'] != "File Creation Time"]
         nasdaq.rename(columns={"Symbol": "Ticker"}, inplace=True)
@@ -30,7 +40,7 @@ class StockListDownloader:
 
     def download_nyse_listed(self):
         """Download other listed stocks, filter for NYSE and add Platform column."""
-        other = pd.read_csv(self.OTHER_URL, sep='|')
+        other = read_symbol_file(self.OTHER_URL)
         # Filter out test issues.
         other = other[other['Test Issue'] != 'Y']
         # Filter for NYSE stocks. In this file, Exchange 'N' represents NYSE.
@@ -40,55 +50,148 @@ class StockListDownloader:
         self.nyse_df = nyse[['Ticker', 'Platform']]
         return self.nyse_df
 
-    def combine_and_save_csv(self, output_file="nasdaq_nyse_listed_stocks.csv"):
-        """
-        Combine NASDAQ and NYSE stocks, remove duplicates, and write to a CSV file.
-        Returns the combined DataFrame.
-        """
+    def _combine(self):
         if self.nasdaq_df is None:
             self.download_nasdaq_listed()
         if self.nyse_df is None:
             self.download_nyse_listed()
         self.combined_df = pd.concat([self.nasdaq_df, self.nyse_df], ignore_index=True)
         self.combined_df.drop_duplicates(subset=['Ticker'], inplace=True)
-        self.combined_df.to_csv(output_file, index=False)
+        self.combined_df.reset_index(drop=True, inplace=True)
+        return self.combined_df
+
+    def combine_and_save_csv(self, output_file="nasdaq_nyse_listed_stocks.csv"):
+        """
+        Combine NASDAQ and NYSE stocks, remove duplicates, and write to a CSV file.
+        Returns the combined DataFrame.
+        """
+        self._combine().to_csv(output_file, index=False)
         print(f"CSV file '{output_file}' written with {len(self.combined_df)} stocks.")
         return self.combined_df
 
+    def refresh(self, output_file="nasdaq_nyse_listed_stocks.csv"):
+        """
+        Downloads the current listings and diffs them against the stored CSV, which is only
+        rewritten if a ticker was added, removed or changed platform.
+        Returns (combined DataFrame, added tickers, removed tickers).
+        """
+        previous = None
+        if os.path.exists(output_file):
+            previous = pd.read_csv(output_file, dtype=str, keep_default_na=False)
+        combined = self._combine()
+        if previous is None:
+            combined.to_csv(output_file, index=False)
+            print(f"CSV file '{output_file}' written with {len(combined)} stocks.")
+            return combined, combined['Ticker'].tolist(), []
+
+        old = dict(zip(previous['Ticker'], previous['Platform']))
+        added = [ticker for ticker in combined['Ticker'] if ticker not in old]
+        removed = sorted(set(old) - set(combined['Ticker']))
+        moved = sum(1 for ticker, platform in zip(combined['Ticker'], combined['Platform'])
+                    if ticker in old and old[ticker] != platform)
+        if added or removed or moved:
+            combined.to_csv(output_file, index=False)
+        print(f"Listing: {len(combined)} stocks, {len(added)} added, {len(removed)} removed, "
+              f"{moved} changed platform.")
+        return combined, added, removed
+
+
+def history_to_bars(hist):
+    """Converts a yfinance history DataFrame into a bar array (see bar_cache.BAR_DTYPE)."""
+    if hist is None or hist.empty:
+        return empty_bars()
+    index = hist.index
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    bars = np.empty(len(hist), dtype=BAR_DTYPE)
+    bars["time"] = index.values.astype("datetime64[s]").astype("int64")
+    for field in ("open", "high", "low", "close", "volume"):
+        bars[field] = hist[field.capitalize()].to_numpy(dtype=float)
+    return bars
+
+
+def fetch_history(tkr, since=None):
+    """
+    Downloads daily bars for a yfinance Ticker: a full year on a cold fetch,
+    otherwise only the days from `since` (epoch seconds) onwards.
+    Errors are raised, so the caller can retry.
+    """
+    return history_to_bars(tkr.history(**_history_start(since)))
+
+
+def _history_start(since):
+    """yfinance download arguments for a cold (`since` is None) or incremental fetch."""
+    if since is None:
+        return {"period": "1y"}
+    return {"start": datetime.fromtimestamp(since, timezone.utc).strftime("%Y-%m-%d")}
+
+
+def close_growth(bars):
+    """Percent change between the first and last close of a bar series, or NaN if empty."""
+    if len(bars) == 0 or bars['close'][0] == 0:
+        return np.nan
+    return float((bars['close'][-1] - bars['close'][0]) / bars['close'][0] * 100)
+
 
 class StockStatsFetcher:
     """
     Uses yfinance to fetch key statistics and historical performance for a given ticker.
+
+    get_stats_for_tickers runs the per-ticker `info` calls on a thread pool behind a shared
+    token-bucket rate limiter, retrying failed calls with exponential backoff. Daily history
+    is downloaded in bulk chunks with yf.download and kept in the bar cache.
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, bar_cache=None, max_workers=8, rate=5.0, burst=10, retries=3, backoff=1.0,
+                 chunk_size=200):
+        """
+        :param bar_cache: (Optional) BarCache for daily history; a default one is created if omitted.
+        :param max_workers: Number of worker threads used by get_stats_for_tickers.
+        :param rate: Maximum yfinance requests per second across all workers.
+        :param burst: Number of requests allowed back to back before the rate applies.
+        :param retries: Tries per request before giving up.
+        :param backoff: Delay in seconds before the first retry; doubled on each further retry.
+        :param chunk_size: Number of tickers per bulk history download.
+        """
+        self.bar_cache = bar_cache or BarCache()
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        self.throughput = None
+
+    def _call(self, func):
+        """Runs one yfinance request under the rate limiter with retry/backoff."""
+        return retry(func, attempts=self.retries, backoff=self.backoff, limiter=self.limiter)
 
     def get_stock_stats(self, ticker):
         """
         Fetch key statistics and performance metrics for a given ticker.
+        Daily closes are read through the bar cache, so a warm ticker only downloads
+        the days since its last stored bar.
         Returns a dictionary with:
           - Ticker, Name, Company, Market Cap, PE Ratio, Dividend Yield,
             Average Volume, Closing Price, Industry, Sector,
             Year Growth (%), and Month Growth (%).
         """
         tkr = yf.Ticker(ticker)
-        info = tkr.info
+        info = self._call(lambda: tkr.info)
 
         # Calculate year and month growth based on historical closing prices.
-        try:
-            hist_year = tkr.history(period="1y")
-            year_growth = ((hist_year['Close'].iloc[-1] - hist_year['Close'].iloc[0]) /
-                           hist_year['Close'].iloc[0]) * 100
-        except Exception as e:
-            year_growth = np.nan
-
-        try:
-            hist_month = tkr.history(period="1mo")
-            month_growth = ((hist_month['Close'].iloc[-1] - hist_month['Close'].iloc[0]) /
-                            hist_month['Close'].iloc[0]) * 100
-        except Exception as e:
-            month_growth = np.nan
+        # Month growth is a slice of the same daily series rather than a second download.
+        # Tickers the bulk prefetch missed are retried here on their own; if that fails too,
+        # nothing is cached and the growth columns are NaN.
+        def fetch(batch, since, span):
+            try:
+                return {ticker.upper(): self._call(lambda: fetch_history(tkr, since))}
+            except Exception as e:
+                print(f"Error downloading history for {ticker}: {e}")
+                return {}
+
+        bars = self.bar_cache.get(ticker, "1d", "year", fetch)
+        year_growth = close_growth(window(bars, "year"))
+        month_growth = close_growth(window(bars, "month"))
 
         return {
             'Ticker': ticker,
@@ -106,20 +209,151 @@ class StockStatsFetcher:
             'Date': datetime.now().strftime("%Y-%m-%d")
         }
 
-    def get_stats_for_tickers(self, tickers):
+    def download_history(self, tickers, since=None, span="year"):
         """
-        Retrieves statistics for a list of tickers.
-        Returns a DataFrame containing the stats.
+        Downloads daily history for several tickers with one yf.download call.
+        Matches the fetch signature expected by BarCache.get_many.
+
+        :returns: Dictionary mapping each upper-cased ticker to a bar array. Tickers the bulk
+                  download failed for (missing or all-NaN columns) are left out, so the cache
+                  keeps them due and get_stock_stats retries them one by one.
         """
-        stats_list = []
+        data = self._call(lambda: yf.download(tickers, group_by="ticker", auto_adjust=True, threads=False,
+                                              progress=False, **_history_start(since)))
+        bars = {}
         for ticker in tickers:
-            # print(f"Processing {ticker}...")
             try:
-                stats = self.get_stock_stats(ticker)
-                stats_list.append(stats)
+                hist = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+            except KeyError:
+                continue
+            ticker_bars = history_to_bars(hist.dropna(how="all"))
+            if len(ticker_bars):
+                bars[ticker.upper()] = ticker_bars
+        return bars
+
+    def prefetch_history(self, tickers):
+        """Brings the cached daily history of the given tickers up to date in bulk chunks."""
+        for start in range(0, len(tickers), self.chunk_size):
+            chunk = tickers[start:start + self.chunk_size]
+            try:
+                self.bar_cache.get_many(chunk, "1d", "year", self.download_history)
             except Exception as e:
-                print(f"Error processing {ticker}: {e}")
-        return pd.DataFrame(stats_list)
+                print(f"Error downloading history for {len(chunk)} tickers: {e}")
+
+    def iter_stats(self, tickers, max_workers=None):
+        """
+        Yields the stats dictionary of each ticker as soon as it is fetched (completion order).
+        History for the next chunk is prefetched while the worker pool fetches `info` for the
+        current one, and at most two chunks are in flight at a time. Tickers that fail are
+        reported and skipped. The achieved rate is stored in self.throughput (tickers/sec).
+
+        :param tickers: List of stock ticker symbols.
+        :param max_workers: (Optional) Overrides the worker count given to the constructor.
+        """
+        started = time.perf_counter()
+        workers = max_workers or self.max_workers
+        chunks = [tickers[start:start + self.chunk_size] for start in range(0, len(tickers), self.chunk_size)]
+        fetched = 0
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            if chunks:
+                self.prefetch_history(chunks[0])
+            for index, chunk in enumerate(chunks):
+                futures = {pool.submit(self.get_stock_stats, ticker): ticker for ticker in chunk}
+                if index + 1 < len(chunks):
+                    self.prefetch_history(chunks[index + 1])
+                for future in as_completed(futures):
+                    try:
+                        stats = future.result()
+                    except Exception as e:
+                        print(f"Error processing {futures[future]}: {e}")
+                        continue
+                    fetched += 1
+                    yield stats
+
+        elapsed = time.perf_counter() - started
+        self.throughput = len(tickers) / elapsed if elapsed > 0 else float("inf")
+        print(f"Fetched stats for {fetched}/{len(tickers)} tickers in {elapsed:.1f}s "
+              f"({self.throughput:.2f} tickers/sec, {workers} workers).")
+
+    def get_stats_for_tickers(self, tickers, max_workers=None):
+        """
+        Retrieves statistics for a list of tickers.
+        Returns a DataFrame containing the stats, in the order of `tickers`.
+        """
+        results = {stats['Ticker']: stats for stats in self.iter_stats(tickers, max_workers)}
+        return pd.DataFrame([results[ticker] for ticker in tickers if ticker in results])
+
+
+class StatsWriter:
+    """
+    Streams stats rows to a CSV file in fixed-size chunks and keeps a checkpoint of the
+    tickers already written, so an interrupted run can resume where it stopped.
+
+    Rows go to `<output_csv>.partial` until finish() moves it into place. After every chunk
+    a line "<partial file size> <ticker,ticker,...>" is appended to the checkpoint; on resume
+    the partial file is truncated to the last checkpointed size, dropping any half-written chunk.
+    """
+
+    def __init__(self, output_csv, columns, chunk_size=500):
+        self.output_csv = output_csv
+        self.partial_csv = output_csv + ".partial"
+        self.checkpoint_file = output_csv + ".checkpoint"
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.completed = set()
+        self.rows_written = 0
+        self._resume()
+
+    def _resume(self):
+        size = 0
+        if os.path.exists(self.checkpoint_file) and os.path.exists(self.partial_csv):
+            with open(self.checkpoint_file) as f:
+                for line in f:
+                    offset, _, tickers = line.rstrip("\n").partition(" ")
+                    size = int(offset)
+                    self.completed.update(t for t in tickers.split(",") if t)
+        if size == 0:
+            self.completed.clear()
+            if os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
+        with open(self.partial_csv, "a+") as f:
+            f.truncate(size)
+        if size:
+            print(f"Resuming: {len(self.completed)} tickers already written to {self.partial_csv}.")
+
+    def write(self, row):
+        """Buffers one stats row, flushing a chunk once chunk_size rows are buffered."""
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered rows to the partial CSV and records them in the checkpoint."""
+        if not self.buffer:
+            return
+        chunk = pd.DataFrame(self.buffer, columns=self.columns)
+        with open(self.partial_csv, "a", newline="") as f:
+            chunk.to_csv(f, header=f.tell() == 0, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        tickers = [str(ticker) for ticker in chunk['Ticker']]
+        with open(self.checkpoint_file, "a") as f:
+            f.write(f"{size} {','.join(tickers)}\n")
+        self.completed.update(tickers)
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def finish(self):
+        """Flushes the remaining rows, moves the partial CSV into place and drops the checkpoint."""
+        self.flush()
+        if os.path.getsize(self.partial_csv) == 0:
+            pd.DataFrame(columns=self.columns).to_csv(self.partial_csv, index=False)
+        os.replace(self.partial_csv, self.output_csv)
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
 
 
 class StockAnalyzer:
@@ -128,39 +362,108 @@ class StockAnalyzer:
     to analyze and output stock data.
     """
 
-    def __init__(self, output_csv="nasdaq_nyse_listed_stocks.csv"):
+    STATS_COLUMNS = [
+        'Ticker', 'Name', 'Company', 'Market Cap', 'PE Ratio', 'Dividend Yield', 'Average Volume',
+        'Closing Price', 'Industry', 'Sector', 'Year Growth (%)', 'Month Growth (%)', 'Date', 'Platform'
+    ]
+
+    def __init__(self, output_csv="nasdaq_nyse_listed_stocks.csv", stats_fetcher=None,
+                 stats_csv="stock_stats.csv", chunk_size=500, max_age_days=7):
+        """
+        :param max_age_days: Stats rows older than this many days are fetched again on an
+                             incremental run; younger ones are reused.
+        """
         self.downloader = StockListDownloader()
-        self.stats_fetcher = StockStatsFetcher()
+        self.stats_fetcher = stats_fetcher or StockStatsFetcher()
         self.output_csv = output_csv
+        self.stats_csv = stats_csv
+        self.chunk_size = chunk_size
+        self.max_age_days = max_age_days
+        self.report = None
+
+    def _existing_rows(self, listed):
+        """
+        Rows of the existing stats CSV for still-listed tickers (as text), split into those
+        younger than max_age_days and the stale rest.
+
+        Dates are written as YYYY-MM-DD; older files use M/D/YY, which is parsed as a fallback.
+        Rows with an unreadable date count as stale.
+        """
+        if not os.path.exists(self.stats_csv):
+            return {}, {}
+        existing = pd.read_csv(self.stats_csv, dtype=str, keep_default_na=False)
+        if 'Date' not in existing.columns or 'Ticker' not in existing.columns:
+            return {}, {}
+        existing = existing[existing['Ticker'].isin(listed)]
+        dates = pd.to_datetime(existing['Date'], format="%Y-%m-%d", errors="coerce")
+        dates = dates.fillna(pd.to_datetime(existing['Date'], format="%m/%d/%y", errors="coerce"))
+        cutoff = pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=self.max_age_days)
+        fresh = dates >= cutoff
+        return ({row['Ticker']: row for row in existing[fresh].to_dict("records")},
+                {row['Ticker']: row for row in existing[~fresh].to_dict("records")})
 
-    def run(self):
+    def run(self, full=False):
         """
         Downloads the stock list, fetches key stats for each stock,
-        and writes the results to a CSV file.
+        and streams the results to a CSV file in chunks as they arrive.
+        If a previous run was interrupted, tickers it already wrote are skipped.
+
+        Unless `full` is set, the run is incremental: stats are fetched only for tickers that were
+        added to the listing, are missing from the stats CSV or whose row is older than
+        max_age_days; other rows are copied from the previous stats CSV and delisted tickers are
+        dropped. A stale row whose refetch fails is kept as it was rather than lost. The counts
+        (and network calls saved) are stored in self.report.
+        Returns the path of the stats CSV.
         """
-        # Step 1: Download combined stock list.
-        stock_list_df = self.downloader.combine_and_save_csv(self.output_csv)
-        tickers = stock_list_df['Ticker'].tolist()
+        # Step 1: Download combined stock list and diff it against the stored one.
+        stock_list_df, added, removed = self.downloader.refresh(self.output_csv)
+        platforms = dict(zip(stock_list_df['Ticker'], stock_list_df['Platform']))
+        listed = stock_list_df['Ticker'].tolist()
         
+        # Step 2: Fetch stock statistics, skipping tickers completed by an interrupted run
+        # and (incrementally) tickers whose previous stats are recent enough.
+        writer = StatsWriter(self.stats_csv, self.STATS_COLUMNS, self.chunk_size)
+        reusable, stale = ({}, {}) if full else self._existing_rows(listed)
+        for ticker, row in reusable.items():
+            if ticker not in writer.completed:
+                writer.write({**row, 'Platform': platforms.get(ticker)})
+        tickers = [ticker for ticker in listed if ticker not in writer.completed and ticker not in reusable]
+
         # For demonstration, you might want to limit to a subset of tickers.
         # Remove or modify the following line as needed.
         # tickers = tickers[:50]  # For example, process first 50 tickers only.
 
-        # Step 2: Fetch stock statistics.
-        stats_df = self.stats_fetcher.get_stats_for_tickers(tickers)
+        # Step 3: Attach Platform info row by row and write each chunk as it fills.
+        for stats in self.stats_fetcher.iter_stats(tickers):
+            stale.pop(stats['Ticker'], None)
+            writer.write({**stats, 'Platform': platforms.get(stats['Ticker'])})
+        kept = [ticker for ticker in tickers if ticker in stale]
+        for ticker in kept:
+            writer.write({**stale[ticker], 'Platform': platforms.get(ticker)})
+        writer.finish()
 
-        # Optionally merge Platform info from the stock list.
-        merged_df = pd.merge(stats_df, stock_list_df, on="Ticker", how="left")
-
-        # Write the detailed stats to a CSV file.
-        stats_output = "stock_stats.csv"
-        merged_df.to_csv(stats_output, index=False)
-        print(f"Stock statistics written to {stats_output}.")
-        return merged_df
+        # Each ticker costs one `info` request; history is downloaded in chunks of chunk_size.
+        chunk = self.stats_fetcher.chunk_size
+        self.report = {
+            "listed": len(listed),
+            "added": len(added),
+            "removed": len(removed),
+            "reused": len(reusable),
+            "fetched": len(tickers),
+            "kept_stale": len(kept),
+            "info_calls_saved": len(listed) - len(tickers),
+            "history_calls_saved": -(-len(listed) // chunk) - -(-len(tickers) // chunk),
+        }
+        print(f"Stock statistics written to {self.stats_csv}: {self.report['fetched']} fetched, "
+              f"{self.report['reused']} reused, {self.report['kept_stale']} stale kept after a failed fetch, "
+              f"{self.report['removed']} delisted dropped; saved "
+              f"{self.report['info_calls_saved']} info and {self.report['history_calls_saved']} history calls.")
+        return self.stats_csv
 
 
 if __name__ == "__main__":
+    import sys
     analyzer = StockAnalyzer()
-    final_stats_df = analyzer.run()
+    stats_csv = analyzer.run(full="--full" in sys.argv)
     # For display purposes, print the first few rows.
-    print(final_stats_df.head())
+    print(pd.read_csv(stats_csv, nrows=5))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import allocator
+
+
+def candidates(n):
+    return [{"symbol": f"S{i}", "volatility": 1.0 + i} for i in range(n)]
+
+
+@pytest.mark.parametrize("method", allocator.METHODS)
+def test_cap_is_enforced_against_the_budget(method):
+    returns = allocator.synthetic_returns(num_symbols=2, num_bars=60)
+    selections = allocator.allocate(candidates(2), 1000, returns, method, cap=0.25)
+    assert [amount for _, amount in selections] == [250.0, 250.0]  # Half the budget stays uninvested.
+
+
+@pytest.mark.parametrize("method", allocator.METHODS)
+def test_fully_invested_when_the_cap_allows(method):
+    returns = allocator.synthetic_returns(num_symbols=8, num_bars=60)
+    selections = allocator.allocate(candidates(8), 1000, returns, method, cap=0.25)
+    weights = np.array([stock["weight"] for stock, _ in selections])
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights.max() <= 0.25 + 1e-9
+
+
+def test_short_history_fallback_respects_the_cap():
+    short = np.full((60, 3), np.nan)
+    selections = allocator.allocate(candidates(3), 900, short, cap=0.25)
+    assert all(amount <= 225 for _, amount in selections)
+    assert sum(amount for _, amount in selections) == pytest.approx(675)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+import backtest
+import indicators
+
+
+def panel(closes):
+    close = np.array(closes, dtype=float)
+    times = np.arange(close.shape[1]) * 86400
+    return indicators.Panel(["UP", "DOWN", "GAP"], times, open=close, high=close, low=close, close=close,
+                            volume=np.ones_like(close))
+
+
+def test_movers_are_ranked_by_absolute_change():
+    result = backtest.backtest(panel([[100, 106, 106], [100, 80, 80], [np.nan, np.nan, 100]]),
+                               risk_tolerance="High", top_n=1, cash=1000, allocation=1)
+    # DOWN fell 20% and outranks UP's 6% rise; GAP has no change and never ranks.
+    assert list(result["trades"]["symbol"]) == ["DOWN"]
+
+
+def test_empty_cache_is_a_usage_error(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        backtest.main(["--cache-dir", str(tmp_path)])
+    assert f"no bars stored in {tmp_path} for interval day" in capsys.readouterr().err
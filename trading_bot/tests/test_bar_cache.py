@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+
+from bar_cache import BAR_DTYPE, BarCache, empty_bars
+
+
+def make_bars(start, count, step=86400):
+    bars = np.zeros(count, dtype=BAR_DTYPE)
+    bars["time"] = start + step * np.arange(count)
+    bars["open"] = bars["high"] = bars["low"] = bars["close"] = 100 + np.arange(count)
+    return bars
+
+
+def test_cold_fetch_is_stored_and_served_from_disk(tmp_path):
+    cache = BarCache(str(tmp_path))
+    calls = []
+
+    def fetch(batch, since, span):
+        calls.append((list(batch), since))
+        return {ticker: make_bars(1_700_000_000, 5) for ticker in batch}
+
+    first = cache.get_many(["aapl", "msft"], "day", "year", fetch)
+    second = cache.get_many(["AAPL", "MSFT"], "day", "year", fetch)
+    assert calls == [(["AAPL", "MSFT"], None)]
+    assert len(first["AAPL"]) == len(second["MSFT"]) == 5
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 2
+
+
+def test_empty_cold_fetch_is_not_cached(tmp_path):
+    cache = BarCache(str(tmp_path))
+    calls = []
+
+    def failing(batch, since, span):
+        calls.append(since)
+        return {ticker: empty_bars() for ticker in batch}
+
+    assert len(cache.get("AAPL", "1d", "year", failing)) == 0
+    assert cache.needs_fetch("AAPL", "1d", "year")
+
+    # The next read retries the full span and stores what it gets.
+    bars = cache.get("AAPL", "1d", "year", lambda batch, since, span: {"AAPL": make_bars(1_700_000_000, 3)})
+    assert calls == [None]
+    assert len(bars) == 3
+    assert not cache.needs_fetch("AAPL", "1d", "year")
+
+
+def test_warm_fetch_appends_only_new_bars(tmp_path):
+    cache = BarCache(str(tmp_path))
+    cache.append("AAPL", "day", make_bars(1_700_000_000, 5), span="year")
+    cache.append("AAPL", "day", make_bars(1_700_000_000 + 4 * 86400, 3))
+    bars = cache.read("AAPL", "day")
+    assert len(bars) == 7
+    assert np.all(np.diff(bars["time"]) == 86400)
+
+
+def test_stats_are_thread_safe(tmp_path):
+    cache = BarCache(str(tmp_path))
+
+    def work():
+        for _ in range(2000):
+            cache._count(hits=1, fetch_seconds=0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats["hits"] == 16000
+    assert cache.stats["fetch_seconds"] == 8000.0
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_install_patches_modules_when_they_are_first_imported():
+    script = textwrap.dedent("""
+        import sys
+        import endpoints
+
+        patches = endpoints.install(lambda endpoint, args, kwargs, func: ("hooked", endpoint))
+        assert not {"stock_performance", "yfinance", "pandas", "robin_stocks"} & set(sys.modules)
+
+        import stock_performance
+        import robin_stocks.robinhood as rh
+        assert stock_performance.read_symbol_file("url") == ("hooked", "stock_performance.read_symbol_file")
+        assert rh.stocks.get_quotes(["AAPL"]) == ("hooked", "robin_stocks.robinhood.stocks.get_quotes")
+        assert stock_performance.yf.Ticker("AAPL").info == ("hooked", "yfinance.Ticker.info")
+
+        endpoints.uninstall(patches)
+        assert not hasattr(stock_performance.read_symbol_file, "__wrapped__")
+        assert not hasattr(rh.stocks.get_quotes, "__wrapped__")
+        assert endpoints._HOOK not in sys.meta_path
+    """)
+    subprocess.run([sys.executable, "-c", script], cwd=BOT_DIR, check=True)
+
+
+def test_metrics_for_a_quote_do_not_import_pandas():
+    script = textwrap.dedent("""
+        import sys
+        import metrics
+
+        metrics.install()
+        assert not {"stock_performance", "yfinance", "pandas"} & set(sys.modules)
+        metrics.uninstall()
+    """)
+    subprocess.run([sys.executable, "-c", script], cwd=BOT_DIR, check=True)
@@ -0,0 +1,46 @@
+import execution
+
+
+def executor(broker, on_fill=None):
+    return execution.OrderExecutor(broker, rate=1000, burst=1000, poll_interval=0.01, timeout=5, on_fill=on_fill)
+
+
+def test_decision_sizes_whole_shares():
+    item = execution.decision("AAA", 1000, 30.0)
+    assert (item["symbol"], item["side"], item["quantity"], item["price"]) == ("AAA", "buy", 33, 30.0)
+    assert execution.decision("AAA", 1000, 0)["quantity"] == 0
+
+
+def test_orders_are_tracked_until_filled_with_one_poll_per_cycle():
+    broker = execution.SimulatedBroker(latency=0, fill_delay=0.03, seed=1)
+    fills = []
+    decisions = [execution.decision(f"S{i}", 1000, 10.0) for i in range(20)] + [execution.decision("ZERO", 5, 10.0)]
+    records = executor(broker, fills.append).execute(decisions)
+
+    assert [record["state"] for record in records] == ["filled"] * 20 + ["failed"]
+    assert records[-1]["error"] == "quantity is zero"
+    assert all(record["filled_quantity"] == 100 and record["average_price"] == 10.0 for record in records[:20])
+    assert sorted(record["symbol"] for record in fills) == sorted(f"S{i}" for i in range(20))
+    assert broker.calls["submit"] == 20
+    assert broker.calls["orders_since"] < 20 * 5  # One request per poll, not per order.
+
+
+def test_failed_and_rejected_submissions_are_final_without_fills():
+    fills = []
+    failing = execution.SimulatedBroker(latency=0, fill_delay=0, error_rate=1.0)
+    records = executor(failing, fills.append).execute([execution.decision("AAA", 1000, 10.0)])
+    assert records[0]["state"] == "failed" and "simulated submit failure" in records[0]["error"]
+
+    rejecting = execution.SimulatedBroker(latency=0, fill_delay=0, reject_rate=1.0)
+    records = executor(rejecting, fills.append).execute([execution.decision("AAA", 1000, 10.0)])
+    assert records[0]["state"] == "rejected" and records[0]["filled_quantity"] == 0
+    assert rejecting.calls["orders_since"] == 0
+    assert fills == []
+
+
+def test_summary_counts_states():
+    summary = execution.summarize([{"state": "filled", "latency": 0.1, "submitted_at": 1.0, "completed_at": 1.5},
+                                   {"state": "rejected"}], seconds=2.0)
+    assert summary["states"] == {"filled": 1, "rejected": 1}
+    assert summary["fill_time"]["max"] == 0.5
+    assert summary["orders_per_second"] == 1.0
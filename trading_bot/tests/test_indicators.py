@@ -0,0 +1,38 @@
+import numpy as np
+
+import indicators
+
+
+def bars(values):
+    close = np.array([values], dtype=float)
+    return close + 1, close - 1, close  # Every true range is 2 without gaps.
+
+
+def test_atr_skips_a_gap():
+    high, low, close = bars([10.0] * 30)
+    high[0, 10] = low[0, 10] = close[0, 10] = np.nan
+    result = indicators.atr(high, low, close, window=5)
+    assert np.isnan(result[0, :4]).all()
+    assert np.allclose(result[0, 4:], 2.0)  # The gap's window averages the four valid bars.
+
+
+def test_atr_of_a_ragged_history():
+    high, low, close = bars([np.nan] * 20 + [10.0] * 10)
+    result = indicators.atr(high, low, close, window=5)
+    assert np.isnan(result[0, :22]).all()  # Fewer than three valid bars in the window.
+    assert np.allclose(result[0, 22:], 2.0)
+    assert np.isnan(indicators.atr(high, low, close, window=5, min_periods=5)[0, 23])
+
+
+def test_risk_table_atr_with_gaps():
+    panel = indicators.synthetic_panel(num_symbols=4, num_bars=60, seed=1)
+    panel.high[1, 30] = panel.low[1, 30] = panel.close[1, 30] = np.nan
+    panel.high[2, :40] = panel.low[2, :40] = panel.close[2, :40] = np.nan
+    table = indicators.risk_table(panel)
+    assert table["atr_percent"].notna().all()
+
+
+def test_align_of_nothing_is_an_empty_panel():
+    panel = indicators.align({})
+    assert len(panel) == 0 and panel.times.shape == (0,)
+    assert all(getattr(panel, name).shape == (0, 0) for name in indicators.FIELDS)
@@ -0,0 +1,115 @@
+import json
+import pickle
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import login
+
+REUSED = {"access_token": "old", "token_type": "Bearer", "expires_in": 3600,
+          "detail": "logged in using authentication in robinhood.pickle", "refresh_token": "r1"}
+FRESH = {"access_token": "new", "token_type": "Bearer", "expires_in": 3600, "refresh_token": "r2"}
+
+
+class FakeRobinhood:
+    def __init__(self, logins, refresh=None):
+        self.logins = list(logins)
+        self.refresh = refresh
+        self.calls = []
+        self.headers = {}
+
+    def login(self, *args, **kwargs):
+        self.calls.append("login")
+        return self.logins.pop(0)
+
+    def request_post(self, url, payload):
+        self.calls.append("refresh")
+        if isinstance(self.refresh, Exception):
+            raise self.refresh
+        return self.refresh
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    def make(logins, refresh=None):
+        fake = FakeRobinhood(logins, refresh)
+        monkeypatch.setattr(login, "username", "user")
+        monkeypatch.setattr(login, "password", "secret")
+        monkeypatch.setattr(login, "mfa_secret", None)
+        monkeypatch.setattr(login, "r", SimpleNamespace(login=fake.login))
+        monkeypatch.setattr(login, "rh_helper", SimpleNamespace(
+            SESSION=SimpleNamespace(mount=lambda prefix, adapter: None),
+            set_login_state=lambda state: None,
+            update_session=fake.headers.__setitem__,
+            request_post=fake.request_post))
+        monkeypatch.setattr(login, "login_url", lambda: "https://example/token/")
+        pickle_path = tmp_path / "robinhood.pickle"
+        with open(pickle_path, "wb") as f:
+            pickle.dump({"access_token": "old", "token_type": "Bearer", "refresh_token": "r1",
+                         "device_token": "d"}, f)
+        manager = login.SessionManager(pickle_path=str(pickle_path), state_path=str(tmp_path / "state.json"))
+        return manager, fake
+    return make
+
+
+def test_fresh_login_records_its_expiry(session):
+    manager, fake = session([FRESH])
+    manager._login()
+    assert fake.calls == ["login"]
+    assert manager.expires_at == pytest.approx(time.time() + 3600, abs=5)
+    with open(manager.state_path) as f:
+        assert json.load(f)["expires_at"] == manager.expires_at
+
+
+def test_reused_token_is_refreshed_instead_of_trusted(session):
+    manager, fake = session([REUSED], refresh={"access_token": "new", "token_type": "Bearer",
+                                               "refresh_token": "r2", "expires_in": 900})
+    manager._login()
+    assert fake.calls == ["login", "refresh"]
+    assert manager.expires_at == pytest.approx(time.time() + 900, abs=5)
+    assert fake.headers["Authorization"] == "Bearer new"
+    with open(manager.pickle_path, "rb") as f:
+        assert pickle.load(f)["refresh_token"] == "r2"
+
+
+def test_reused_token_that_cannot_be_refreshed_forces_a_new_login(session):
+    manager, fake = session([REUSED, FRESH], refresh=ConnectionError("refresh rejected"))
+    manager._login()
+    assert fake.calls == ["login", "refresh", "login"]
+    assert manager.expires_at == pytest.approx(time.time() + 3600, abs=5)
+
+
+def test_token_inside_refresh_margin_is_not_restored(session):
+    manager, fake = session([FRESH])
+    with open(manager.state_path, "w") as f:
+        json.dump({"expires_at": time.time() + 60}, f)
+    assert not manager._restore()
+
+
+def test_failed_login_is_not_recorded(session):
+    manager, fake = session([None])
+    with pytest.raises(RuntimeError):
+        manager._login()
+    assert manager.expires_at == 0
+
+
+def test_valid_persisted_token_is_restored_without_a_login(session):
+    manager, fake = session([])
+    expires_at = time.time() + 3000
+    with open(manager.state_path, "w") as f:
+        json.dump({"expires_at": expires_at}, f)
+    try:
+        manager.ensure_login()
+        manager.ensure_login()
+    finally:
+        manager.timer.cancel()
+    assert fake.calls == []
+    assert manager.expires_at == expires_at
+    assert fake.headers["Authorization"] == "Bearer old"
+
+
+def test_missing_sidecar_is_not_restored(session):
+    manager, fake = session([])
+    assert not manager._restore()
+    assert fake.headers == {}
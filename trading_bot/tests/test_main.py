@@ -0,0 +1,24 @@
+import pytest
+
+import main
+
+
+def test_order_options_only_on_trade():
+    parser = main.build_parser()
+    assert parser.parse_args(["trade", "--paper"]).paper
+    with pytest.raises(SystemExit):
+        parser.parse_args(["recommend", "--paper"])
+
+
+def test_bad_bound_exits_cleanly():
+    args = main.build_parser().parse_args(["screen", "--min", "market_cap=abc"])
+    with pytest.raises(SystemExit, match="market_cap=abc"):
+        main.parse_bounds(args)
+    args = main.build_parser().parse_args(["screen", "--min", "market_cap=1e9", "--max", "pe_ratio=30"])
+    assert main.parse_bounds(args) == {"market_cap": (1e9, None), "pe_ratio": (None, 30.0)}
+
+
+def test_bad_top_field_exits_cleanly():
+    args = main.build_parser().parse_args(["screen", "--top", "bogus"])
+    with pytest.raises(SystemExit, match="Unknown field 'bogus'"):
+        main.cmd_screen(args)
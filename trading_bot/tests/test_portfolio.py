@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+import login
+import portfolio
+
+
+class FakeAccount:
+    """Stubbed rh.account: one position in AAA (instrument "inst-aaa") and $1000 cash."""
+
+    def __init__(self):
+        self.calls = []
+        self.quantity = "10"
+        self.cash = "1000"
+
+    def load_account_profile(self):
+        self.calls.append("profile")
+        return {"cash": self.cash, "buying_power": self.cash}
+
+    def build_holdings(self):
+        self.calls.append("holdings")
+        return {"AAA": {"id": "inst-aaa", "quantity": self.quantity, "average_buy_price": "10", "equity": "100"}}
+
+    def get_open_stock_positions(self):
+        self.calls.append("positions")
+        return [{"instrument": "https://api.robinhood.com/instruments/inst-aaa/", "quantity": self.quantity,
+                 "average_buy_price": "10"}]
+
+
+@pytest.fixture
+def state(monkeypatch):
+    now = [1000.0]
+    account = FakeAccount()
+    monkeypatch.setattr(portfolio.time, "time", lambda: now[0])
+    monkeypatch.setattr(portfolio, "rh", SimpleNamespace(account=account))
+    monkeypatch.setattr(login.SESSION_MANAGER, "ensure_login", lambda: None)
+    return portfolio.PortfolioState(reconcile_interval=900, delta_interval=60), account, now
+
+
+def test_fills_are_applied_locally_until_the_delta_refresh(state):
+    state, account, now = state
+    assert state.holdings["AAA"]["quantity"] == 10 and state.cash == 1000
+    state.apply_order({"symbol": "aaa", "side": "buy", "filled_quantity": 5, "average_price": 16.0})
+    state.apply_fill("BBB", "buy", 2, 50.0)
+    assert state.holdings["AAA"]["quantity"] == 15
+    assert state.holdings["AAA"]["average_buy_price"] == pytest.approx(12.0)
+    assert state.cash == 1000 - 80 - 100
+    assert account.calls == ["holdings", "profile"]
+
+    # The broker saw only the AAA fill; the delta refresh takes its numbers and drops BBB.
+    account.quantity, account.cash = "15", "920"
+    now[0] += 60
+    assert state.holdings == {"AAA": {"id": "inst-aaa", "quantity": 15.0, "average_buy_price": 10.0,
+                                      "equity": "100"}}
+    assert state.cash == 920
+    assert account.calls == ["holdings", "profile", "positions", "profile"]
+
+
+def test_reconcile_counts_drift(state):
+    state, account, now = state
+    state.holdings
+    state.apply_fill("AAA", "sell", 4, 12.0)
+    now[0] += 900
+    assert state.holdings["AAA"]["quantity"] == 10
+    assert state.stats["drift"] == 1 and state.stats["snapshots"] == 2
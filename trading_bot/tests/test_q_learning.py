@@ -0,0 +1,28 @@
+import pytest
+
+import q_learning
+
+STOCKS = [{"symbol": "AAA", "volatility": 4.0}, {"symbol": "BBB", "volatility": 9.0},
+          {"symbol": "CCC", "volatility": 6.0}]
+
+
+def test_same_seed_gives_the_same_selection():
+    first = q_learning.q_learning_stock_selection_vectorized(STOCKS, 5000, epochs=2000, seed=3)
+    assert q_learning.q_learning_stock_selection_vectorized(STOCKS, 5000, epochs=2000, seed=3) == first
+
+
+def test_matches_the_original_selection(capsys):
+    # The first stock dominates, so both versions pick it whatever their random draws.
+    stocks = [{"symbol": "AAA", "volatility": 50.0}] + STOCKS
+    expected = q_learning.q_learning_stock_selection(stocks, 500, epochs=200)
+    capsys.readouterr()
+    assert expected == (stocks[0], 500)
+    assert q_learning.q_learning_stock_selection_vectorized(stocks, 500, epochs=200, seed=0) == expected
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 100000])
+def test_blocks_bound_memory_without_changing_the_contract(block_size):
+    stock, amount = q_learning.q_learning_stock_selection_vectorized(STOCKS, 10**9, epochs=50, seed=0,
+                                                                     block_size=block_size)
+    index = STOCKS.index(stock)
+    assert amount == (10**9 // (index + 1) if index else 10**9)
@@ -0,0 +1,54 @@
+import asyncio
+import functools
+import time
+
+import daemon
+import helpers
+import quote_stream
+import ref_cache
+from ref_cache import TTLCache
+
+
+def quote(symbol, price):
+    return {"symbol": symbol, "last_trade_price": str(price), "previous_close": "100",
+            "updated_at": f"{symbol}-{price}"}
+
+
+def test_streamed_quotes_outlive_the_poll_interval(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ref_cache.time, "time", lambda: now[0])
+    cache = TTLCache(ttls={"quote": 5})
+    streamer = quote_stream.QuoteStreamer(["AAPL"], interval=30, cache=cache,
+                                          fetch=lambda symbols: [quote(symbol, 101) for symbol in symbols])
+    asyncio.run(streamer.poll_once())
+    now[0] += 31  # The next poll is due, but has not landed yet.
+    assert cache.get("quote", "AAPL")["last_trade_price"] == "101"
+    assert streamer.percent_change("AAPL") == 1.0
+
+
+def test_daemon_streams_movers_into_the_shared_cache(monkeypatch):
+    cache = TTLCache()
+    monkeypatch.setattr(helpers, "REF_CACHE", cache)
+    polled = []
+
+    def fetch(symbols):
+        polled.append(list(symbols))
+        return [quote(symbol, 102) for symbol in symbols]
+
+    monkeypatch.setattr(quote_stream, "QuoteStreamer", functools.partial(quote_stream.QuoteStreamer, fetch=fetch))
+    bot = daemon.Daemon(["Information Technology"], stream_interval=0.01)
+    bot.stream(["AAPL", "MSFT"])
+    first = bot.streamer
+    bot.stream(["aapl", "msft"])
+    assert bot.streamer is first  # Same watchlist: the running streamer is kept.
+    deadline = time.time() + 5
+    while cache.get("quote", "MSFT") is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get("quote", "MSFT")["last_trade_price"] == "102"
+    assert first.cache is cache
+
+    bot.stream([])
+    assert bot.streamer is None
+    count = len(polled)
+    time.sleep(0.1)
+    assert len(polled) <= count + 1  # At most the cycle in flight finishes.
@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import ref_cache
+from ref_cache import TTLCache
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_memory_hit_and_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ref_cache.time, "time", lambda: now[0])
+    cache = TTLCache(ttls={"quote": 5})
+    cache.set("quote", "AAPL", {"last_trade_price": "1"})
+    assert cache.get("quote", "AAPL") == {"last_trade_price": "1"}
+    now[0] += 5
+    assert cache.get("quote", "AAPL") is None
+    assert cache.stats["expired"] == 1
+
+
+def test_disk_tier_persists_across_instances_until_expiry(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    now = [1000.0]
+    monkeypatch.setattr(ref_cache.time, "time", lambda: now[0])
+    cache = TTLCache(ttls={"fundamentals": 100}, disk_path=path)
+    cache.set("fundamentals", "AAPL", {"sector": "Tech"})
+    cache.set("quote", "AAPL", {"last_trade_price": "1"})  # Memory only.
+    cache.db.close()
+
+    now[0] += 50
+    restarted = TTLCache(ttls={"fundamentals": 100}, disk_path=path)
+    assert restarted.get("fundamentals", "AAPL") == {"sector": "Tech"}
+    assert restarted.get("fundamentals", "AAPL") == {"sector": "Tech"}  # Promoted into memory.
+    assert restarted.get("quote", "AAPL") is None
+    assert (restarted.stats["disk_hits"], restarted.stats["hits"], restarted.stats["misses"]) == (1, 2, 1)
+
+    now[0] += 50
+    assert restarted.get("fundamentals", "AAPL") is None
+    restarted.db.close()
+    assert TTLCache(ttls={"fundamentals": 100}, disk_path=path).get("fundamentals", "AAPL") is None
+
+
+def test_get_many_fetches_only_missing_keys(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ref_cache.time, "time", lambda: now[0])
+    cache = TTLCache(ttls={"quote": 5})
+    cache.set("quote", "AAPL", {"price": 1})
+    fetched = []
+
+    def fetch(keys):
+        fetched.append(list(keys))
+        return {key: {"price": 2} for key in keys}
+
+    assert cache.get_many("quote", ["AAPL", "MSFT"], fetch) == {"AAPL": {"price": 1}, "MSFT": {"price": 2}}
+    now[0] += 5
+    cache.get_many("quote", ["AAPL", "MSFT"], fetch)
+    assert fetched == [["MSFT"], ["AAPL", "MSFT"]]
+
+
+def test_expired_rows_are_purged_on_open(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    now = [1000.0]
+    monkeypatch.setattr(ref_cache.time, "time", lambda: now[0])
+    cache = TTLCache(ttls={"fundamentals": 10, "instrument": 100}, disk_path=path)
+    cache.set("fundamentals", "AAPL", {"sector": "Tech"})
+    cache.set("instrument", "AAPL", {"simple_name": "Apple"})
+    cache.db.close()
+
+    now[0] += 50
+    reopened = TTLCache(ttls={"fundamentals": 10, "instrument": 100}, disk_path=path)
+    assert reopened.stats["purged"] == 1
+    assert reopened.db.execute("SELECT kind FROM entries").fetchall() == [("instrument",)]
+    assert reopened.get("instrument", "AAPL") == {"simple_name": "Apple"}
+
+
+def test_expired_rows_are_purged_periodically(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ref_cache.time, "time", lambda: now[0])
+    cache = TTLCache(ttls={"fundamentals": 40}, disk_path=str(tmp_path / "cache.sqlite"), purge_interval=60)
+    for i in range(5):
+        cache.set("fundamentals", f"S{i}", {})
+    now[0] += 30
+    cache.set("fundamentals", "LATE", {})
+    assert cache.db.execute("SELECT COUNT(*) FROM entries").fetchone() == (6,)
+    now[0] += 30
+    cache.set("fundamentals", "LATER", {})
+    assert cache.db.execute("SELECT COUNT(*) FROM entries").fetchone() == (2,)
+
+
+def test_importing_helpers_creates_no_files():
+    script = textwrap.dedent(f"""
+        import os, sqlite3, sys
+        sys.path.insert(0, {BOT_DIR!r})
+        import bar_cache
+        def touched(*args, **kwargs):
+            raise AssertionError("disk touched at import")
+        bar_cache.os.makedirs = touched
+        sqlite3.connect = touched
+        import helpers, top_movers
+        assert helpers.BAR_CACHE is None and helpers.REF_CACHE is None
+    """)
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=BOT_DIR)
@@ -0,0 +1,95 @@
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+import robin_stocks.robinhood as rh
+
+import bar_cache
+import helpers
+import login
+import replay
+from ref_cache import TTLCache
+
+START = datetime(2025, 1, 10, 15, 0, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [START]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def production(tmp_path, monkeypatch):
+    """Stand-ins for the production caches, which a session must neither read nor fill."""
+    caches = (bar_cache.BarCache(str(tmp_path / "bars")), TTLCache())
+    monkeypatch.setattr(bar_cache, "DEFAULT_CACHE_DIR", str(tmp_path / "bars"))
+    monkeypatch.setattr(helpers, "BAR_CACHE", caches[0])
+    monkeypatch.setattr(helpers, "REF_CACHE", caches[1])
+    monkeypatch.setattr(login.SESSION_MANAGER, "ensure_login", lambda: None)
+    return caches
+
+
+def fake_historicals(calls):
+    def get_stock_historicals(symbols, interval="hour", span="week", bounds="regular", info=None):
+        calls.append(span)
+        step = 300 if interval == "5minute" else 86400
+        end = int(time.time()) // step * step
+        return [{"symbol": symbol, "begins_at": datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                 "open_price": "100", "high_price": "101", "low_price": "99", "close_price": "100.5", "volume": 10}
+                for symbol in symbols for t in range(end - 20 * step, end + 1, step)]
+    return get_stock_historicals
+
+
+def session_run(clock):
+    """A cold read followed, 10 minutes later, by a warm read whose span depends on the clock."""
+    helpers.get_historical_bars(["AAA"], "5minute", "week")
+    clock[0] += 600
+    return helpers.get_historical_bars(["AAA"], "5minute", "week")["AAA"]
+
+
+def test_replay_is_isolated_and_deterministic_after_a_delay(tmp_path, clock, production, monkeypatch):
+    log_path = str(tmp_path / "session.log")
+    calls = []
+    monkeypatch.setattr(rh.stocks, "get_stock_historicals", fake_historicals(calls))
+    with replay.ReplaySession(log_path, "record"):
+        recorded = session_run(clock)
+    assert calls == ["week", "day"]
+
+    # A month later, with the network gone.
+    clock[0] = START + 30 * 86400
+    monkeypatch.setattr(rh.stocks, "get_stock_historicals", lambda *args, **kwargs: pytest.fail("network call"))
+    manager = login.SESSION_MANAGER
+    with replay.ReplaySession(log_path, "replay"):
+        assert isinstance(login.SESSION_MANAGER, replay.OfflineSession)
+        replayed = session_run(clock)
+    assert (replayed == recorded).all()
+
+    # Everything the sessions touched is restored, and the production caches stayed empty.
+    assert login.SESSION_MANAGER is manager
+    assert helpers.time is time and bar_cache.time is time
+    assert helpers.BAR_CACHE is production[0] and helpers.REF_CACHE is production[1]
+    assert production[0].tickers("5minute") == []
+    assert production[1].stats == TTLCache().stats
+
+
+def test_replay_miss_raises(tmp_path, clock, production):
+    with replay.ReplaySession(str(tmp_path / "empty.log"), "replay"):
+        with pytest.raises(replay.ReplayMissError):
+            helpers.get_historical_bars(["AAA"], "day", "year")
+
+
+def test_default_bar_caches_are_scratch_during_a_session(tmp_path, clock, production):
+    import stock_performance
+
+    with replay.ReplaySession(str(tmp_path / "session.log"), "record") as session:
+        fetcher = stock_performance.StockStatsFetcher()
+        assert fetcher.bar_cache.cache_dir.startswith(session.scratch_dir)
+        bars = np.zeros(1, dtype=bar_cache.BAR_DTYPE)
+        bars["time"] = int(START)
+        fetcher.bar_cache.append("AAA", "1d", bars, span="year")
+        assert fetcher.bar_cache.tickers("1d") == ["AAA"]
+    assert bar_cache.DEFAULT_CACHE_DIR == str(tmp_path / "bars")
+    assert production[0].tickers("1d") == []
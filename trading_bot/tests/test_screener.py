@@ -0,0 +1,24 @@
+import os
+
+import screener
+
+HEADER = "Ticker,Market Cap,Sector,Platform\n"
+
+
+def write(path, rows, mtime):
+    path.write_text(HEADER + "".join(f"{symbol},{cap},Technology,NASDAQ\n" for symbol, cap in rows))
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_get_screener_is_keyed_by_path_and_reloads_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(screener, "_SCREENERS", {})
+    first = write(tmp_path / "a.csv", [("AAA", 1)], 1_000_000)
+    second = write(tmp_path / "b.csv", [("BBB", 2), ("CCC", 3)], 1_000_000)
+    store = screener.get_screener(first)
+    assert list(store.symbols) == ["AAA"]
+    assert list(screener.get_screener(second).symbols) == ["BBB", "CCC"]
+    assert screener.get_screener(first) is store
+
+    write(tmp_path / "a.csv", [("AAA", 1), ("DDD", 4)], 2_000_000)
+    assert list(screener.get_screener(first).symbols) == ["AAA", "DDD"]
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_performance
+from bar_cache import BarCache
+
+
+def history(days=30, start="2025-01-01"):
+    index = pd.date_range(start, periods=days, freq="D")
+    close = np.linspace(100, 130, days)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1e6}, index=index)
+
+
+def bulk_download(frames):
+    """Fake yf.download: (ticker, field) columns, all-NaN for tickers the download failed for."""
+    def download(tickers, **kwargs):
+        index = history().index
+        columns = {}
+        for ticker in tickers:
+            frame = frames.get(ticker)
+            for field in ("Open", "High", "Low", "Close", "Volume"):
+                columns[(ticker, field)] = frame[field] if frame is not None else pd.Series(np.nan, index=index)
+        return pd.DataFrame(columns)
+    return download
+
+
+class FakeTicker:
+    calls = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        return {"longName": self.ticker, "marketCap": 1e9}
+
+    def history(self, **kwargs):
+        FakeTicker.calls.append(self.ticker)
+        return history()
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(stock_performance.yf, "download", bulk_download({"AAA": history()}))
+    monkeypatch.setattr(stock_performance.yf, "Ticker", FakeTicker)
+    FakeTicker.calls = []
+    return stock_performance.StockStatsFetcher(BarCache(str(tmp_path)), max_workers=2, rate=1000, burst=1000,
+                                               backoff=0)
+
+
+def test_download_history_leaves_out_failed_tickers(fetcher):
+    bars = fetcher.download_history(["AAA", "BBB"])
+    assert list(bars) == ["AAA"]
+    assert len(bars["AAA"]) == 30
+
+
+def test_bulk_misses_stay_due_and_are_retried_per_ticker(fetcher):
+    fetcher.prefetch_history(["AAA", "BBB"])
+    assert not fetcher.bar_cache.needs_fetch("AAA", "1d", "year")
+    assert fetcher.bar_cache.needs_fetch("BBB", "1d", "year")
+
+    stats = fetcher.get_stats_for_tickers(["AAA", "BBB"])
+    assert FakeTicker.calls == ["BBB"]
+    assert stats["Year Growth (%)"].notna().all()
+    assert not fetcher.bar_cache.needs_fetch("BBB", "1d", "year")
+
+
+class FakeStatsFetcher:
+    chunk_size = 500
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requested = []
+
+    def iter_stats(self, tickers):
+        self.requested = list(tickers)
+        for ticker in tickers:
+            if ticker not in self.failing:
+                yield {"Ticker": ticker, "Name": "new", "Date": "2099-01-01"}
+
+
+def analyzer(tmp_path, monkeypatch, rows, failing=()):
+    stats_csv = str(tmp_path / "stats.csv")
+    pd.DataFrame(rows, columns=stock_performance.StockAnalyzer.STATS_COLUMNS).to_csv(stats_csv, index=False)
+    listed = pd.DataFrame({"Ticker": [row["Ticker"] for row in rows], "Platform": "NASDAQ"})
+    result = stock_performance.StockAnalyzer(str(tmp_path / "listed.csv"), FakeStatsFetcher(failing), stats_csv)
+    monkeypatch.setattr(result.downloader, "refresh", lambda output_file: (listed, [], []))
+    return result
+
+
+def test_legacy_and_iso_dates_are_both_read(tmp_path, monkeypatch):
+    today = pd.Timestamp.now()
+    rows = [{"Ticker": "ISO", "Name": "old", "Date": today.strftime("%Y-%m-%d")},
+            {"Ticker": "LEGACY", "Name": "old", "Date": f"{today.month}/{today.day}/{today:%y}"},
+            {"Ticker": "STALE", "Name": "old", "Date": "2/14/25"}]
+    stats = analyzer(tmp_path, monkeypatch, rows)
+    stats.run()
+    assert stats.stats_fetcher.requested == ["STALE"]
+    assert stats.report["reused"] == 2
+
+
+def test_stale_row_is_kept_when_its_refetch_fails(tmp_path, monkeypatch):
+    rows = [{"Ticker": "GOOD", "Name": "old", "Date": "2/14/25"},
+            {"Ticker": "DOWN", "Name": "old", "Date": "2/14/25"}]
+    stats = analyzer(tmp_path, monkeypatch, rows, failing={"DOWN"})
+    written = pd.read_csv(stats.run(), dtype=str).set_index("Ticker")
+    assert written.loc["GOOD", "Name"] == "new"
+    assert written.loc["DOWN", "Name"] == "old"
+    assert written.loc["DOWN", "Date"] == "2/14/25"
+    assert stats.report["kept_stale"] == 1
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+import helpers
+import login
+import top_movers
+from ref_cache import TTLCache
+
+
+class FakeIndex:
+    def __init__(self, sectors, names=None):
+        self.sectors = sectors
+        self.names = names or {}
+
+    def sector(self, symbol):
+        return self.sectors.get(symbol.upper())
+
+    def lookup(self, symbol):
+        if symbol.upper() not in self.sectors:
+            return None
+        return {"company_name": self.names.get(symbol.upper(), "N/A"), "pe_ratio": float("nan")}
+
+
+def quote(symbol, previous=100.0, last=105.0):
+    return {"symbol": symbol, "previous_close": str(previous), "last_trade_price": str(last)}
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(login.SESSION_MANAGER, "ensure_login", lambda: None)
+    monkeypatch.setattr(helpers, "REF_CACHE", TTLCache())
+
+
+def scan(monkeypatch, movers, index_sectors, fundamentals=None):
+    monkeypatch.setattr(top_movers, "rh", SimpleNamespace(markets=SimpleNamespace(get_top_movers=lambda: movers)))
+    monkeypatch.setattr(top_movers, "get_index", lambda: FakeIndex(index_sectors))
+    monkeypatch.setattr(top_movers, "get_fundamentals", lambda symbols: {
+        symbol: {"sector": sector} for symbol, sector in (fundamentals or {}).items() if symbol in symbols})
+    return {sector: [stock["symbol"] for stock in stocks] for sector, stocks in top_movers.scan_top_movers().items()}
+
+
+def test_index_sectors_are_mapped_explicitly(monkeypatch):
+    result = scan(monkeypatch, [quote("BANK"), quote("CARS"), quote("SOUP"), quote("PILL")],
+                  {"BANK": "Financial Services", "CARS": "Consumer Cyclical", "SOUP": "Consumer Defensive",
+                   "PILL": "Healthcare"})
+    assert result["Financials"] == ["BANK"]
+    assert result["Consumer Discretionary"] == result["Consumer Durables"] == ["CARS"]
+    assert result["Consumer Staples"] == ["SOUP"]
+    assert result["Health Care"] == ["PILL"]
+
+
+def test_fundamentals_sectors_use_keyword_matching(monkeypatch):
+    result = scan(monkeypatch, [quote("CHIP")], {}, fundamentals={"CHIP": "Electronic Technology"})
+    assert result["Information Technology"] == ["CHIP"]
+    assert sum(len(symbols) for symbols in result.values()) == 1
+
+
+def test_index_sectors_cover_every_valid_sector():
+    mapped = [sector for sectors in top_movers.INDEX_SECTORS.values() for sector in sectors]
+    assert set(mapped) == set(top_movers.VALID_SECTORS)
+
+
+@pytest.mark.parametrize("stock_sector, expected", [
+    ("Electronic Technology", ("Information Technology",)),
+    ("Health Technology", ("Health Care", "Information Technology")),
+    ("Energy Minerals", ("Energy",)),
+    ("Consumer Durables", ("Consumer Discretionary", "Consumer Durables", "Consumer Staples")),
+    ("", ()),
+    (None, ()),
+])
+def test_matching_sectors(stock_sector, expected):
+    assert top_movers.matching_sectors(stock_sector) == expected
+
+
+def test_scan_ranks_by_absolute_change_in_one_pass(monkeypatch):
+    calls = []
+    movers = [quote("UP", last=103.0), quote("DOWN", last=90.0), quote("FLAT", last=100.5), quote("OUT", last=150.0)]
+    monkeypatch.setattr(top_movers, "rh", SimpleNamespace(markets=SimpleNamespace(
+        get_top_movers=lambda: calls.append("movers") or movers)))
+    monkeypatch.setattr(top_movers, "get_index", lambda: FakeIndex(dict.fromkeys(["UP", "DOWN", "FLAT", "OUT"],
+                                                                                   "Technology")))
+    result = top_movers.scan_top_movers(["Information Technology", "Energy", "Bogus"], top_n=2,
+                                        universe={"UP", "DOWN", "FLAT"})
+    assert calls == ["movers"]
+    assert list(result) == ["Information Technology", "Energy"]
+    assert [stock["symbol"] for stock in result["Information Technology"]] == ["DOWN", "UP"]
+    assert result["Information Technology"][0]["percent_change"] == pytest.approx(-10.0)
+    assert result["Energy"] == []
+    assert helpers.get_ref_cache().get("quote", "OUT") is not None  # Every mover's quote is cached.
+
+
+def test_company_details_keep_live_fundamentals(monkeypatch):
+    monkeypatch.setattr(helpers, "get_index", lambda: FakeIndex({"AAPL": "Technology"}, {"AAPL": "Apple Inc."}))
+    monkeypatch.setattr(helpers, "get_fundamentals", lambda symbols: {
+        "AAPL": {"headquarters_state": "CA", "market_cap": "3000000000000", "average_volume": "50000000",
+                 "pe_ratio": None},
+        "NEWCO": {"headquarters_state": "NY", "market_cap": "1000000000", "average_volume": "100",
+                  "pe_ratio": "12.5"}})
+    instruments = []
+    monkeypatch.setattr(helpers, "get_instruments",
+                        lambda symbols: instruments.extend(symbols) or {"NEWCO": {"simple_name": "NewCo"}})
+    monkeypatch.setattr(helpers, "get_quotes", lambda symbols: {"AAPL": quote("AAPL")})
+
+    details = helpers.get_company_details_batch(["AAPL", "NEWCO"])
+    assert instruments == ["NEWCO"]
+    assert details["AAPL"] == {"company_name": "Apple Inc.", "headquarters": "CA", "stock_price": "105.0",
+                               "market_cap": "3.00T", "average_volume": "50.00M", "pe_ratio": "N/A"}
+    assert details["NEWCO"]["company_name"] == "NewCo"
+    assert details["NEWCO"]["stock_price"] == "N/A"
+    assert details["NEWCO"]["pe_ratio"] == "12.5"
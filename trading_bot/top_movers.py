@@ -1,9 +1,10 @@
 import robin_stocks.robinhood as rh
-import login 
 import pandas as pd
-from helpers import get_quote_percent_change, build_temp_table  
-
-login.login()
+from functools import lru_cache
+import helpers
+from helpers import quote_percent_change, build_temp_table, get_fundamentals
+from sector_index import get_index
+from login import requires_login
 
 # List of valid sectors
 VALID_SECTORS = [
@@ -21,7 +22,104 @@ VALID_SECTORS = [
     "Utilities"
 ]
 
-def get_top_movers_by_sector(sector="Information Technology", info=None):
+# Lower-cased words of each valid sector, split once instead of for every stock.
+SECTOR_KEYWORDS = {sector: tuple(sector.lower().split()) for sector in VALID_SECTORS}
+
+# Valid sectors of each sector name used by the local index (yfinance's taxonomy, as written in
+# stock_stats.csv). These are mapped explicitly rather than by keyword: "Financial Services"
+# shares no word with "Financials", and "Consumer Cyclical" would match every consumer sector.
+INDEX_SECTORS = {
+    "Basic Materials": ("Materials",),
+    "Communication Services": ("Communication Services",),
+    "Consumer Cyclical": ("Consumer Discretionary", "Consumer Durables"),
+    "Consumer Defensive": ("Consumer Staples",),
+    "Energy": ("Energy",),
+    "Financial Services": ("Financials",),
+    "Healthcare": ("Health Care",),
+    "Industrials": ("Industrials",),
+    "Real Estate": ("Real Estate",),
+    "Technology": ("Information Technology",),
+    "Utilities": ("Utilities",),
+}
+
+@lru_cache(maxsize=None)
+def matching_sectors(stock_sector):
+    """
+    Returns the valid sectors a Robinhood fundamentals sector string belongs to. A sector
+    matches if any of its words occurs in the string. Results are memoized per distinct string.
+    Sector names from the local index go through INDEX_SECTORS instead.
+    
+    :param stock_sector: Sector as reported by the fundamentals endpoint (e.g., "Electronic Technology").
+    :returns: Tuple of matching entries from VALID_SECTORS.
+    """
+    stock_sector = (stock_sector or "").lower()
+    return tuple(sector for sector, words in SECTOR_KEYWORDS.items()
+                 if any(word in stock_sector for word in words))
+
+@requires_login
+def scan_top_movers(sectors=VALID_SECTORS, top_n=10, universe=None):
+    """
+    Returns the top market movers of every requested sector in a single pass.
+    Movers (which already carry their quotes) are fetched once; each mover's sector comes
+    from the local sector index, and fundamentals (through helpers.REF_CACHE) are fetched in
+    one call only for movers the index does not know. The movers' quotes are stored in the
+    quote cache for later steps.
+    
+    :param sectors: Sectors to report; unrecognized names are skipped.
+    :param top_n: Number of movers to keep per sector.
+    :param universe: (Optional) Set of symbols to restrict the movers to, e.g. the result of a
+                     screener.get_screener().screen(...) query.
+    :returns: Dictionary mapping each sector to its movers, sorted by absolute percent change.
+    """
+    sectors = [sector for sector in sectors if sector in VALID_SECTORS]
+    result = {sector: [] for sector in sectors}
+
+    # Step 1: Get the top 20 movers together with their quotes
+    top_movers = rh.markets.get_top_movers()
+    if not top_movers:
+        print("No market movers found.")
+        return result
+    quotes = {stock["symbol"]: stock for stock in top_movers if stock}
+    for symbol, quote in quotes.items():
+        helpers.get_ref_cache().set("quote", symbol, quote)
+    if universe is not None:
+        quotes = {symbol: quote for symbol, quote in quotes.items() if symbol in universe}
+    
+    # Step 2: Look up each mover's sector locally, fetching fundamentals only for unknown symbols.
+    # Each source's sector names are mapped onto VALID_SECTORS with that source's own rules.
+    index = get_index()
+    stock_sectors = {symbol: index.sector(symbol) for symbol in quotes}
+    valid_sectors = {symbol: INDEX_SECTORS.get(stock_sector, ())
+                     for symbol, stock_sector in stock_sectors.items() if stock_sector is not None}
+    unknown = [symbol for symbol, stock_sector in stock_sectors.items() if stock_sector is None]
+    if unknown:
+        for symbol, stock in get_fundamentals(unknown).items():
+            stock_sectors[symbol] = stock.get("sector") or ""
+            valid_sectors[symbol] = matching_sectors(stock_sectors[symbol])
+
+    # Step 3: Assign each stock to its sectors and compute percent change from its quote
+    for symbol, matches in valid_sectors.items():
+        stock_sector = stock_sectors[symbol]
+        wanted = [sector for sector in matches if sector in result]
+        if not wanted:
+            continue
+        price_change = quote_percent_change(quotes[symbol])
+        if price_change is None:
+            continue
+        for sector in wanted:
+            result[sector].append({
+                "symbol": symbol,
+                "percent_change": price_change,
+                "sector": stock_sector,
+                "price": float(quotes[symbol]["last_trade_price"])
+            })
+    
+    # Step 4: Sort movers by the absolute value of price change (highest first) and keep the top N
+    for sector, movers in result.items():
+        result[sector] = sorted(movers, key=lambda x: abs(float(x["percent_change"])), reverse=True)[:top_n]
+    return result
+
+def get_top_movers_by_sector(sector="Information Technology", info=None, universe=None):
     """
     Returns the Top 10 market movers filtered by sector.
     
@@ -31,6 +129,7 @@ def get_top_movers_by_sector(sector="Information Technology", info=None):
                    "Energy", "Financials", "Health Care", "Industrials", "Information Technology",
                    "Materials", "Real Estate", "Utilities"
     :param info: (Optional) Specific stock data to return.
+    :param universe: (Optional) Set of symbols to restrict the movers to (see scan_top_movers).
     :returns: List of top movers in the specified sector.
     """
     # Validate that the requested sector is in our valid sectors list.
@@ -38,37 +137,4 @@ def get_top_movers_by_sector(sector="Information Technology", info=None):
         print(f"Sector '{sector}' is not recognized. Please choose from: {', '.join(VALID_SECTORS)}")
         return []
     
-    # Step 1: Get the top 20 movers
-    top_movers = rh.markets.get_top_movers()
-    if not top_movers:
-        print("No market movers found.")
-        return []
-    
-    # Step 2: Get stock symbols from movers
-    symbols = [stock["symbol"] for stock in top_movers]
-    
-    # Step 3: Fetch fundamentals (including sector) for each stock
-    stock_fundamentals = rh.stocks.get_fundamentals(symbols)
-
-    # print (stock_fundamentals[:1])
-
-    
-    # Step 4: Filter stocks belonging to the requested sector and compute percent change using the helper function
-    sector_movers = []
-    for stock in stock_fundamentals:
-        stock_sector = stock.get("sector", "")
-        if any(word in stock_sector.lower() for word in sector.lower().split()):
-            symbol = stock.get("symbol")
-            # Get the percent change from the helper function
-            price_change = get_quote_percent_change(symbol)
-            if price_change is not None:
-                sector_movers.append({
-                    "symbol": symbol,
-                    "percent_change": price_change,
-                    "sector": stock_sector
-                })
-    
-    # Step 5: Sort movers by the absolute value of price change (highest first) and return the top 10
-    sector_movers = sorted(sector_movers, key=lambda x: abs(float(x["percent_change"])), reverse=True)
-    
-    return sector_movers[:10]
+    return scan_top_movers([sector], universe=universe)[sector]